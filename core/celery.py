@@ -1,6 +1,7 @@
 # core/celery.py
 import os
 from celery import Celery
+from celery.signals import worker_init
 
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
@@ -12,3 +13,12 @@ app.autodiscover_tasks()
 @app.task(bind=True)
 def debug_task(self):
     print(f'Request: {self.request!r}')
+
+
+@worker_init.connect
+def warm_embedding_models(**kwargs):
+    # runs in the main worker process before the prefork pool starts
+    from django.conf import settings
+    if getattr(settings, 'EMBEDDING_WARMUP', False):
+        from resumes.utils.model_registry import warm_up
+        warm_up()
@@ -42,6 +42,14 @@ CELERY_BEAT_SCHEDULE = {
         'schedule': 60.0,
     },
 }
+# resume ingestion stages on their own queues (workers: -Q ingest_extract,ingest_derive,...)
+INGEST_SEPARATE_QUEUES = config('INGEST_SEPARATE_QUEUES', default=False, cast=bool)
+CELERY_TASK_ROUTES = {
+    **{f"resumes.ingest_{stage}": {"queue": f"ingest_{stage}"}
+       for stage in ('extract', 'derive', 'embed', 'index', 'rank')},
+    # the coalesced embedding batch runs where the embed stage's model is loaded
+    "resumes.flush_pending_embeddings": {"queue": "ingest_embed"},
+} if INGEST_SEPARATE_QUEUES else {}
 
 # -----------------------------------------------------
 # Database
@@ -112,6 +120,58 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# -----------------------------------------------------
+# Search indexes (resume matching)
+# -----------------------------------------------------
+SEARCH_INDEX_ROOT = Path(os.getenv("SEARCH_INDEX_ROOT", BASE_DIR / 'search_index'))
+RESUME_TFIDF_INDEX_DIR = SEARCH_INDEX_ROOT / 'tfidf'
+RESUME_TFIDF_DELTA_MAX_BYTES = int(os.getenv("RESUME_TFIDF_DELTA_MAX_BYTES", str(64 * 1024 * 1024)))  # then compacted
+VECTOR_INDEX_DIR = SEARCH_INDEX_ROOT / 'vectors'
+VECTOR_INDEX_BACKEND = os.getenv("VECTOR_INDEX_BACKEND", "ivf")   # "ivf" | "flat"
+VECTOR_INDEX_NPROBE = int(os.getenv("VECTOR_INDEX_NPROBE", "8"))
+VECTOR_PREFILTER_MIN = int(os.getenv("VECTOR_PREFILTER_MIN", "5000"))  # larger pools are narrowed by the index first
+VECTOR_PREFILTER_K = int(os.getenv("VECTOR_PREFILTER_K", "1000"))      # nearest rows kept for the full blend
+EMBEDDING_MODEL_NAME = os.getenv("EMBEDDING_MODEL_NAME", "all-MiniLM-L6-v2")
+EMBEDDINGS_ENABLED = config('EMBEDDINGS_ENABLED', default=True, cast=bool)
+EMBEDDING_WARMUP = config('EMBEDDING_WARMUP', default=False, cast=bool)   # preload in gunicorn/celery master
+EMBEDDING_STORAGE_DTYPE = os.getenv("EMBEDDING_STORAGE_DTYPE", "float32")   # "float32" | "float16" | "int8"
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))        # texts per model.encode call
+EMBEDDING_WRITE_CHUNK = int(os.getenv("EMBEDDING_WRITE_CHUNK", "500"))     # rows per bulk_update
+EMBEDDING_COALESCE_SECONDS = int(os.getenv("EMBEDDING_COALESCE_SECONDS", "5"))
+EMBEDDING_CLAIM_TIMEOUT = 600                                              # claimed queue rows a dead flush left are requeued
+TEXT_CACHE_BACKEND = os.getenv("TEXT_CACHE_BACKEND", "disk")               # "disk" | "redis" | "off"
+TEXT_CACHE_DIR = SEARCH_INDEX_ROOT / 'text'
+TEXT_CACHE_TTL = int(os.getenv("TEXT_CACHE_TTL", "0")) or None            # redis only; None = no expiry
+PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", "2"))          # 0 = extract inline
+PDF_EXTRACT_TIMEOUT = int(os.getenv("PDF_EXTRACT_TIMEOUT", "60"))          # seconds per document
+PDF_EXTRACT_MAX_MEMORY_MB = int(os.getenv("PDF_EXTRACT_MAX_MEMORY_MB", "768"))
+PDF_EXTRACT_PAGES_PER_TASK = int(os.getenv("PDF_EXTRACT_PAGES_PER_TASK", "4"))
+PDF_EXTRACT_MAX_TASKS_PER_CHILD = int(os.getenv("PDF_EXTRACT_MAX_TASKS_PER_CHILD", "50"))
+PDF_EXTRACTOR_PREFERENCE = ("pdfminer", "pdfplumber", "pypdf2")         # order used until stats exist
+PDF_PLANNER_MIN_SAMPLES = 5
+PDF_PLANNER_MIN_SUCCESS = 0.8
+PDF_PLANNER_EXPLORE = 0.05
+PDF_OCR_ENABLED = config('PDF_OCR_ENABLED', default=False, cast=bool)
+PDF_OCR_DPI = int(os.getenv("PDF_OCR_DPI", "300"))                         # Tesseract is tuned for ~300 dpi
+PDF_OCR_LANG = os.getenv("PDF_OCR_LANG", "eng")
+PDF_OCR_POPPLER_PATH = os.getenv("PDF_OCR_POPPLER_PATH") or None
+PDF_OCR_MAX_PAGES = int(os.getenv("PDF_OCR_MAX_PAGES", "4"))
+PDF_OCR_MIN_CHARS = int(os.getenv("PDF_OCR_MIN_CHARS", "1500"))            # stop once this much text is found
+PDF_OCR_TIMEOUT = int(os.getenv("PDF_OCR_TIMEOUT", "120"))
+MATCH_CACHE_FRESH_SECONDS = int(os.getenv("MATCH_CACHE_FRESH_SECONDS", "300"))  # then served stale while refreshing
+MATCH_CACHE_TTL = int(os.getenv("MATCH_CACHE_TTL", "3600"))
+MATCH_CACHE_LOCK_SECONDS = 60
+MATCH_CACHE_LOCK_WAIT = 10
+MATCH_CACHE_PATCH_MAX = 200                                              # more pending resume changes -> full recompute
+RANKING_STORE_BACKEND = os.getenv("RANKING_STORE_BACKEND", "auto")        # "auto" (redis if REDIS_URL) | "redis" | "local"
+RANKING_UPDATE_DELAY = 2                                                  # seconds; coalesces back-to-back saves
+SHORTLIST_EXPORT_DIR = Path(os.getenv("SHORTLIST_EXPORT_DIR", BASE_DIR / 'exports'))  # background exports; not under MEDIA_ROOT
+SHORTLIST_EXPORT_TTL = int(os.getenv("SHORTLIST_EXPORT_TTL", str(24 * 3600)))
+RECOMMENDATIONS_TOP_K = 50                                                # jobs materialized per resume
+RECOMMENDATIONS_MAX_AGE = 24 * 3600                                       # older rows are served and refreshed
+RECOMMENDATIONS_HISTORY_TTL = 3600                                        # cached results of superseded resumes (?include_history)
+SKILL_TAXONOMY_PATH = Path(os.getenv("SKILL_TAXONOMY_PATH", BASE_DIR / 'resumes' / 'data' / 'skills.json'))
+
 # -----------------------------------------------------
 # Security
 # -----------------------------------------------------
@@ -141,6 +201,9 @@ REST_FRAMEWORK = {
     ],
     'DEFAULT_PERMISSION_CLASSES': ['rest_framework.permissions.IsAuthenticated'],
 }
+API_PAGE_SIZE = int(os.getenv("API_PAGE_SIZE", "50"))                    # list endpoints: keyset pages (?cursor=)
+API_MAX_PAGE_SIZE = int(os.getenv("API_MAX_PAGE_SIZE", "200"))
+API_PAGINATE_BY_DEFAULT = os.getenv("API_PAGINATE_BY_DEFAULT", "0") == "1"  # page lists without ?page_size= / ?cursor= too
 
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=15),
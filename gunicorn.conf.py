@@ -0,0 +1,14 @@
+# gunicorn.conf.py (picked up automatically from the project root)
+import os
+
+
+def on_starting(server):
+    # optional pre-fork warm-up: load embedding models once in the master so
+    # workers inherit them copy-on-write. Enable with EMBEDDING_WARMUP=1.
+    if os.getenv("EMBEDDING_WARMUP", "").strip().lower() not in ("1", "true", "yes", "on"):
+        return
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+    import django
+    django.setup()
+    from resumes.utils.model_registry import warm_up
+    warm_up()
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.6 on 2026-10-17 08:32
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('interviews', '0009_alter_interview_created_by'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='interview',
+            index=models.Index(fields=['created_at', 'id'], name='interview_created_keyset'),
+        ),
+        migrations.AddIndex(
+            model_name='interviewattempt',
+            index=models.Index(fields=['interview', 'started_at', 'id'], name='attempt_interview_keyset'),
+        ),
+        migrations.AddIndex(
+            model_name='interviewinvite',
+            index=models.Index(fields=['candidate', 'created_at', 'id'], name='invite_candidate_keyset'),
+        ),
+    ]
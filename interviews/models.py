@@ -23,6 +23,12 @@ class Interview(models.Model):
 
     # 🔑 Link to Job
     job = models.ForeignKey(Job, null=True, blank=True, on_delete=models.SET_NULL, related_name="interviews")
+
+    class Meta:
+        indexes = [
+            # keyset pagination (resumes.utils.pagination)
+            models.Index(fields=['created_at', 'id'], name='interview_created_keyset'),
+        ]
     
 
 
@@ -98,7 +104,11 @@ class InterviewAttempt(models.Model):
     passed = models.BooleanField(default=False)
     started_at = models.DateTimeField(auto_now_add=True)
     finished_at = models.DateTimeField(null=True, blank=True)
-    
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['interview', 'started_at', 'id'], name='attempt_interview_keyset'),
+        ]
 
     def __str__(self):
         return f"{self.candidate} - {self.interview}"
@@ -128,6 +138,10 @@ class InterviewInvite(models.Model):
     reminder_1h_sent = models.BooleanField(default=False)
     reminder_15m_sent = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['candidate', 'created_at', 'id'], name='invite_candidate_keyset'),
+        ]
 
     def __str__(self):
         return f"Invite {self.pk} -> {self.candidate} for {self.interview}"
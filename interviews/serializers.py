@@ -136,6 +136,9 @@ class InterviewInviteSerializer(serializers.ModelSerializer):
     # NEW: safe job title field (traverse interview -> job -> title)
     job_title = serializers.SerializerMethodField(read_only=True)
 
+    # what get_job_title reads (resumes.utils.query_planner)
+    query_hints = {'job_title': ('interview__job__title',)}
+
     class Meta:
         model = InterviewInvite
         fields = [
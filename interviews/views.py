@@ -24,6 +24,9 @@ from .serializers import (
     InterviewInviteSerializer,
 )
 
+from resumes.utils.pagination import KeysetPagination, paginated
+from resumes.utils.query_planner import optimize
+
 # tasks (optional)
 from .tasks import generate_questions_task, send_invite_notification
 
@@ -93,8 +96,8 @@ def recruiter_create_list_interviews(request):
             qs = Interview.objects.filter(created_by=request.user)
         else:
             qs = Interview.objects.all()
-        serializer = InterviewSerializer(qs, many=True, context={'request': request})
-        return Response(serializer.data)
+        return paginated(request, optimize(qs, InterviewSerializer), ('-created_at', '-id'), InterviewSerializer,
+                         context={'request': request})
 
     serializer = InterviewCreateUpdateSerializer(data=request.data, context={'request': request})
     if not serializer.is_valid():
@@ -175,9 +178,9 @@ def recruiter_add_questions(request, pk):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def list_public_interviews(request):
-    qs = Interview.objects.filter(is_active=True).order_by('-scheduled_at')
-    serializer = InterviewSerializer(qs, many=True, context={'request': request})
-    return Response(serializer.data)
+    # keyset on created_at: scheduled_at is nullable, so it can't anchor a cursor
+    qs = optimize(Interview.objects.filter(is_active=True), InterviewSerializer)
+    return paginated(request, qs, ('-created_at', '-id'), InterviewSerializer, context={'request': request})
 
 
 # ----------------- Candidate: get interview detail -----------------
@@ -394,9 +397,8 @@ def recruiter_list_attempts(request, pk):
         lookup['created_by'] = request.user
 
     interview = get_object_or_404(Interview, **lookup)
-    attempts = InterviewAttempt.objects.filter(interview=interview).order_by('-finished_at')
-    serializer = InterviewAttemptSerializer(attempts, many=True, context={'request': request})
-    return Response(serializer.data)
+    attempts = optimize(InterviewAttempt.objects.filter(interview=interview), InterviewAttemptSerializer)
+    return paginated(request, attempts, ('-started_at', '-id'), InterviewAttemptSerializer, context={'request': request})
 
 
 # ----------------- Recruiter: generate questions (async task) -----------------
@@ -643,14 +645,17 @@ def recruiter_invite_candidate_by_job(request, job_pk):
 def candidate_invites(request):
     # debug info: what server user is
     user_id = getattr(request.user, 'id', None)
-    invites_qs = InterviewInvite.objects.filter(candidate=request.user).select_related('interview').order_by('-created_at')
-    serializer = InterviewInviteSerializer(invites_qs, many=True, context={'request': request})
+    invites_qs = optimize(InterviewInvite.objects.filter(candidate=request.user), InterviewInviteSerializer)
+    paginator = KeysetPagination(('-created_at', '-id'))
+    page = paginator.paginate_queryset(invites_qs, request)
+    serializer = InterviewInviteSerializer(page, many=True, context={'request': request})
     data = serializer.data
     return Response({
         'debug_user_id': user_id,
         'invites_count': invites_qs.count(),
-        'invites': data
-    })
+        'invites': data,
+        'next': paginator.next_cursor,
+    }, headers=paginator.response_headers())
 
 
 # ----------------- Candidate: respond to invite -----------------
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-17 08:32
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0009_delete_resume'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='quizattempt',
+            index=models.Index(fields=['started_at', 'id'], name='quizattempt_started_keyset'),
+        ),
+    ]
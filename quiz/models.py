@@ -33,6 +33,10 @@ class QuizAttempt(models.Model):
 
     class Meta:
         ordering = ['-started_at']
+        indexes = [
+            # keyset pagination (resumes.utils.pagination)
+            models.Index(fields=['started_at', 'id'], name='quizattempt_started_keyset'),
+        ]
 
 
 class Question(models.Model):
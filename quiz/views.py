@@ -12,6 +12,7 @@ from .models import Question, Quiz, QuizAttempt
 
 # resumes app models
 from resumes.models import Resume, Job
+from resumes.utils.pagination import paginated
 
 from .serializers import QuizSerializer, QuizAdminSerializer, QuizAttemptSerializer
 from .forms import ResumeForm
@@ -254,7 +255,7 @@ def list_quiz_attempts(request, job_id=None):
                 job_id = None
 
     # Build queryset: prefer attempts for specific quiz (if job_id provided)
-    qs = QuizAttempt.objects.all().order_by("-finished_at")
+    qs = QuizAttempt.objects.all()
 
     if job_id:
         # attempt -> quiz relationship: quiz__job_id is expected in your models (adjust if different)
@@ -264,8 +265,7 @@ def list_quiz_attempts(request, job_id=None):
     if not request.user.is_staff:
         qs = qs.filter(candidate=request.user)
 
-    serializer = QuizAttemptSerializer(qs, many=True, context={"request": request})
-    return Response(serializer.data)
+    return paginated(request, qs, ("-started_at", "-id"), QuizAttemptSerializer, context={"request": request})
 
 
 
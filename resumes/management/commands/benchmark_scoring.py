@@ -0,0 +1,75 @@
+# resumes/management/commands/benchmark_scoring.py
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from resumes.utils import scoring
+
+DEFAULT_CORPUS = Path(__file__).resolve().parents[2] / 'data' / 'scoring_corpus.json'
+
+
+class Command(BaseCommand):
+    help = "Time every scoring strategy and compare its rankings with a reference strategy"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--corpus', default=str(DEFAULT_CORPUS),
+                            help='JSON file with "jobs" and "resumes" lists (default: bundled fixture)')
+        parser.add_argument('--from-db', action='store_true',
+                            help='Use the jobs and resumes in the database instead of a corpus file')
+        parser.add_argument('--strategies', default='',
+                            help=f'Comma separated (default: all of {", ".join(sorted(scoring.STRATEGIES))})')
+        parser.add_argument('--reference', default=scoring.DEFAULT_STRATEGY,
+                            help='Strategy the others are compared with')
+        parser.add_argument('--repeats', type=int, default=3, help='Runs per query; the best is reported')
+        parser.add_argument('--k', type=int, default=10, help='Depth for top-k overlap')
+        parser.add_argument('--json', action='store_true', help='Print the raw report as JSON')
+
+    def _load_corpus(self, path):
+        try:
+            data = json.loads(Path(path).read_text(encoding='utf-8'))
+        except (OSError, ValueError) as e:
+            raise CommandError(f"can't read corpus {path}: {e}")
+        jobs = [scoring.prepare(
+            " ".join(filter(None, [j.get('title'), j.get('description'), j.get('skills_required')])),
+            skills=j.get('skills_required'), experience=j.get('experience_required'), id=j.get('id'),
+        ) for j in data.get('jobs', [])]
+        resumes = [scoring.prepare(
+            r.get('text', ''), skills=r.get('skills'), experience=r.get('experience'), id=r.get('id'),
+        ) for r in data.get('resumes', [])]
+        return jobs, resumes
+
+    def _load_db(self):
+        from resumes.models import Job, Resume
+        jobs = [scoring.prepare_job(j) for j in Job.objects.all()]
+        resumes = [scoring.prepare_resume(r) for r in Resume.objects.all()]
+        return jobs, resumes
+
+    def handle(self, *args, **options):
+        names = [s.strip() for s in options['strategies'].split(',') if s.strip()] or None
+        for name in (names or []) + [options['reference']]:
+            if name not in scoring.STRATEGIES:
+                raise CommandError(f"unknown strategy {name!r}; available: {', '.join(sorted(scoring.STRATEGIES))}")
+
+        jobs, resumes = self._load_db() if options['from_db'] else self._load_corpus(options['corpus'])
+        if not jobs or not resumes:
+            raise CommandError("need at least one job and one resume")
+
+        report = scoring.benchmark(jobs, resumes, names, reference=options['reference'],
+                                   repeats=options['repeats'], k=options['k'])
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        corpus = report.pop('_corpus')
+        self.stdout.write(
+            f"{corpus['queries']} jobs x {corpus['docs']} resumes; "
+            f"shared tokenization {corpus['prepare_ms']} ms; reference={options['reference']}"
+        )
+        topk = f"top{options['k']}_overlap"
+        self.stdout.write(f"{'strategy':<14}{'ms/query':>10}{'us/doc':>10}{'spearman':>10}{topk:>16}")
+        for name, row in report.items():
+            self.stdout.write(
+                f"{name:<14}{row['ms_per_query']:>10}{row['us_per_doc']:>10}"
+                f"{str(row['spearman']):>10}{str(row[topk]):>16}"
+            )
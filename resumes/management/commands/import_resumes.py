@@ -0,0 +1,192 @@
+# resumes/management/commands/import_resumes.py
+import hashlib
+import os
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max
+
+from accounts.models import UserProfile
+from resumes.models import Job, Resume
+from resumes.utils import ingestion
+from resumes.utils.extraction_service import extract_document, reset_pool
+
+
+def iter_files(source, extensions):
+    """(name, raw bytes) for every matching file of a directory tree or zip archive, in name order."""
+    if zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as zf:
+            for info in sorted(zf.infolist(), key=lambda i: i.filename):
+                if not info.is_dir() and info.filename.lower().endswith(extensions):
+                    yield os.path.basename(info.filename), zf.read(info)
+        return
+    for root, dirs, files in os.walk(source):
+        dirs.sort()
+        for name in sorted(files):
+            if name.lower().endswith(extensions):
+                with open(os.path.join(root, name), 'rb') as f:
+                    yield name, f.read()
+
+
+class Command(BaseCommand):
+    help = ("Bulk import resume files from a directory or zip: dedupe by content hash, extract text in the "
+            "extraction pool, insert rows in chunks. Re-running skips files already imported.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('source', help='Directory (searched recursively) or .zip archive')
+        parser.add_argument('--user', default=None,
+                            help='Username owning every imported resume (default: one candidate account per file)')
+        parser.add_argument('--chunk-size', type=int, default=200, help='Files per bulk_create')
+        parser.add_argument('--workers', type=int, default=4, help='Documents extracted concurrently')
+        parser.add_argument('--extensions', default='.pdf', help='Comma separated file extensions to import')
+        parser.add_argument('--dry-run', action='store_true', help='Hash and dedupe only; write nothing')
+
+    def handle(self, *args, **options):
+        source = options['source']
+        if not os.path.exists(source):
+            raise CommandError(f"{source} does not exist")
+        owner = None
+        if options['user']:
+            owner = User.objects.filter(username=options['user']).first()
+            if owner is None:
+                raise CommandError(f"no user {options['user']!r}")
+        extensions = tuple(e.strip().lower() for e in options['extensions'].split(',') if e.strip())
+        chunk_size = max(1, options['chunk_size'])
+
+        self.stats = {"seen": 0, "duplicates": 0, "imported": 0, "partial": 0, "bytes": 0}
+        self.imported_ids = []
+        started = time.monotonic()
+        pending = []
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, options['workers'])) as threads:
+                for name, raw in iter_files(source, extensions):
+                    self.stats["seen"] += 1
+                    pending.append((name, raw))
+                    if len(pending) >= chunk_size:
+                        self._import_chunk(pending, owner, threads, options['dry_run'])
+                        pending = []
+                        self._progress(started)
+                if pending:
+                    self._import_chunk(pending, owner, threads, options['dry_run'])
+        finally:
+            reset_pool()
+
+        elapsed = time.monotonic() - started
+        if self.stats["imported"] and not options['dry_run']:
+            self._publish(owner)
+        s = self.stats
+        self.stdout.write(self.style.SUCCESS(
+            f"Done in {elapsed:.1f}s: {s['seen']} files, {s['imported']} imported, {s['duplicates']} duplicates, "
+            f"{s['partial']} partial extractions ({s['seen'] / elapsed if elapsed else 0:.1f} files/s, "
+            f"{s['bytes'] / 1e6 / elapsed if elapsed else 0:.1f} MB/s)."
+        ))
+        if s["partial"]:
+            self.stdout.write("Partially extracted resumes are marked failed; re-run their pipeline with extract_resume_text.")
+        if s["imported"] and not options['dry_run']:
+            self.stdout.write("Embedding and TF-IDF indexing of the imported resumes are queued.")
+
+    def _progress(self, started):
+        s = self.stats
+        rate = s["seen"] / max(time.monotonic() - started, 1e-9)
+        self.stdout.write(f"  seen={s['seen']} imported={s['imported']} duplicates={s['duplicates']} ({rate:.1f} files/s)")
+
+    def _import_chunk(self, files, owner, threads, dry_run):
+        # dedupe within the chunk and against every earlier upload / import (indexed)
+        by_hash = {}
+        for name, raw in files:
+            by_hash.setdefault(hashlib.sha256(raw).hexdigest(), (name, raw))
+        existing = set(Resume.objects.filter(content_hash__in=list(by_hash)).values_list('content_hash', flat=True))
+        fresh = [(digest, name, raw) for digest, (name, raw) in by_hash.items() if digest not in existing]
+        self.stats["duplicates"] += len(files) - len(fresh)
+        if not fresh or dry_run:
+            return
+
+        # each call fans its pages out to the extraction pool; several documents keep it busy
+        def extract(raw):
+            stats = {}
+            text = extract_document(raw, stats=stats)
+            return text, bool(stats.get("complete"))
+        extracted = list(threads.map(extract, [raw for _, _, raw in fresh]))
+
+        from resumes.views import extract_experience, extract_skills
+        rows = []
+        for (digest, name, raw), (text, complete) in zip(fresh, extracted):
+            r = Resume(
+                user=owner, content_hash=digest, extracted_text=text[:50000],
+                skills=extract_skills(text), experience=extract_experience(text),
+                # one account per file: each row is its user's canonical resume
+                is_latest=owner is None,
+                ingest_status=ingestion.READY if complete else ingestion.FAILED,
+                ingest_error='' if complete else 'extract: partial extraction during import',
+            )
+            r.refresh_features()
+            rows.append(r)
+            self.stats["bytes"] += len(raw)
+            self.stats["partial"] += not complete
+
+        # users, resumes and their files commit together, so an interrupted run
+        # leaves no half-imported chunk; storage isn't transactional, so the
+        # files of a chunk that rolls back are deleted again
+        written = []
+        try:
+            with transaction.atomic():
+                if owner is None:
+                    users = [User(username=f"import-{digest[:16]}") for digest, _, _ in fresh]
+                    for u in users:
+                        u.set_unusable_password()
+                    names = [u.username for u in users]
+                    existing_users = {u.username: u for u in User.objects.filter(username__in=names)}
+                    new_users = [u for u in users if u.username not in existing_users]
+                    User.objects.bulk_create(new_users)
+                    created = {u.username: u for u in User.objects.filter(username__in=[u.username for u in new_users])}
+                    UserProfile.objects.bulk_create([UserProfile(user=u, role='student') for u in created.values()])
+                    by_name = {**existing_users, **created}
+                    for r, u in zip(rows, users):
+                        r.user = by_name[u.username]
+                for r, (_, name, raw) in zip(rows, fresh):
+                    r.file.save(name, ContentFile(raw), save=False)
+                    written.append(r.file)
+                # bulk_create sends no post_save: caches and indexes are updated once at the end
+                Resume.objects.bulk_create(rows)
+        except BaseException:
+            for f in written:
+                f.storage.delete(f.name)
+            raise
+        self.imported_ids.extend(r.id for r in rows)
+        self.stats["imported"] += len(rows)
+
+    def _publish(self, owner):
+        from resumes.utils.match_cache import invalidate_all_rankings
+        from resumes.utils.ranking_store import schedule_job_rebuild
+
+        if owner is not None:
+            # newest resume of the owner becomes canonical
+            with transaction.atomic():
+                latest = Resume.objects.filter(user=owner).aggregate(m=Max('id'))['m']
+                Resume.objects.filter(user=owner, is_latest=True).exclude(id=latest).update(is_latest=False)
+                Resume.objects.filter(id=latest).update(is_latest=True)
+        invalidate_all_rankings()
+        for job_id in Job.objects.values_list('id', flat=True):
+            schedule_job_rebuild(job_id)
+
+        # the new rows bypassed the ingestion pipeline: rebuild the TF-IDF
+        # index from the database, and embed them in batches (which patches
+        # the vector index and re-ranks them)
+        from resumes.tasks import compact_tfidf_index, embed_resumes
+        batch = getattr(settings, 'EMBEDDING_BATCH_SIZE', 64) * 8
+        self._enqueue(compact_tfidf_index)
+        for i in range(0, len(self.imported_ids), batch):
+            self._enqueue(embed_resumes, self.imported_ids[i:i + batch])
+
+    def _enqueue(self, task, *args):
+        try:
+            task.delay(*args)
+        except Exception as e:
+            self.stdout.write(self.style.WARNING(f"Celery enqueue failed; running {task.name} inline: {e}"))
+            task(*args)
@@ -0,0 +1,28 @@
+# resumes/management/commands/ocr_scanned_resumes.py
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+from resumes.models import Resume
+from resumes.tasks import extract_resume_text
+
+
+class Command(BaseCommand):
+    help = "Queue background extraction (with OCR) for resumes that have a file but no extracted text"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=None, help='Queue at most this many resumes')
+
+    def handle(self, *args, **options):
+        if not getattr(settings, 'PDF_OCR_ENABLED', False):
+            raise CommandError("PDF_OCR_ENABLED is off; scanned resumes would come back empty again.")
+        qs = (
+            Resume.objects.filter(Q(extracted_text__isnull=True) | Q(extracted_text=''))
+            .exclude(file='').order_by('id').values_list('id', flat=True)
+        )
+        if options['limit']:
+            qs = qs[:options['limit']]
+        n = 0
+        for resume_id in qs.iterator():
+            extract_resume_text.delay(resume_id)
+            n += 1
+        self.stdout.write(self.style.SUCCESS(f"Queued {n} resumes for extraction."))
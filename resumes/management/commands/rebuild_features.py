@@ -0,0 +1,42 @@
+# resumes/management/commands/rebuild_features.py
+from django.core.management.base import BaseCommand
+from resumes.models import Job, Resume
+
+
+class Command(BaseCommand):
+    help = "Build / refresh the pre-tokenized feature records and skill ids of resumes and jobs (unchanged rows are skipped)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Rebuild even if the source hash is unchanged')
+        parser.add_argument('--chunk-size', type=int, default=500, help='Rows per bulk_update')
+
+    def _rebuild(self, model, fields, force, chunk_size):
+        seen = updated = 0
+        pending = []
+        qs = model.objects.only('id', *model.DERIVED_FIELDS, *fields)
+        for obj in qs.iterator(chunk_size=chunk_size):
+            seen += 1
+            if force:
+                obj.features_source_hash = None
+            if obj.refresh_features():
+                pending.append(obj)
+            if len(pending) >= chunk_size:
+                # bulk_update: no post_save per row; cached rankings are dropped once at the end
+                model.objects.bulk_update(pending, model.DERIVED_FIELDS)
+                updated += len(pending)
+                pending = []
+        if pending:
+            model.objects.bulk_update(pending, model.DERIVED_FIELDS)
+            updated += len(pending)
+        return seen, updated
+
+    def handle(self, *args, **options):
+        from resumes.utils.match_cache import invalidate_all_rankings
+
+        total = 0
+        for model in (Resume, Job):
+            seen, updated = self._rebuild(model, model.FEATURE_FIELDS, options['force'], options['chunk_size'])
+            total += updated
+            self.stdout.write(self.style.SUCCESS(f"{model.__name__}: updated {updated} of {seen}."))
+        if total:
+            invalidate_all_rankings()
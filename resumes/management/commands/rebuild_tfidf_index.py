@@ -0,0 +1,16 @@
+# resumes/management/commands/rebuild_tfidf_index.py
+from django.core.management.base import BaseCommand
+from resumes.utils.tfidf_index import index_dir, rebuild_from_db
+
+
+class Command(BaseCommand):
+    help = "Rebuild the on-disk TF-IDF index over Resume.extracted_text (compacts pending deltas)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500, help='Rows fetched per DB round trip')
+
+    def handle(self, *args, **options):
+        meta = rebuild_from_db(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Built {meta['version']} in {index_dir()}: {meta['n_docs']} resumes, {meta['n_terms']} terms."
+        ))
@@ -1,65 +1,51 @@
 # resumes/management/commands/recompute_job_embeddings.py
+from django.conf import settings
 from django.core.management.base import BaseCommand
-from resumes.models import Resume  
-from resumes.models import Job         
-import sys
+from resumes.models import Job
+from resumes.utils.embedding_pipeline import embed_objects, job_embedding_text
+from resumes.utils.vector_index import patch_vector_index, rebuild_vector_index
+
 
 class Command(BaseCommand):
-    help = "Compute & store embeddings for all jobs"
+    help = "Compute & store embeddings for all jobs (batched; unchanged texts are skipped)"
 
     def add_arguments(self, parser):
-        parser.add_argument('--force', action='store_true', help='Overwrite existing embeddings')
+        parser.add_argument('--force', action='store_true', help='Re-embed even if the text hash is unchanged')
+        parser.add_argument('--batch-size', type=int, default=settings.EMBEDDING_BATCH_SIZE,
+                            help='Texts per model.encode call')
+        parser.add_argument('--write-chunk', type=int, default=settings.EMBEDDING_WRITE_CHUNK,
+                            help='Rows per bulk_update')
+        parser.add_argument('--rebuild-index', action='store_true',
+                            help='Rebuild the job vector index from scratch instead of patching it')
 
     def handle(self, *args, **options):
-        force = options.get('force', False)
-
-        # lazy import of your embedding util (same as in match endpoint)
-        try:
-            from resumes.utils.ats import _ensure_model, compute_job_embedding_text
-        except Exception:
-            # fallback: import compute util directly if you have it elsewhere
-            from resumes.utils.ats import _ensure_model
-            def compute_job_embedding_text(text, model):
-                # expects model.encode(text, convert_to_numpy=True).tolist()
-                emb = None
-                try:
-                    emb = model.encode(text, convert_to_numpy=True).tolist()
-                except Exception as e:
-                    print("embedding compute failed:", e)
-                return emb
+        from resumes.utils.ats import _ensure_model
 
         model = _ensure_model()
         if model is None:
             self.stdout.write(self.style.ERROR("No model available (ensure _ensure_model() works)."))
             return
 
-        jobs = Job.objects.all()
-        count = 0
-        for job in jobs:
-            # create text to embed
-            job_text = " ".join(filter(None, [
-                getattr(job,'title','') or '',
-                getattr(job,'description','') or '',
-                getattr(job,'skills_required','') or '',
-            ])).strip()
-
-            if not job_text:
-                continue
-
-            if job.embedding is not None and not force:
-                # skip if already present
-                continue
-
-            try:
-                emb = compute_job_embedding_text(job_text, model)
-                if emb:
-                    job.embedding = emb
-                    job.save(update_fields=['embedding'])
-                    count += 1
-                    self.stdout.write(self.style.SUCCESS(f"Updated job {job.id}"))
-                else:
-                    self.stdout.write(self.style.WARNING(f"Embedding failed for job {job.id}"))
-            except Exception as e:
-                self.stdout.write(self.style.ERROR(f"Error for job {job.id}: {e}"))
-
-        self.stdout.write(self.style.SUCCESS(f"Done. Updated {count} jobs."))
+        version = settings.EMBEDDING_MODEL_NAME
+        qs = Job.objects.only(
+            'id', 'title', 'description', 'skills_required',
+            'embedding_vec', 'embedding_model_version', 'embedding_source_hash'
+        ).iterator(chunk_size=options['write_chunk'])
+
+        stats = embed_objects(
+            qs, model, version, job_embedding_text,
+            batch_size=options['batch_size'], write_chunk=options['write_chunk'], force=options['force'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Done. Updated {stats['updated']} jobs out of {stats['seen']} "
+            f"(unchanged {stats['unchanged']}, no text {stats['no_text']}, failed {stats['failed']})."
+        ))
+
+        if options.get('rebuild_index'):
+            index = rebuild_vector_index('job', version)
+        elif stats['updated_ids']:
+            index = patch_vector_index('job', version, stats['updated_ids'])
+        else:
+            index = None
+        if index is not None:
+            self.stdout.write(self.style.SUCCESS(f"Job vector index ({index.backend}, {version}): {len(index)} vectors."))
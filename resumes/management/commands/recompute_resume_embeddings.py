@@ -1,45 +1,51 @@
+from django.conf import settings
 from django.core.management.base import BaseCommand
 from resumes.models import Resume
-from resumes.utils.pdf_extract import extract_text_from_filefield
-from sentence_transformers import SentenceTransformer
-
-model = SentenceTransformer("all-MiniLM-L6-v2")
-
-def _get_resume_text(r):
-    for field_name in ('extracted_text', 'text', 'content', 'skills'):
-        val = getattr(r, field_name, None)
-        if val:
-            return str(val).strip()
-    try:
-        if getattr(r, 'file', None):
-            return extract_text_from_filefield(r.file)
-    except Exception:
-        pass
-    return ""
+from resumes.utils.embedding_pipeline import embed_objects, resume_embedding_text
+from resumes.utils.model_registry import get_model
+from resumes.utils.vector_index import patch_vector_index, rebuild_vector_index
 
 
 class Command(BaseCommand):
-    help = "Recompute embeddings for all resumes"
-
-    def handle(self, *args, **options):
-        count = 0
-        updated = 0
+    help = "Recompute embeddings for all resumes (batched; unchanged texts are skipped)"
 
-        for r in Resume.objects.all():
-            count += 1
-            try:
-                resume_text = _get_resume_text(r)
-                if not resume_text:
-                    print(f"Skipped resume {getattr(r, 'id', None)} (no text)")
-                    continue
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.EMBEDDING_BATCH_SIZE,
+                            help='Texts per model.encode call')
+        parser.add_argument('--write-chunk', type=int, default=settings.EMBEDDING_WRITE_CHUNK,
+                            help='Rows per bulk_update')
+        parser.add_argument('--force', action='store_true', help='Re-embed even if the text hash is unchanged')
+        parser.add_argument('--rebuild-index', action='store_true',
+                            help='Rebuild the resume vector index from scratch instead of patching it')
 
-                emb = model.encode(resume_text, convert_to_numpy=True).tolist()
-                r.embedding = emb
-                r.save(update_fields=["embedding"])
-                updated += 1
-                print(f"Updated resume {getattr(r, 'id', None)}")
-
-            except Exception as e:
-                print(f"Failed for resume {getattr(r, 'id', None)}: {e}")
-
-        print(f"Done. Updated {updated} resumes out of {count}.")
+    def handle(self, *args, **options):
+        version = settings.EMBEDDING_MODEL_NAME
+        model = get_model(version)
+        if model is None:
+            self.stdout.write(self.style.ERROR(f"Embedding model {version} is not available."))
+            return
+        qs = Resume.objects.only(
+            'id', 'skills', 'extracted_text', 'embedding_vec', 'embedding_model_version', 'embedding_source_hash'
+        ).iterator(chunk_size=options['write_chunk'])
+
+        def progress(stats):
+            self.stdout.write(f"  seen={stats['seen']} updated={stats['updated']} unchanged={stats['unchanged']}")
+
+        stats = embed_objects(
+            qs, model, version, resume_embedding_text,
+            batch_size=options['batch_size'], write_chunk=options['write_chunk'],
+            force=options['force'], on_progress=progress,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Done. Updated {stats['updated']} resumes out of {stats['seen']} "
+            f"(unchanged {stats['unchanged']}, no text {stats['no_text']}, failed {stats['failed']})."
+        ))
+
+        if options.get('rebuild_index'):
+            index = rebuild_vector_index('resume', version)
+        elif stats['updated_ids']:
+            index = patch_vector_index('resume', version, stats['updated_ids'])
+        else:
+            index = None
+        if index is not None:
+            self.stdout.write(self.style.SUCCESS(f"Resume vector index ({index.backend}, {version}): {len(index)} vectors."))
@@ -0,0 +1,76 @@
+# Convert Resume/Job embeddings from JSON float lists to binary float32 blobs.
+
+import json
+
+from django.db import migrations, models
+
+
+def json_to_blob(apps, schema_editor):
+    from resumes.utils.embedding_store import encode_embedding
+
+    for model_name in ('Resume', 'Job'):
+        Model = apps.get_model('resumes', model_name)
+        batch = []
+        qs = Model.objects.filter(embedding__isnull=False).only('id', 'embedding', 'embedding_model_version')
+        for obj in qs.iterator(chunk_size=500):
+            emb = obj.embedding
+            if isinstance(emb, str):
+                try:
+                    emb = json.loads(emb)
+                except ValueError:
+                    emb = None
+            if not emb:
+                continue
+            obj.embedding_vec = encode_embedding(emb, obj.embedding_model_version, dtype='float32')
+            batch.append(obj)
+            if len(batch) >= 500:
+                Model.objects.bulk_update(batch, ['embedding_vec'])
+                batch = []
+        if batch:
+            Model.objects.bulk_update(batch, ['embedding_vec'])
+
+
+def blob_to_json(apps, schema_editor):
+    from resumes.utils.embedding_store import decode_embedding
+
+    for model_name in ('Resume', 'Job'):
+        Model = apps.get_model('resumes', model_name)
+        batch = []
+        qs = Model.objects.filter(embedding_vec__isnull=False).only('id', 'embedding_vec')
+        for obj in qs.iterator(chunk_size=500):
+            obj.embedding = [float(x) for x in decode_embedding(obj.embedding_vec)]
+            batch.append(obj)
+            if len(batch) >= 500:
+                Model.objects.bulk_update(batch, ['embedding'])
+                batch = []
+        if batch:
+            Model.objects.bulk_update(batch, ['embedding'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resumes', '0021_job_created_by'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='embedding_vec',
+            field=models.BinaryField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='resume',
+            name='embedding_vec',
+            field=models.BinaryField(blank=True, editable=False, help_text='Stored embedding (binary, see embedding_store)', null=True),
+        ),
+        migrations.RunPython(json_to_blob, blob_to_json),
+        migrations.RemoveField(
+            model_name='job',
+            name='embedding',
+        ),
+        migrations.RemoveField(
+            model_name='resume',
+            name='embedding',
+        ),
+    ]
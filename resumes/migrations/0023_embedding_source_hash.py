@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-17 07:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resumes', '0022_embedding_binary_storage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='embedding_source_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='resume',
+            name='embedding_source_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True),
+        ),
+    ]
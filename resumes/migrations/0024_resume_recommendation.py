@@ -0,0 +1,24 @@
+# Generated by Django 5.2.6 on 2026-10-17 07:58
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resumes', '0023_embedding_source_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumeRecommendation',
+            fields=[
+                ('resume', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='recommendation', serialize=False, to='resumes.resume')),
+                ('job_ids', models.JSONField(default=list)),
+                ('scores', models.JSONField(default=list)),
+                ('computed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.6 on 2026-10-17 08:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resumes', '0024_resume_recommendation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='features_blob',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='features_source_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='resume',
+            name='features_blob',
+            field=models.BinaryField(blank=True, help_text='Pre-tokenized features (see feature_store)', null=True),
+        ),
+        migrations.AddField(
+            model_name='resume',
+            name='features_source_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-17 08:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resumes', '0025_document_features'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='skill_ids',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+        migrations.AddField(
+            model_name='resume',
+            name='skill_ids',
+            field=models.JSONField(blank=True, default=list, editable=False, help_text='Skill taxonomy ids (see skill_taxonomy)'),
+        ),
+    ]
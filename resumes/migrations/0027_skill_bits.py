@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-17 08:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resumes', '0026_skill_ids'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='skill_bits',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='resume',
+            name='skill_bits',
+            field=models.BinaryField(blank=True, help_text='skill_ids as a bitset (see skill_bits)', null=True),
+        ),
+    ]
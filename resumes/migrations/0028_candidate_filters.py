@@ -0,0 +1,47 @@
+# Generated by Django 5.2.6 on 2026-10-17 08:19
+
+from django.db import migrations, models
+
+
+def fill_experience_years(apps, schema_editor):
+    from resumes.utils.feature_store import parse_years
+
+    Resume = apps.get_model('resumes', 'Resume')
+    batch = []
+    qs = Resume.objects.exclude(experience__isnull=True).exclude(experience='').only('id', 'experience')
+    for obj in qs.iterator(chunk_size=500):
+        obj.experience_years = parse_years(obj.experience)
+        if obj.experience_years is None:
+            continue
+        batch.append(obj)
+        if len(batch) >= 500:
+            Resume.objects.bulk_update(batch, ['experience_years'])
+            batch = []
+    if batch:
+        Resume.objects.bulk_update(batch, ['experience_years'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resumes', '0027_skill_bits'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resume',
+            name='experience_years',
+            field=models.FloatField(blank=True, db_index=True, editable=False, help_text='Years parsed from experience (candidate filters)', null=True),
+        ),
+        migrations.AddField(
+            model_name='resume',
+            name='location',
+            field=models.CharField(blank=True, db_index=True, max_length=200, null=True),
+        ),
+        migrations.AlterField(
+            model_name='resume',
+            name='uploaded_at',
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+        migrations.RunPython(fill_experience_years, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.6 on 2026-10-17 08:21
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def mark_latest(apps, schema_editor):
+    # the field is added with default=True; keep it only on each user's newest resume
+    Resume = apps.get_model('resumes', 'Resume')
+    latest = Resume.objects.values('user').annotate(latest=models.Max('id')).values('latest')
+    Resume.objects.exclude(id__in=latest).update(is_latest=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resumes', '0028_candidate_filters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resume',
+            name='is_latest',
+            field=models.BooleanField(default=True, editable=False, help_text="The user's canonical (newest) resume; only these are matched by default"),
+        ),
+        migrations.RunPython(mark_latest, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='resume',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_latest', True)), fields=('user',), name='unique_latest_resume_per_user'),
+        ),
+    ]
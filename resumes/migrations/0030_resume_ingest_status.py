@@ -0,0 +1,28 @@
+# Generated by Django 5.2.6 on 2026-10-17 08:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resumes', '0029_resume_is_latest'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resume',
+            name='ingest_error',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='resume',
+            name='ingest_status',
+            field=models.CharField(choices=[('queued', 'Queued'), ('extract', 'Extract'), ('derive', 'Derive'), ('embed', 'Embed'), ('index', 'Index'), ('rank', 'Rank'), ('ready', 'Ready'), ('failed', 'Failed')], default='ready', editable=False, help_text='Ingestion pipeline stage (see ingestion)', max_length=16),
+        ),
+        migrations.AddField(
+            model_name='resume',
+            name='ingest_updated_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
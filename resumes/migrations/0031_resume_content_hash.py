@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-17 08:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resumes', '0030_resume_ingest_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resume',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, editable=False, help_text='sha256 of the uploaded file (import dedupe)', max_length=64, null=True),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.6 on 2026-10-17 08:32
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resumes', '0031_resume_content_hash'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['applied_at', 'id'], name='application_applied_keyset'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['posted_at', 'id'], name='job_posted_keyset'),
+        ),
+        migrations.AddIndex(
+            model_name='shortlist',
+            index=models.Index(fields=['created_at', 'id'], name='shortlist_created_keyset'),
+        ),
+    ]
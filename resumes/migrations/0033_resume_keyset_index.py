@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-17 08:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resumes', '0032_keyset_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='resume',
+            index=models.Index(fields=['uploaded_at', 'id'], name='resume_uploaded_keyset'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.6 on 2026-10-17 09:19
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resumes', '0033_resume_keyset_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingEmbedding',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('force', models.BooleanField(default=False)),
+                ('queued_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('claim', models.CharField(blank=True, db_index=True, default='', max_length=32)),
+                ('claimed_at', models.DateTimeField(blank=True, null=True)),
+                ('resume', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='resumes.resume')),
+            ],
+        ),
+    ]
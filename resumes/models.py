@@ -1,28 +1,153 @@
-from django.db import models
+from django.db import models, transaction
 from django.db import models
 from django.contrib.auth.models import User
 from django.conf import settings
 from django.utils import timezone
-
-
-
-class Resume(models.Model):
+from resumes.utils.embedding_store import encode_embedding, decode_embedding
+from resumes.utils.feature_store import (
+    build_features, encode_features, features_for, job_feature_source, parse_years, resume_feature_source,
+    source_hash,
+)
+from resumes.utils.ingestion import READY as INGEST_READY, STATUS_CHOICES as INGEST_STATUS_CHOICES
+from resumes.utils.skill_bits import encode_skill_bits
+from resumes.utils.skill_taxonomy import skill_ids_for
+
+
+class EmbeddingMixin:
+    """
+    `embedding` reads/writes the binary `embedding_vec` column
+    (see resumes/utils/embedding_store.py). Returns a float32 ndarray or None.
+    """
+
+    @property
+    def embedding(self):
+        return decode_embedding(self.embedding_vec) if self.embedding_vec else None
+
+    @embedding.setter
+    def embedding(self, vector):
+        self.set_embedding(vector)
+
+    def set_embedding(self, vector, model_version=None):
+        if model_version is not None:
+            self.embedding_model_version = model_version
+        if vector is None or len(vector) == 0:
+            self.embedding_vec = None
+        else:
+            self.embedding_vec = encode_embedding(vector, self.embedding_model_version)
+
+
+FEATURES_DERIVED_FIELDS = ('features_blob', 'features_source_hash', 'skill_ids', 'skill_bits')
+
+
+class FeaturesMixin:
+    """
+    `features` is the pre-tokenized record stored in `features_blob`
+    (see resumes/utils/feature_store.py). save() rebuilds it when its
+    inputs (FEATURE_FIELDS) changed; queryset .update() / bulk_update()
+    bypass this, run `manage.py rebuild_features` after those. `skill_ids`
+    (sorted skill taxonomy ids of the skills field) and `skill_bits` (the
+    same as a bitset, see skill_bits.py) are kept in step with it, as are
+    any model-specific DERIVED_FIELDS filled by refresh_derived().
+    """
+    FEATURE_FIELDS = ()
+    DERIVED_FIELDS = FEATURES_DERIVED_FIELDS
+
+    def feature_source(self):
+        raise NotImplementedError
+
+    @property
+    def features(self):
+        return features_for(self)
+
+    def refresh_features(self) -> bool:
+        """Rebuild features_blob, skill_ids and skill_bits if their inputs changed; True when rebuilt."""
+        text, skills, experience = self.feature_source()
+        digest = source_hash(text, skills, experience)
+        if self.features_blob and self.features_source_hash == digest and self.skill_bits is not None:
+            return False
+        self.features_blob = encode_features(build_features(text, skills, experience))
+        self.features_source_hash = digest
+        self.skill_ids = skill_ids_for(skills)
+        self.skill_bits = encode_skill_bits(self.skill_ids)
+        self.refresh_derived()
+        return True
+
+    def refresh_derived(self):
+        pass
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or set(update_fields) & set(self.FEATURE_FIELDS):
+            if self.refresh_features() and update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | set(self.DERIVED_FIELDS)
+        super().save(*args, **kwargs)
+
+
+class Resume(FeaturesMixin, EmbeddingMixin, models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, default=1)
     file = models.FileField(upload_to='resumes/')
     skills = models.TextField(blank=True, null=True)       
     experience = models.TextField(blank=True, null=True)   
-    uploaded_at = models.DateTimeField(auto_now_add=True)
-    embedding = models.JSONField(null=True, blank=True, help_text="Optional stored embedding (list of floats)")
+    uploaded_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    location = models.CharField(max_length=200, blank=True, null=True, db_index=True)
+    experience_years = models.FloatField(null=True, blank=True, editable=False, db_index=True, help_text="Years parsed from experience (candidate filters)")
+    embedding_vec = models.BinaryField(null=True, blank=True, editable=False, help_text="Stored embedding (binary, see embedding_store)")
     extracted_text=models.TextField(null=True,blank=True,help_text="Raw extracted text from file (optional)")
     embedding_model_version=models.CharField(max_length=64,null=True,blank=True)
-   
+    embedding_source_hash = models.CharField(max_length=64, null=True, blank=True, editable=False)
+    features_blob = models.BinaryField(null=True, blank=True, editable=False, help_text="Pre-tokenized features (see feature_store)")
+    features_source_hash = models.CharField(max_length=64, null=True, blank=True, editable=False)
+    skill_ids = models.JSONField(default=list, blank=True, editable=False, help_text="Skill taxonomy ids (see skill_taxonomy)")
+    skill_bits = models.BinaryField(null=True, blank=True, editable=False, help_text="skill_ids as a bitset (see skill_bits)")
+    content_hash = models.CharField(max_length=64, null=True, blank=True, editable=False, db_index=True, help_text="sha256 of the uploaded file (import dedupe)")
+    is_latest = models.BooleanField(default=True, editable=False, help_text="The user's canonical (newest) resume; only these are matched by default")
+    ingest_status = models.CharField(max_length=16, choices=INGEST_STATUS_CHOICES, default=INGEST_READY, editable=False, help_text="Ingestion pipeline stage (see ingestion)")
+    ingest_error = models.TextField(blank=True, default='', editable=False)
+    ingest_updated_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    FEATURE_FIELDS = ('extracted_text', 'skills', 'experience')
+    DERIVED_FIELDS = FEATURES_DERIVED_FIELDS + ('experience_years',)
 
+    class Meta:
+        constraints = [
+            # partial unique index: one canonical resume per user, and the
+            # index the default candidate pool (is_latest=True) is read from
+            models.UniqueConstraint(fields=['user'], condition=models.Q(is_latest=True),
+                                    name='unique_latest_resume_per_user'),
+        ]
+        indexes = [
+            # keyset pagination of my-resumes (resumes.utils.pagination)
+            models.Index(fields=['uploaded_at', 'id'], name='resume_uploaded_keyset'),
+        ]
+
+    def feature_source(self):
+        return resume_feature_source(self)
+
+    def refresh_derived(self):
+        self.experience_years = parse_years(self.experience)
+
+    def save(self, *args, **kwargs):
+        """
+        A new resume becomes its user's canonical one; the previous one is
+        flagged is_latest=False in the same transaction. Its id is left on
+        `superseded_ids` for the post_save handlers.
+        """
+        self.superseded_ids = []
+        if not (self._state.adding and self.is_latest):
+            return super().save(*args, **kwargs)
+        with transaction.atomic():
+            # lock the user row so concurrent uploads take turns
+            User.objects.select_for_update().filter(pk=self.user_id).first()
+            previous = Resume.objects.filter(user_id=self.user_id, is_latest=True)
+            self.superseded_ids = list(previous.values_list('id', flat=True))
+            previous.update(is_latest=False)
+            super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.user.username} Resume"
 
 
-class Job(models.Model):
+class Job(FeaturesMixin, EmbeddingMixin, models.Model):
     title = models.CharField(max_length=200)
     description = models.TextField()
     skills_required = models.TextField()
@@ -30,9 +155,25 @@ class Job(models.Model):
     company = models.CharField(max_length=200, blank=True, null=True)
     location = models.CharField(max_length=200, blank=True, null=True)
     posted_at = models.DateTimeField(auto_now_add=True)
-    embedding = models.JSONField(null=True, blank=True)
+    embedding_vec = models.BinaryField(null=True, blank=True, editable=False)
     embedding_model_version=models.CharField(max_length=64,null=True,blank=True)
+    embedding_source_hash = models.CharField(max_length=64, null=True, blank=True, editable=False)
     created_by=models.ForeignKey(settings.AUTH_USER_MODEL,on_delete=models.CASCADE,related_name="jobs",null=True,blank=True)
+    features_blob = models.BinaryField(null=True, blank=True, editable=False)
+    features_source_hash = models.CharField(max_length=64, null=True, blank=True, editable=False)
+    skill_ids = models.JSONField(default=list, blank=True, editable=False)
+    skill_bits = models.BinaryField(null=True, blank=True, editable=False)
+
+    FEATURE_FIELDS = ('title', 'description', 'skills_required', 'experience_required')
+
+    class Meta:
+        indexes = [
+            # keyset pagination of job lists (resumes.utils.pagination)
+            models.Index(fields=['posted_at', 'id'], name='job_posted_keyset'),
+        ]
+
+    def feature_source(self):
+        return job_feature_source(self)
 
     def __str__(self):
         return self.title
@@ -52,7 +193,9 @@ class Shortlist(models.Model):
 
     class Meta:
         unique_together = ('job', 'resume')
-        
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='shortlist_created_keyset'),
+        ]
         
 
 
@@ -85,6 +228,9 @@ class Application(models.Model):
     class Meta:
         unique_together = ('job', 'resume')  # prevents duplicate applications
         ordering = ['-applied_at']
+        indexes = [
+            models.Index(fields=['applied_at', 'id'], name='application_applied_keyset'),
+        ]
 
     def __str__(self):
         return f"Application {self.id} | job={self.job_id} | resume={self.resume_id} | candidate={self.candidate_id}"
@@ -98,3 +244,32 @@ class Application(models.Model):
 
 
 
+class ResumeRecommendation(models.Model):
+    """
+    Materialized top-K jobs for one resume (resumes/utils/recommendations.py).
+    One row per resume: parallel job_ids / scores lists, best first.
+    """
+    resume = models.OneToOneField('Resume', on_delete=models.CASCADE, primary_key=True, related_name='recommendation')
+    job_ids = models.JSONField(default=list)
+    scores = models.JSONField(default=list)
+    computed_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Recommendations for resume {self.resume_id} ({len(self.job_ids)} jobs)"
+
+
+class PendingEmbedding(models.Model):
+    """
+    Coalescing queue for resume embeddings (tasks.queue_resume_embedding).
+    One row per enqueue; a flush claims every unclaimed row with a single
+    UPDATE (so overlapping flushes get disjoint batches), embeds them and
+    deletes its rows. Claims older than EMBEDDING_CLAIM_TIMEOUT are released.
+    """
+    resume = models.ForeignKey('Resume', on_delete=models.CASCADE, related_name='+')
+    force = models.BooleanField(default=False)
+    queued_at = models.DateTimeField(default=timezone.now)
+    claim = models.CharField(max_length=32, blank=True, default='', db_index=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Pending embedding for resume {self.resume_id}"
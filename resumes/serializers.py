@@ -16,6 +16,13 @@ class ResumeNestedSerializer(serializers.ModelSerializer):
     # NEW: candidate name (prefer full name -> username -> email -> fallback)
     candidate_name = serializers.SerializerMethodField(read_only=True)
 
+    # what the get_* methods read (query_planner)
+    query_hints = {
+        'file_url': ('file',),
+        'file_name': ('file',),
+        'candidate_name': ('user__first_name', 'user__last_name', 'user__username', 'user__email'),
+    }
+
     class Meta:
         model = Resume
         fields = ('id', 'candidate_name', 'file_url', 'file_name', 'skills', 'experience', 'uploaded_at')
@@ -70,10 +77,12 @@ class ResumeUploadSerializer(serializers.ModelSerializer):
     file = serializers.FileField(required=True)
     file_url = serializers.SerializerMethodField(read_only=True)
 
+    query_hints = {'user': ('user__username',), 'file_url': ('file',)}
+
     class Meta:
         model = Resume
-        fields = ['id', 'user', 'file', 'file_url', 'skills', 'experience', 'uploaded_at']
-        read_only_fields = ['id', 'user', 'uploaded_at']
+        fields = ['id', 'user', 'file', 'file_url', 'skills', 'experience', 'location', 'is_latest', 'ingest_status', 'uploaded_at']
+        read_only_fields = ['id', 'user', 'is_latest', 'ingest_status', 'uploaded_at']
 
     def get_user(self, obj):
         return obj.user.username if obj.user else None
@@ -114,6 +123,8 @@ class ShortlistSerializer(serializers.ModelSerializer):
     # CHANGED: return nested resume object instead of just PK
     resume = ResumeNestedSerializer(read_only=True)
 
+    query_hints = {'shortlisted_by': ('shortlisted_by__username',)}
+
     class Meta:
         model = Shortlist
         fields = ['id', 'job', 'resume', 'shortlisted_by', 'created_at', 'email_sent', 'email_sent_at']
@@ -134,6 +145,11 @@ class ApplicationSerializer(serializers.ModelSerializer):
     resume_file = serializers.SerializerMethodField(read_only=True)
     candidate_username = serializers.SerializerMethodField(read_only=True)
 
+    query_hints = {
+        'resume_file': ('resume__file',),
+        'candidate_username': ('candidate__username', 'candidate__email', 'resume__user__username', 'resume__user__email'),
+    }
+
     class Meta:
         model = Application
         fields = (
@@ -1,20 +1,117 @@
 # resumes/signals.py
+from django.db import transaction
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from django.core.cache import cache
 from .models import Job, Resume
+from .utils.ingestion import in_progress
+import logging
+
+logger = logging.getLogger(__name__)
+
+# fields that feed the match rankings (score or displayed row)
+RANKING_FIELDS = {'extracted_text', 'skills', 'experience', 'embedding_vec', 'embedding_model_version', 'user'}
+
 
 @receiver(post_save, sender=Job)
 @receiver(post_delete, sender=Job)
 def clear_job_cache_on_job_change(sender, instance, **kwargs):
-    cache.delete(f"job_matches_{instance.id}")
+    from .utils.match_cache import invalidate_job_ranking
+    from .utils.recommendations import invalidate_history
+    invalidate_job_ranking(instance.id)
+    invalidate_history()
+
+
+@receiver(post_save, sender=Job)
+def rebuild_job_ranking_on_job_save(sender, instance, update_fields=None, **kwargs):
+    # embedding-only writes don't change the text the job is ranked on
+    if update_fields is not None and not {'title', 'description', 'skills_required'}.intersection(update_fields):
+        return
+    from .utils.ranking_store import schedule_job_rebuild
+    schedule_job_rebuild(instance.id)
+
+
+@receiver(post_delete, sender=Job)
+def remove_job_ranking_on_job_delete(sender, instance, **kwargs):
+    from .utils.ranking_store import schedule_job_removal
+    schedule_job_removal(instance.id)
+
 
 @receiver(post_save, sender=Resume)
+def patch_job_caches_on_resume_save(sender, instance, update_fields=None, **kwargs):
+    # cached rankings re-score just this resume on their next read
+    if update_fields is not None and not RANKING_FIELDS.intersection(update_fields):
+        return
+    # still being ingested: the pipeline's rank stage publishes it once it's done
+    if in_progress(instance):
+        return
+    from .utils.match_cache import note_resumes_changed
+    from .utils.ranking_store import schedule_resume_update
+    note_resumes_changed([instance.id])
+    schedule_resume_update(instance.id)
+
+
+@receiver(post_save, sender=Resume)
+def drop_superseded_resumes(sender, instance, created=False, **kwargs):
+    # an upload replaced the user's canonical resume: the old one leaves the candidate pool
+    superseded = getattr(instance, 'superseded_ids', None)
+    if not (created and superseded):
+        return
+    from .utils.match_cache import note_resumes_changed
+    from .utils.ranking_store import schedule_resume_update
+    note_resumes_changed(superseded)
+    for rid in superseded:
+        schedule_resume_update(rid)
+
+
+@receiver(post_delete, sender=Resume)
+def promote_previous_resume_on_delete(sender, instance, **kwargs):
+    # canonical resume deleted: the user's newest remaining one takes over
+    if not instance.is_latest:
+        return
+    previous = Resume.objects.filter(user_id=instance.user_id).order_by('-uploaded_at', '-id').first()
+    if previous is None:
+        return
+    Resume.objects.filter(id=previous.id).update(is_latest=True)
+    from .utils.match_cache import note_resumes_changed
+    from .utils.ranking_store import schedule_resume_update
+    note_resumes_changed([previous.id])
+    schedule_resume_update(previous.id)
+
+
+@receiver(post_delete, sender=Resume)
+def patch_job_caches_on_resume_delete(sender, instance, **kwargs):
+    from .utils.match_cache import note_resumes_changed
+    from .utils.ranking_store import schedule_resume_removal
+    note_resumes_changed([instance.id], deleted=True)
+    schedule_resume_removal(instance.id)
+
+
+def _sync_tfidf_index(resume_id):
+    # the task re-reads the row, so a late or repeated run still leaves the index right
+    from .tasks import sync_tfidf_index
+
+    def send():
+        try:
+            sync_tfidf_index.delay(resume_id)
+        except Exception as e:
+            logger.warning("Celery enqueue failed; syncing tfidf index inline: %s", e)
+            try:
+                sync_tfidf_index(resume_id)
+            except Exception:
+                logger.exception("tfidf index sync failed for resume %s", resume_id)
+    transaction.on_commit(send)
+
+
+@receiver(post_save, sender=Resume)
+def update_tfidf_index_on_resume_save(sender, instance, update_fields=None, **kwargs):
+    # only text changes move the index; skills/embedding-only saves are skipped
+    if update_fields is not None and 'extracted_text' not in update_fields:
+        return
+    if in_progress(instance):
+        return
+    _sync_tfidf_index(instance.id)
+
+
 @receiver(post_delete, sender=Resume)
-def clear_all_job_caches_on_resume_change(sender, instance, **kwargs):
-    # simplest route: delete all job caches currently in use.
-    # if you have many jobs, consider iterating jobs and deleting each key.
-    # Here we clear all job caches by scanning job ids (cheap for small datasets).
-    from .models import Job
-    for job in Job.objects.all().values_list('id', flat=True):
-        cache.delete(f"job_matches_{job}")
+def remove_from_tfidf_index_on_resume_delete(sender, instance, **kwargs):
+    _sync_tfidf_index(instance.id)
@@ -188,7 +188,9 @@
     const text = await r.text().catch(()=>null);
     let data = null;
     try { data = text ? JSON.parse(text) : null; } catch(e) { data = text; }
-    return { ok: r.ok, status: r.status, data, text };
+    // list endpoints are keyset-paginated: the next page's cursor comes in a header
+    const next = (r.headers && r.headers.get('X-Next-Cursor')) || null;
+    return { ok: r.ok, status: r.status, data, text, next };
   }
 
   async function apiFetch(path, opts = {}) {
@@ -234,6 +236,25 @@
     return await apiFetch(path, opts);
   }
 
+  // GET a paginated list endpoint and follow X-Next-Cursor until the last page;
+  // resolves like apiFetch, with data = every row of every page
+  async function apiFetchAll(path, opts = {}) {
+    const first = await apiFetch(path, opts);
+    if (!first || !first.ok || !Array.isArray(first.data)) return first;
+    let rows = first.data;
+    let cursor = first.next;
+    const seen = new Set();
+    while (cursor && !seen.has(cursor)) {
+      seen.add(cursor);
+      const sep = path.includes('?') ? '&' : '?';
+      const page = await apiFetch(`${path}${sep}cursor=${encodeURIComponent(cursor)}`, opts);
+      if (!page || !page.ok || !Array.isArray(page.data)) break;
+      rows = rows.concat(page.data);
+      cursor = page.next;
+    }
+    return Object.assign({}, first, { data: rows, next: null });
+  }
+
 
   /* ---------------- DOM / fallback modal creation ---------------- */
   function ensureToastContainer() {
@@ -377,7 +398,7 @@
     const container = document.getElementById('jobsList');
     if (!container) return;
     container.innerHTML = '<div class="small-muted">Loading jobs...</div>';
-    const res = await apiFetch(JOBS_ENDPOINT);
+    const res = await apiFetchAll(JOBS_ENDPOINT);
     if (!res || !res.ok) { container.innerHTML = `<div class="small-muted">Failed to load jobs (${res ? res.status : 'network'})</div>`; return; }
     const jobs = res.data || [];
     if (!Array.isArray(jobs) || jobs.length === 0) { container.innerHTML = `<div class="small-muted">No jobs available</div>`; return; }
@@ -737,7 +758,7 @@
     let res = null;
     for (const u of urlsToTry) {
       try {
-        res = await apiFetch(u);
+        res = await apiFetchAll(u);
         if (res && res.ok) break;
       } catch (e) {
         log('applications try failed', u, e);
@@ -1086,7 +1107,7 @@
 
   async function showShortlistsForSelectedJob() {
     if (!selectedJob) return showToast('Select job first', 'error');
-    const res = await apiFetch(`/api/resumes/shortlist/?job_id=${selectedJob.id}`);
+    const res = await apiFetchAll(`/api/resumes/shortlist/?job_id=${selectedJob.id}`);
     const container = qs('#shortlistList'); if (!container) return;
     if (!res.ok) { container.innerHTML = `<div class="small-muted">Failed to load shortlist</div>`; return; }
     const list = res.data || [];
@@ -1258,7 +1279,6 @@
   }
 
   async function fetchAttempts(jobId, candidateId) {
-    const headers = Object.assign({ 'Content-Type': 'application/json' }, authHeaders());
     const tries = [
       `/api/quiz/${encodeURIComponent(jobId)}/attempts/`,
       `/api/quiz/attempts/?job_id=${encodeURIComponent(jobId)}&candidate=${candidateId}`,
@@ -1267,11 +1287,9 @@
 
     for (const u of tries) {
       try {
-        const r = await fetch(u, { method: 'GET', headers });
+        const r = await apiFetchAll(u, { method: 'GET' });
         if (!r) continue;
-        const txt = await r.text().catch(()=>null);
-        let data = null;
-        try { data = txt ? JSON.parse(txt) : null; } catch(e){ data = txt; }
+        const data = r.data;
         if (r.ok) {
           if (Array.isArray(data)) return data.filter(a => !candidateId || String(a.candidate) === String(candidateId) || String(a.candidate_id) === String(candidateId));
           if (Array.isArray(data.results)) return data.results;
@@ -1357,7 +1375,7 @@
   }
   async function exportResultsCsv(jobId) {
     if (!jobId) return showToast('Select job first', 'error');
-    const r = await apiFetch(`/api/quiz/attempts/?job_id=${jobId}`, { method: 'GET' });
+    const r = await apiFetchAll(`/api/quiz/attempts/?job_id=${jobId}`, { method: 'GET' });
     if (!r.ok) { showToast('Failed to fetch attempts', 'error'); return; }
     const rows = (r.data && (r.data.results || r.data)) || [];
     const csv = toCsv(rows.map(x => ({ candidate: x.candidate || '', score: x.score || '', passed: x.passed ? 'yes' : 'no', finished_at: x.finished_at || '', answers: JSON.stringify(x.answers || {}) })));
@@ -1487,7 +1505,7 @@ async function createInterviewForJobWithUrls(jobId) {
 
   // Fallback: list & pick latest interview for this job (client-side filter)
   try {
-    const listRes = await apiFetchSimple(`/api/interviews/recruiter/`, { credentials: 'include' });
+    const listRes = await apiFetchAll(`/api/interviews/recruiter/`, { credentials: 'include' });
     if (listRes && listRes.ok && Array.isArray(listRes.data)) {
       const match = listRes.data.find(iv => iv.job === jobId);
       if (match) return { ok:true, interview: match };
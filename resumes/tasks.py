@@ -6,7 +6,12 @@ from django.utils.html import strip_tags
 from django.utils import timezone
 from .models import Shortlist
 from resumes.models import Resume
-from resumes.utils.ats import compute_embedding
+from django.core.cache import cache
+from datetime import timedelta
+import logging
+import uuid
+
+logger = logging.getLogger(__name__)
 
 @shared_task(bind=True)
 def send_shortlist_email(self, shortlist_id, candidate_email, context):
@@ -32,44 +37,366 @@ def send_shortlist_email(self, shortlist_id, candidate_email, context):
     
       
 
-@shared_task(bind=True, name="resumes.compute_and_store_embedding")
-def compute_and_store_embedding(self, resume_id):
+# ---- staged ingestion (resumes/utils/ingestion.py) ----
+def _enqueue(task, resume_id, force=False):
+    try:
+        task.delay(resume_id, force=force)
+    except Exception as e:
+        logger.warning("Celery enqueue failed; running %s inline: %s", task.name, e)
+        task(resume_id, force=force)
+
+
+def _advance(stage, resume_id, force=False):
+    """Mark the next stage and queue its task; the last stage leaves the resume ready."""
+    from resumes.utils import ingestion
+    i = ingestion.STAGES.index(stage) + 1
+    if i == len(ingestion.STAGES):
+        ingestion.set_status(resume_id, ingestion.READY)
+        return
+    ingestion.set_status(resume_id, ingestion.STAGES[i])
+    _enqueue(INGEST_TASKS[ingestion.STAGES[i]], resume_id, force)
+
+
+def start_ingestion(resume_id, force=False):
+    """Queue the pipeline from its first stage (force: redo stages already done)."""
+    from resumes.utils import ingestion
+    ingestion.set_status(resume_id, ingestion.QUEUED)
+    _enqueue(ingest_extract, resume_id, force)
+
+
+@shared_task(bind=True, name="resumes.ingest_extract")
+def ingest_extract(self, resume_id, force=False):
+    """Stage 1: file -> extracted_text (pool-backed, time and memory bounded, OCR fallback)."""
+    from resumes.utils import ingestion
+    from resumes.utils.extraction_service import extract_text_from_filefield
+
+    resume = ingestion.claim(resume_id, 'extract', force)
+    if resume is None:
+        return {"ok": True, "resume_id": resume_id, "skipped": True}
+    try:
+        text = extract_text_from_filefield(resume.file) or ''
+        Resume.objects.filter(id=resume_id).update(extracted_text=text[:50000])
+    except Exception as e:
+        ingestion.fail(resume_id, 'extract', e)
+        return {"ok": False, "resume_id": resume_id, "stage": "extract"}
+    _advance('extract', resume_id, force)
+    return {"ok": True, "resume_id": resume_id, "chars": len(text)}
+
+
+@shared_task(bind=True, name="resumes.ingest_derive")
+def ingest_derive(self, resume_id, force=False):
+    """Stage 2: skills / experience from the text, then the derived feature fields."""
+    from resumes.utils import ingestion
+    from resumes.views import extract_skills, extract_experience
+
+    resume = ingestion.claim(resume_id, 'derive', force)
+    if resume is None:
+        return {"ok": True, "resume_id": resume_id, "skipped": True}
+    try:
+        text = resume.extracted_text or ''
+        resume.skills = extract_skills(text)
+        resume.experience = extract_experience(text)
+        resume.refresh_features()
+        fields = ('skills', 'experience') + resume.DERIVED_FIELDS
+        Resume.objects.filter(id=resume_id).update(**{f: getattr(resume, f) for f in fields})
+    except Exception as e:
+        ingestion.fail(resume_id, 'derive', e)
+        return {"ok": False, "resume_id": resume_id, "stage": "derive"}
+    _advance('derive', resume_id, force)
+    return {"ok": True, "resume_id": resume_id}
+
+
+@shared_task(bind=True, name="resumes.ingest_embed")
+def ingest_embed(self, resume_id, force=False):
     """
-    Compute embedding for a resume and save to resume.embedding (JSON field).
-    Safe: swallows exceptions and logs them.
+    Stage 3: embedding. The resume joins the coalescing queue, so uploads
+    arriving together share one model call; flush_pending_embeddings
+    advances each one to the index stage.
     """
+    from resumes.utils import ingestion
+
+    if ingestion.claim(resume_id, 'embed', force) is None:
+        return {"ok": True, "resume_id": resume_id, "skipped": True}
     try:
-        r = Resume.objects.get(id=resume_id)
+        queue_resume_embedding(resume_id, force=force)
+    except Exception as e:
+        ingestion.fail(resume_id, 'embed', e)
+        return {"ok": False, "resume_id": resume_id, "stage": "embed"}
+    return {"ok": True, "resume_id": resume_id, "queued": True}
+
+
+@shared_task(bind=True, name="resumes.ingest_index")
+def ingest_index(self, resume_id, force=False):
+    """Stage 4: TF-IDF index term vector + vector index entry."""
+    from resumes.utils import ingestion
+    from resumes.utils.tfidf_index import get_index
+    from resumes.utils.vector_index import patch_vector_index
+
+    resume = ingestion.claim(resume_id, 'index', force)
+    if resume is None:
+        return {"ok": True, "resume_id": resume_id, "skipped": True}
+    try:
+        index = get_index()
+        if index is not None:
+            index.upsert(resume.id, resume.extracted_text or '')
+        if resume.embedding_vec:
+            patch_vector_index('resume', resume.embedding_model_version or settings.EMBEDDING_MODEL_NAME, [resume.id])
+    except Exception as e:
+        ingestion.fail(resume_id, 'index', e)
+        return {"ok": False, "resume_id": resume_id, "stage": "index"}
+    _advance('index', resume_id, force)
+    return {"ok": True, "resume_id": resume_id}
+
+
+@shared_task(bind=True, name="resumes.ingest_rank")
+def ingest_rank(self, resume_id, force=False):
+    """Stage 5: cached rankings, ranked sets and recommendations see the finished resume."""
+    from resumes.utils import ingestion
+    from resumes.utils.match_cache import note_resumes_changed
+
+    if ingestion.claim(resume_id, 'rank', force) is None:
+        return {"ok": True, "resume_id": resume_id, "skipped": True}
+    try:
+        note_resumes_changed([resume_id])
+        result = update_resume_ranking(resume_id)
+    except Exception as e:
+        ingestion.fail(resume_id, 'rank', e)
+        return {"ok": False, "resume_id": resume_id, "stage": "rank"}
+    _advance('rank', resume_id, force)
+    return {"ok": True, "resume_id": resume_id, "jobs": result.get("jobs", 0)}
+
+
+INGEST_TASKS = {
+    'extract': ingest_extract,
+    'derive': ingest_derive,
+    'embed': ingest_embed,
+    'index': ingest_index,
+    'rank': ingest_rank,
+}
+
+
+@shared_task(bind=True, name="resumes.extract_resume_text")
+def extract_resume_text(self, resume_id):
+    """Re-ingest one resume from its file (every stage redone, e.g. after enabling OCR)."""
+    start_ingestion(resume_id, force=True)
+    return {"ok": True, "resume_id": resume_id}
+
+
+@shared_task(bind=True, name="resumes.export_shortlist")
+def export_shortlist(self, export_id):
+    """Background shortlist CSV export to a file (shortlist_export.run_job)."""
+    from resumes.utils.shortlist_export import run_job
+    job = run_job(export_id)
+    if job is None:
+        return {"ok": False, "reason": "unknown export", "export_id": export_id}
+    return {"ok": job["status"] == "done", "export_id": export_id, "rows": job["rows"]}
+
+
+@shared_task(bind=True, name="resumes.refresh_job_matches")
+def refresh_job_matches(self, job_id, token=None, key=None):
+    """Stale-while-revalidate refresh of one job's cached ranking."""
+    from resumes.utils.match_cache import refresh_job_ranking
+    entry = refresh_job_ranking(job_id, token, key)
+    return {"ok": entry is not None, "job_id": job_id, "total": entry["total"] if entry else 0}
+
+
+@shared_task(bind=True, name="resumes.update_resume_ranking")
+def update_resume_ranking(self, resume_id):
+    """Re-score one resume against every job: ranking store + its recommendations."""
+    from resumes.utils import ranking_store
+    from resumes.utils.recommendations import drop_for_resume, store_for_resume
+    cache.delete(ranking_store.pending_key("resume", resume_id))
+    try:
+        resume = Resume.objects.get(id=resume_id)
     except Resume.DoesNotExist:
-        return {"ok": False, "reason": "not found", "resume_id": resume_id}
+        ranking_store.remove_resume(resume_id)
+        return {"ok": True, "resume_id": resume_id, "removed": True}
+    scores = ranking_store.update_resume(resume)
+    if scores is None:
+        # not a candidate (e.g. superseded): no materialized recommendations either
+        drop_for_resume(resume.id)
+        return {"ok": True, "resume_id": resume_id, "removed": True}
+    store_for_resume(resume.id, scores)
+    return {"ok": True, "resume_id": resume_id, "jobs": len(scores)}
 
-    # decide where to pull text from
-    text = getattr(r, 'extracted_text', None) or getattr(r, 'text', None) or (r.skills or '')
-    if not text and getattr(r, 'file', None):
-        # optional: try extracting file text here (import your extractor)
-        from resumes.utils.pdf_extract import extract_text_from_filefield
-        try:
-            text = extract_text_from_filefield(r.file)[:20000]
-        except Exception as e:
-            text = ''
 
-    if not text:
-        return {"ok": False, "reason": "no text", "resume_id": resume_id}
+@shared_task(bind=True, name="resumes.remove_resume_ranking")
+def remove_resume_ranking(self, resume_id):
+    from resumes.utils import ranking_store
+    ranking_store.remove_resume(resume_id)
+    return {"ok": True, "resume_id": resume_id}
+
 
+@shared_task(bind=True, name="resumes.rebuild_job_ranking")
+def rebuild_job_ranking(self, job_id):
+    """Rebuild one job's ranked set (job created or its text changed) and merge it into recommendations."""
+    from resumes.models import Job
+    from resumes.utils import ranking_store
+    from resumes.utils.recommendations import merge_job
+    cache.delete(ranking_store.pending_key("job", job_id))
     try:
-        emb = compute_embedding(text)  # should return list[float] or None
-        if emb:
-            r.embedding = emb
-            r.save(update_fields=['embedding'])
-            return {"ok": True, "resume_id": resume_id}
-        else:
-            return {"ok": False, "reason": "compute returned None", "resume_id": resume_id}
+        job = Job.objects.get(id=job_id)
+    except Job.DoesNotExist:
+        ranking_store.remove_job(job_id)
+        return {"ok": True, "job_id": job_id, "removed": True}
+    scores = ranking_store.rebuild_job(job)
+    merged = merge_job(job.id, scores)
+    return {"ok": True, "job_id": job_id, "resumes": len(scores), "recommendations_updated": merged}
+
+
+@shared_task(bind=True, name="resumes.remove_job_ranking")
+def remove_job_ranking(self, job_id):
+    from resumes.utils import ranking_store
+    ranking_store.remove_job(job_id)
+    return {"ok": True, "job_id": job_id}
+
+
+@shared_task(bind=True, name="resumes.compact_tfidf_index")
+def compact_tfidf_index(self):
+    """Fold the TF-IDF delta log into a fresh segment (scheduled once it passes RESUME_TFIDF_DELTA_MAX_BYTES)."""
+    from resumes.utils.tfidf_index import COMPACT_PENDING_KEY, rebuild_from_db
+    try:
+        meta = rebuild_from_db()
+    finally:
+        cache.delete(COMPACT_PENDING_KEY)
+    return {"ok": True, "version": meta["version"], "n_docs": meta["n_docs"]}
+
+
+@shared_task(bind=True, name="resumes.sync_tfidf_index")
+def sync_tfidf_index(self, resume_id):
+    """Bring one resume's TF-IDF index row in line with the database (saved text, or deleted)."""
+    from resumes.utils.tfidf_index import get_index
+    index = get_index()
+    if index is None:
+        return {"ok": True, "resume_id": resume_id, "skipped": True}
+    texts = list(Resume.objects.filter(id=resume_id).values_list('extracted_text', flat=True))
+    if not texts:
+        index.delete(resume_id)
+        return {"ok": True, "resume_id": resume_id, "removed": True}
+    index.upsert(resume_id, texts[0] or '')
+    return {"ok": True, "resume_id": resume_id}
+
+
+def embed_resumes_batch(resume_ids, force=False, publish=True):
+    """
+    Embed the given resumes in one batched pass; unchanged texts are skipped.
+    publish=False leaves the vector index and rankings alone (the ingestion
+    pipeline has its own stages for those).
+    """
+    from resumes.utils.ats import _ensure_model
+    from resumes.utils.embedding_pipeline import embed_objects, resume_embedding_text
+    from resumes.utils.vector_index import patch_vector_index
+    from resumes.utils.match_cache import note_resumes_changed
+    from resumes.utils.ranking_store import schedule_resume_update
+
+    model = _ensure_model()
+    if model is None:
+        return {"ok": False, "reason": "no model", "resume_ids": list(resume_ids)}
+
+    version = settings.EMBEDDING_MODEL_NAME
+    qs = Resume.objects.filter(id__in=list(resume_ids)).only(
+        'id', 'skills', 'extracted_text', 'embedding_vec', 'embedding_model_version', 'embedding_source_hash'
+    )
+    try:
+        stats = embed_objects(qs, model, version, resume_embedding_text, force=force)
     except Exception as e:
-        # log in console (or use logger)
-        print("compute_and_store_embedding failed:", e)
-        return {"ok": False, "reason": str(e), "resume_id": resume_id}
+        logger.exception("embed_resumes_batch failed")
+        return {"ok": False, "reason": str(e), "resume_ids": list(resume_ids)}
 
+    if stats["updated_ids"] and publish:
+        try:
+            patch_vector_index('resume', version, stats["updated_ids"])
+        except Exception:
+            logger.exception("vector index patch failed")
+        # bulk_update sends no signals; new embeddings move these resumes' scores
+        note_resumes_changed(stats["updated_ids"])
+        for resume_id in stats["updated_ids"]:
+            schedule_resume_update(resume_id)
+    stats["ok"] = True
+    return stats
+
+
+@shared_task(bind=True, name="resumes.embed_resumes")
+def embed_resumes(self, resume_ids, force=False):
+    """Embed resumes outside the ingestion pipeline (bulk import) and publish them."""
+    return embed_resumes_batch(resume_ids, force=force)
+
+
+# ---- coalescing: many uploads -> one embedding batch ----
+# The ingestion embed stage feeds this queue. Pending (id, force) pairs are
+# PendingEmbedding rows: inserting one is atomic, and a flush claims all
+# unclaimed rows with one UPDATE, so nothing queued while it runs is skipped
+# and two flushes never embed the same row. The first enqueue in a window
+# schedules one flush, which embeds the batch and moves every resume still
+# waiting in the embed stage on to "index".
+FLUSH_SCHEDULED_KEY = "embed_flush_scheduled"
+
+
+def queue_resume_embedding(resume_id, force=False):
+    from resumes.models import PendingEmbedding
+
+    window = getattr(settings, 'EMBEDDING_COALESCE_SECONDS', 5)
+    PendingEmbedding.objects.create(resume_id=resume_id, force=bool(force))
+    if cache.add(FLUSH_SCHEDULED_KEY, 1, window * 4 + 30):
+        try:
+            flush_pending_embeddings.apply_async(countdown=window)
+        except Exception as e:
+            logger.warning("Celery enqueue failed; flushing embeddings inline: %s", e)
+            flush_pending_embeddings()
 
-        
-        
 
+def _claim_pending_embeddings():
+    """Claim every unclaimed row for this flush: (claim token, {resume_id: force})."""
+    from resumes.models import PendingEmbedding
+
+    now = timezone.now()
+    # rows a crashed flush claimed go back to the queue
+    timeout = getattr(settings, 'EMBEDDING_CLAIM_TIMEOUT', 600)
+    PendingEmbedding.objects.exclude(claim='').filter(claimed_at__lt=now - timedelta(seconds=timeout)).update(
+        claim='', claimed_at=None
+    )
+    token = uuid.uuid4().hex
+    PendingEmbedding.objects.filter(claim='').update(claim=token, claimed_at=now)
+    forced = {}
+    for resume_id, force in PendingEmbedding.objects.filter(claim=token).values_list('resume_id', 'force'):
+        forced[resume_id] = forced.get(resume_id, False) or force
+    return token, forced
+
+
+@shared_task(bind=True, name="resumes.flush_pending_embeddings")
+def flush_pending_embeddings(self):
+    from resumes.models import PendingEmbedding
+
+    # clear the flag first so ids queued while we run schedule the next flush
+    cache.delete(FLUSH_SCHEDULED_KEY)
+    token, forced = _claim_pending_embeddings()
+    if not forced:
+        return {"ok": True, "queued": 0}
+
+    batch_size = getattr(settings, 'EMBEDDING_BATCH_SIZE', 64)
+    results = []
+    for force in (False, True):
+        ids = sorted(rid for rid, f in forced.items() if f == force)
+        for i in range(0, len(ids), batch_size * 8):
+            chunk = ids[i:i + batch_size * 8]
+            # the pipeline's index / rank stages publish the new vectors
+            stats = embed_resumes_batch(chunk, force=force, publish=False)
+            results.append(stats)
+            _advance_embedded(chunk, stats, force)
+    # only now: a flush that dies half way leaves its rows to be reclaimed
+    PendingEmbedding.objects.filter(claim=token).delete()
+    return {"ok": True, "queued": len(forced), "batches": results}
+
+
+def _advance_embedded(resume_ids, stats, force):
+    """Move the batch's resumes that are still in the embed stage on to the next one."""
+    from resumes.utils import ingestion
+
+    waiting = Resume.objects.filter(id__in=resume_ids, ingest_status='embed').values_list('id', flat=True)
+    # no model: carry on without an embedding
+    failed = not stats.get("ok") and stats.get("reason") != "no model"
+    for resume_id in waiting:
+        if failed:
+            ingestion.set_status(resume_id, ingestion.FAILED, f"embed: {stats.get('reason')}"[:2000])
+        else:
+            _advance('embed', resume_id, force)
@@ -1,3 +1,1040 @@
-from django.test import TestCase
+import math
+import re
+import tempfile
+from collections import Counter
+from io import StringIO
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.db import IntegrityError, connection, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.http import QueryDict
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from accounts.models import UserProfile
+from interviews.models import Interview, InterviewAttempt, InterviewInvite
+from interviews.serializers import InterviewInviteSerializer
+from resumes.models import Application, Job, PendingEmbedding, Resume, ResumeRecommendation, Shortlist
+from resumes import tasks
+from resumes.tasks import flush_pending_embeddings, queue_resume_embedding, sync_tfidf_index
+from resumes.serializers import ApplicationSerializer, ResumeUploadSerializer, ShortlistSerializer
+from resumes.utils import ingestion, match_cache, recommendations, scoring, skill_bits, text_cache
+from resumes.utils.candidate_filters import apply_filters, parse_filters
+from resumes.utils.feature_store import build_features, decode_features, encode_features, tfidf_cosine, tokenize
+from resumes.utils.extractor_planner import plan_extractors, planner_stats, record_attempts
+from resumes.utils.embedding_store import decode_embedding, read_header
+from resumes.utils.matching import job_text_for, rank_jobs_for_resume, rank_resumes_for_job
+from resumes.utils.pagination import encode_cursor
+from resumes.utils.pdf_extract import extract_text_from_filefield
+from resumes.utils.query_planner import optimize, plan_for
+from resumes.utils.skill_taxonomy import SkillTaxonomy, skill_ids_for
+from resumes.utils.ranking_store import LocalRankingStore, job_key, page_for_job, rows_for_page, update_resume
+from resumes.utils.tfidf_index import TfidfIndex, build_index
+from resumes.utils.vector_index import prefilter, rebuild_vector_index
+
+
+class QueryPlanTests(TestCase):
+    def test_nested_serializers_are_joined(self):
+        plan = plan_for(ApplicationSerializer, Application)
+        self.assertTrue({'job', 'resume', 'resume__user', 'candidate'} <= plan.select)
+        self.assertEqual(plan.prefetch, {})
+
+    def test_method_field_hints_are_followed(self):
+        self.assertIn('shortlisted_by', plan_for(ShortlistSerializer, Shortlist).select)
+        self.assertIn('interview__job', plan_for(InterviewInviteSerializer, InterviewInvite).select)
+
+    def test_only_keeps_serialized_columns(self):
+        only = plan_for(ResumeUploadSerializer, Resume).only_fields(Resume)
+        self.assertIn('user__username', only)
+        self.assertIn('file', only)
+        self.assertNotIn('extracted_text', only)
+        self.assertNotIn('embedding_vec', only)
+
+    def test_optimized_queryset_serializes_without_deferred_loads(self):
+        user = User.objects.create(username='plan-user')
+        Resume.objects.bulk_create([Resume(user=user, file='resumes/a.pdf', skills='python')])
+        qs = optimize(Resume.objects.filter(user=user), ResumeUploadSerializer)
+        with self.assertNumQueries(1):
+            data = ResumeUploadSerializer(qs, many=True).data
+        self.assertEqual(data[0]['user'], 'plan-user')
+
+
+class ListEndpointQueryCountTests(TestCase):
+    """Every list endpoint runs the same number of queries for 2 rows as for 10."""
+
+    SMALL, LARGE = 2, 10
+
+    def setUp(self):
+        self.recruiter = self._user('recruiter', role='recruiter')
+        self.candidate = self._user('candidate')
+        self.job = Job.objects.create(title='Backend', description='python django', skills_required='python',
+                                      created_by=self.recruiter)
+        self.interview = Interview.objects.create(title='Screen', created_by=self.recruiter, job=self.job)
+        self.client = APIClient()
+
+    def _user(self, username, role='student'):
+        user = User.objects.create(username=username, email=f'{username}@example.com')
+        profile, _ = UserProfile.objects.get_or_create(user=user)
+        profile.role = role
+        profile.save()
+        user.profile = profile
+        return user
+
+    def _add_rows(self, start, stop):
+        """Per-row data for every endpoint; bulk_create keeps ranking signals out of the way."""
+        users = [self._user(f'cand{i}') for i in range(start, stop)]
+        resumes = Resume.objects.bulk_create([
+            Resume(user=u, file=f'resumes/cv{u.id}.pdf', skills='python', extracted_text='python') for u in users
+        ])
+        own = Resume.objects.bulk_create([
+            Resume(user=self.candidate, file=f'resumes/own{i}.pdf', is_latest=False) for i in range(start, stop)
+        ])
+        jobs = Job.objects.bulk_create([
+            Job(title=f'Job {i}', description='x', skills_required='python', created_by=self.recruiter)
+            for i in range(start, stop)
+        ])
+        Application.objects.bulk_create([Application(job=self.job, resume=r, candidate=r.user) for r in resumes])
+        Shortlist.objects.bulk_create([Shortlist(job=j, resume=r, shortlisted_by=self.recruiter)
+                                       for j, r in zip(jobs, own)])
+        interviews = Interview.objects.bulk_create([
+            Interview(title=f'Round {i}', created_by=self.recruiter, job=j) for i, j in zip(range(start, stop), jobs)
+        ])
+        InterviewInvite.objects.bulk_create([InterviewInvite(interview=i, candidate=self.candidate) for i in interviews])
+        InterviewAttempt.objects.bulk_create([InterviewAttempt(interview=self.interview, candidate=u) for u in users])
+
+    def _count(self, user, url):
+        self.client.force_authenticate(user)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content[:500])
+        return len(ctx.captured_queries), response
+
+    def assertConstantQueries(self, user, url):
+        self._add_rows(0, self.SMALL)
+        small, _ = self._count(user, url)
+        self._add_rows(self.SMALL, self.LARGE)
+        large, _ = self._count(user, url)
+        self.assertEqual(small, large, f"{url}: {small} queries for {self.SMALL} rows, {large} for {self.LARGE}")
+
+    def test_recruiter_applications(self):
+        self.assertConstantQueries(self.recruiter, '/api/resumes/recruiter/applications/')
+
+    def test_application_viewset(self):
+        self.assertConstantQueries(self.recruiter, '/api/resumes/applications/')
+
+    def test_shortlist(self):
+        self.assertConstantQueries(self.recruiter, '/api/resumes/shortlist/')
+
+    def test_my_shortlists(self):
+        self.assertConstantQueries(self.candidate, '/api/resumes/my-shortlists/')
+
+    def test_my_resumes(self):
+        self.assertConstantQueries(self.candidate, '/api/resumes/my-resumes/')
+
+    def test_job_list(self):
+        self.assertConstantQueries(self.recruiter, '/api/resumes/jobs/')
+
+    def test_candidate_invites(self):
+        self.assertConstantQueries(self.candidate, '/api/interviews/candidate/invites/')
+
+    def test_recruiter_interviews(self):
+        self.assertConstantQueries(self.recruiter, '/api/interviews/recruiter/')
+
+    def test_public_interviews(self):
+        self.assertConstantQueries(self.candidate, '/api/interviews/candidate/')
+
+    def test_recruiter_attempts(self):
+        self.assertConstantQueries(self.recruiter, f'/api/interviews/recruiter/{self.interview.id}/attempts/')
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.recruiter = User.objects.create(username='recruiter')
+        self.recruiter.profile.role = 'recruiter'
+        self.recruiter.profile.save()
+        Job.objects.bulk_create([
+            Job(title=f'Job {i}', description='x', skills_required='python', created_by=self.recruiter)
+            for i in range(7)
+        ])
+        # ties on posted_at: the id tiebreak keeps pages disjoint
+        Job.objects.update(posted_at=timezone.now())
+        self.client = APIClient()
+        self.client.force_authenticate(self.recruiter)
+
+    def _walk(self, url):
+        seen, pages = [], 0
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            seen += [row['id'] for row in response.data]
+            pages += 1
+            link = response.headers.get('Link')
+            url = link[1:link.index('>')] if link else None
+        return seen, pages
+
+    def test_pages_cover_every_row_once_in_order(self):
+        seen, pages = self._walk('/api/resumes/jobs/?page_size=3')
+        self.assertEqual(pages, 3)
+        self.assertEqual(seen, list(Job.objects.order_by('-posted_at', '-id').values_list('id', flat=True)))
+
+    def test_lists_are_whole_unless_paging_is_asked_for(self):
+        response = self.client.get('/api/resumes/jobs/')
+        self.assertEqual(len(response.data), 7)
+        self.assertNotIn('Link', response.headers)
+
+    @override_settings(API_PAGE_SIZE=4, API_PAGINATE_BY_DEFAULT=True)
+    def test_default_page_size_and_last_page_has_no_cursor(self):
+        response = self.client.get('/api/resumes/jobs/')
+        self.assertEqual(len(response.data), 4)
+        cursor = response.headers['X-Next-Cursor']
+        response = self.client.get(f'/api/resumes/jobs/?cursor={cursor}')
+        self.assertEqual(len(response.data), 3)
+        self.assertNotIn('X-Next-Cursor', response.headers)
+
+    def test_bad_cursor_is_a_400(self):
+        for cursor in ('not-a-cursor', encode_cursor(['x']), encode_cursor(['2025-01-01T00:00:00', 'x'])):
+            self.assertEqual(self.client.get(f'/api/resumes/jobs/?cursor={cursor}').status_code, 400)
+
+    def test_application_viewset_is_paginated(self):
+        candidate = User.objects.create(username='cand')
+        resumes = Resume.objects.bulk_create([Resume(user=candidate, is_latest=False) for _ in range(3)])
+        job = Job.objects.first()
+        Application.objects.bulk_create([Application(job=job, resume=r, candidate=candidate) for r in resumes])
+        response = self.client.get('/api/resumes/applications/?page_size=2')
+        self.assertEqual(len(response.data), 2)
+        self.assertIn('X-Next-Cursor', response.headers)
+
+
+class RankingStoreCursorTests(TestCase):
+    def test_range_after_continues_from_score_and_id(self):
+        store = LocalRankingStore()
+        store.replace('job:1', {1: 90.0, 2: 80.0, 3: 80.0, 4: 70.0})
+        self.assertEqual(store.range('job:1', 0, 2), [(1, 90.0), (2, 80.0)])
+        self.assertEqual(store.range_after('job:1', 80.0, 2, 2), [(3, 80.0), (4, 70.0)])
+        # a cursor row that has since left the set still resumes in place
+        store.remove_many([('job:1', 2)])
+        self.assertEqual(store.range_after('job:1', 80.0, 2, 5), [(3, 80.0), (4, 70.0)])
+
+    def test_page_rows_carry_the_stored_score(self):
+        user = User.objects.create(username='owner')
+        job = Job.objects.create(title='Backend', description='python', skills_required='python', created_by=user)
+        a, b = Resume.objects.bulk_create([
+            Resume(user=user, skills='python', extracted_text='python', is_latest=False),
+            Resume(user=user, skills='java', extracted_text='java', is_latest=False),
+        ])
+        rows = rows_for_page(job, [(b.id, 91.5), (a.id, 42.0)])
+        self.assertEqual([(r['resume_id'], r['score']) for r in rows], [(b.id, 91.5), (a.id, 42.0)])
+
+    def test_update_resume_drops_jobs_the_prefilter_cut(self):
+        user = User.objects.create(username='candidate')
+        near = Job.objects.create(title='Backend', description='python', skills_required='python', created_by=user)
+        far = Job.objects.create(title='Design', description='figma', skills_required='figma', created_by=user)
+        resume = Resume.objects.bulk_create([Resume(user=user, skills='python', extracted_text='python')])[0]
+        store = LocalRankingStore()
+        store.replace(job_key(far.id), {resume.id: 55.0})
+        with mock.patch('resumes.utils.ranking_store.get_store', return_value=store), \
+                mock.patch('resumes.utils.vector_index.prefilter', lambda kind, query, rows: [near]):
+            scores = update_resume(resume)
+        self.assertEqual(list(scores), [near.id])
+        self.assertEqual(store.members(job_key(far.id)), [])
+        self.assertEqual(store.members(job_key(near.id)), [resume.id])
+
+    @override_settings(VECTOR_PREFILTER_K=2)
+    def test_page_total_counts_the_pool_behind_a_prefiltered_set(self):
+        resumes = Resume.objects.bulk_create([
+            Resume(user=User.objects.create(username=f'candidate{i}'), skills='python', extracted_text='python')
+            for i in range(3)
+        ])
+        store = LocalRankingStore()
+        store.replace(job_key(1), {r.id: 50.0 for r in resumes[:2]})
+        with mock.patch('resumes.utils.ranking_store.get_store', return_value=store):
+            total, ranked = page_for_job(1, 0, 10)
+        self.assertEqual((total, len(ranked)), (3, 2))
+
+
+class VectorPrefilterTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        user = User.objects.create(username='owner')
+        self.job = Job(title='Backend', description='x', created_by=user)
+        self.job.set_embedding([1.0, 0.0], 'test-model')
+        self.resumes = []
+        for vec in ([1.0, 0.0], [0.9, 0.1], [0.0, 1.0], [-1.0, 0.0]):
+            r = Resume(user=user, is_latest=False)
+            r.set_embedding(vec, 'test-model')
+            self.resumes.append(r)
+        Resume.objects.bulk_create(self.resumes)
+
+    def _kept(self, rows, **limits):
+        with override_settings(VECTOR_INDEX_DIR=self.tmp.name, VECTOR_INDEX_BACKEND='flat', **limits):
+            rebuild_vector_index('resume', 'test-model')
+            return [r.id for r in prefilter('resume', self.job, rows)]
+
+    def test_large_pool_keeps_nearest_and_unindexed(self):
+        late = Resume.objects.create(user=self.resumes[0].user, is_latest=False)
+        kept = self._kept(self.resumes + [late], VECTOR_PREFILTER_MIN=3, VECTOR_PREFILTER_K=2)
+        # the two nearest, plus a resume the index can't judge (no embedding)
+        self.assertEqual(kept, [self.resumes[0].id, self.resumes[1].id, late.id])
+
+    def test_small_pool_is_untouched(self):
+        kept = self._kept(self.resumes, VECTOR_PREFILTER_MIN=10, VECTOR_PREFILTER_K=1)
+        self.assertEqual(kept, [r.id for r in self.resumes])
+
+
+@override_settings(RECOMMENDATIONS_TOP_K=2)
+class RecommendationMergeTests(TestCase):
+    def setUp(self):
+        user = User.objects.create(username='owner')
+        self.resume = Resume.objects.bulk_create([Resume(user=user, is_latest=False)])[0]
+        # job 3 (75) was cut at K=2
+        ResumeRecommendation.objects.create(resume=self.resume, job_ids=[1, 2], scores=[90.0, 80.0])
+
+    def _merge(self, job_id, scores):
+        with mock.patch('resumes.utils.ranking_store.schedule_resume_update') as schedule:
+            recommendations.merge_job(job_id, scores)
+        rec = ResumeRecommendation.objects.get(resume=self.resume)
+        return list(zip(rec.job_ids, rec.scores)), [c.args[0] for c in schedule.call_args_list]
+
+    def test_higher_job_is_merged_in_place(self):
+        row, refreshed = self._merge(4, {self.resume.id: 85.0})
+        self.assertEqual(row, [(1, 90.0), (4, 85.0)])
+        self.assertEqual(refreshed, [])
+
+    def test_stored_job_falling_below_kth_score_refreshes_the_row(self):
+        _, refreshed = self._merge(2, {self.resume.id: 70.0})
+        self.assertEqual(refreshed, [self.resume.id])
+
+    def test_stored_job_no_longer_scored_refreshes_the_row(self):
+        _, refreshed = self._merge(1, {})
+        self.assertEqual(refreshed, [self.resume.id])
+
+
+class ShortlistExportTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create(username='recruiter'))
+
+    def test_bad_delimiter_is_rejected_before_streaming_or_queuing(self):
+        with mock.patch('resumes.views.shortlist_export.create_job') as create_job:
+            for delimiter in (';;', '', '"', '%0A'):
+                for mode in ('', '&mode=background'):
+                    response = self.client.get(f'/api/resumes/shortlist/export/?delimiter={delimiter}{mode}')
+                    self.assertEqual(response.status_code, 400, (delimiter, mode))
+        create_job.assert_not_called()
+
+    def test_single_character_delimiter_streams(self):
+        response = self.client.get('/api/resumes/shortlist/export/?delimiter=%3B')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'shortlist_id;'))
+
+
+class TfidfDeltaCompactionTests(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name)
+        user = User.objects.create(username='owner')
+        self.a, self.b = Resume.objects.bulk_create([
+            Resume(user=user, extracted_text='python django', is_latest=False),
+            Resume(user=user, extracted_text='java spring', is_latest=False),
+        ])
+        build_index([(self.a.id, self.a.extracted_text)], root=self.root)
+
+    def _delta(self, index):
+        return (self.root / index.segment / 'delta.jsonl')
+
+    def test_small_delta_is_appended(self):
+        index = TfidfIndex(root=self.root)
+        index.upsert(self.b.id, self.b.extracted_text)
+        self.assertTrue(index.contains(self.b.id))
+        self.assertEqual(len(self._delta(index).read_text().splitlines()), 1)
+
+    def test_delta_over_the_limit_is_compacted_into_a_new_segment(self):
+        index = TfidfIndex(root=self.root)
+        first = index.segment
+        with override_settings(RESUME_TFIDF_INDEX_DIR=self.root, RESUME_TFIDF_DELTA_MAX_BYTES=10):
+            index.upsert(self.b.id, self.b.extracted_text)
+        index.refresh()
+        self.assertNotEqual(index.segment, first)
+        self.assertFalse(self._delta(index).exists())
+        self.assertTrue(index.contains(self.a.id) and index.contains(self.b.id))
+
+    def test_resume_text_saves_sync_the_index_after_commit(self):
+        self.b.extracted_text = 'java spring kotlin'
+        with mock.patch('resumes.tasks.sync_tfidf_index.delay') as delay, \
+                mock.patch('resumes.utils.ranking_store._dispatch'):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.b.save(update_fields=['extracted_text'])
+                delay.assert_not_called()
+        delay.assert_called_once_with(self.b.id)
+
+    def test_sync_task_follows_the_database(self):
+        with mock.patch('resumes.utils.tfidf_index.get_index', lambda: TfidfIndex(root=self.root)):
+            sync_tfidf_index(self.b.id)
+            deleted = self.a.id
+            self.a.delete()
+            sync_tfidf_index(deleted)
+        index = TfidfIndex(root=self.root)
+        index.refresh()
+        self.assertTrue(index.contains(self.b.id))
+        self.assertFalse(index.contains(deleted))
+
+
+class EmbeddingQueueTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create(username='owner')
+        self.a, self.b, self.c = Resume.objects.bulk_create([Resume(user=user, is_latest=False) for _ in range(3)])
+        self.embedded = []
+
+    def _embed(self, side_effect=None):
+        def embed(ids, force=False, publish=True):
+            self.embedded.append(list(ids))
+            if side_effect:
+                side_effect(ids)
+            return {"ok": True, "updated_ids": []}
+        return mock.patch('resumes.tasks.embed_resumes_batch', side_effect=embed)
+
+    def test_ids_queued_during_a_flush_are_embedded_once_by_the_next(self):
+        def enqueue_while_flushing(ids):
+            if self.b.id not in ids:
+                # arrives after the running flush claimed its rows; schedules (and, eager, runs) another
+                queue_resume_embedding(self.b.id)
+        PendingEmbedding.objects.create(resume=self.a)
+        with self._embed(enqueue_while_flushing):
+            flush_pending_embeddings()
+        self.assertEqual(self.embedded, [[self.a.id], [self.b.id]])
+        self.assertFalse(PendingEmbedding.objects.exists())
+
+    def test_overlapping_flush_claims_nothing_twice(self):
+        PendingEmbedding.objects.create(resume=self.a)
+        PendingEmbedding.objects.create(resume=self.a, force=True)
+
+        with self._embed(lambda ids: flush_pending_embeddings()):
+            flush_pending_embeddings()
+        self.assertEqual(self.embedded, [[self.a.id]])
+
+    def test_rows_left_by_a_dead_flush_are_reclaimed(self):
+        stale = timezone.now() - timedelta(hours=1)
+        PendingEmbedding.objects.create(resume=self.c, claim='dead', claimed_at=stale)
+        PendingEmbedding.objects.create(resume=self.b, claim='running', claimed_at=timezone.now())
+        with self._embed():
+            flush_pending_embeddings()
+        self.assertEqual(self.embedded, [[self.c.id]])
+        self.assertEqual(list(PendingEmbedding.objects.values_list('claim', flat=True)), ['running'])
+
+
+class MatchingEngineTests(TestCase):
+    """The batched engine against the per-row blend it replaced, worked out one resume at a time."""
+
+    def setUp(self):
+        owner = User(id=1, username='owner')
+        self.job = Job(id=1, title='Backend engineer', description='Python and Django APIs on PostgreSQL',
+                       skills_required='python, django, kubernetes', created_by=owner)
+        self.job.set_embedding([1.0, 0.0, 1.0], 'm')
+        specs = [
+            ('python django rest apis postgresql', 'python, django', [1.0, 0.0, 0.9]),
+            ('java spring backend services', 'java', None),
+            ('django django python python kubernetes', 'python, kubernetes', [0.0, 1.0, 0.0]),
+            ('line cook pastry', 'cooking', None),
+            ('frontend react and some django', 'react, django', [0.5, 0.4, 0.3]),
+        ]
+        self.resumes = []
+        for i, (text, skills, vec) in enumerate(specs, start=1):
+            r = Resume(id=i, user=User(id=10 + i, username=f'c{i}'), extracted_text=text, skills=skills)
+            if vec:
+                r.set_embedding(vec, 'm')
+            self.resumes.append(r)
+        self.texts = [r.extracted_text for r in self.resumes]
+
+    def _per_row(self):
+        """{resume_id: (score, missing_skills)} the way the old view loop computed them."""
+        tokens = lambda text: Counter(w.lower() for w in re.findall(r"[A-Za-z0-9_]+", text))
+        docs = [tokens(t) for t in self.texts]
+        query = tokens(job_text_for(self.job))
+        n = len(docs) + 1
+
+        def weights(counts):
+            df = lambda term: sum(term in d for d in docs) + (term in query)
+            return {t: c * (math.log((n + 1) / (df(t) + 1)) + 1) for t, c in counts.items()}
+
+        def cosine(a, b):
+            dot = sum(w * b.get(t, 0.0) for t, w in a.items())
+            norm = math.sqrt(sum(w * w for w in a.values())) * math.sqrt(sum(w * w for w in b.values()))
+            return dot / norm if norm else 0.0
+
+        q = weights(query)
+        job_skills = {s.strip() for s in self.job.skills_required.lower().split(',') if s.strip()}
+        out = {}
+        for r, d in zip(self.resumes, docs):
+            tfidf = cosine(weights(d), q) * 100.0
+            have = {s.strip() for s in r.skills.lower().split(',') if s.strip()}
+            skills = len(job_skills & have) / len(job_skills) * 100.0
+            emb = 0.0
+            if r.embedding is not None:
+                emb = max(0.0, cosine(dict(enumerate(r.embedding)), dict(enumerate(self.job.embedding)))) * 100.0
+            final = 0.6 * emb + 0.2 * tfidf + 0.2 * skills if emb else 0.8 * tfidf + 0.2 * skills
+            out[r.id] = (round(final, 2), sorted(job_skills - have))
+        return out
+
+    def test_batched_scores_match_the_per_row_blend(self):
+        total, rows = rank_resumes_for_job(self.job, self.resumes, self.texts)
+        expected = self._per_row()
+        self.assertEqual(total, len(self.resumes))
+        for row in rows:
+            score, missing = expected[row["resume_id"]]
+            # float32 embeddings: allow one unit in the last rounded place
+            self.assertAlmostEqual(row["score"], score, delta=0.011)
+            self.assertEqual(row["missing_skills"], missing)
+        self.assertEqual([r["resume_id"] for r in rows],
+                         sorted(expected, key=lambda rid: (-expected[rid][0], rid)))
+
+    def test_blend_strategy_scores_like_the_ranking(self):
+        # taxonomy aliases go through the skill bitsets on both paths
+        self.job.skills_required = 'python, js, kubernetes'
+        self.resumes[4].skills = 'react, JavaScript'
+        _, rows = rank_resumes_for_job(self.job, self.resumes, self.texts)
+        scores = scoring.score_batch(scoring.prepare_job(self.job),
+                                     [scoring.prepare_resume(r, t) for r, t in zip(self.resumes, self.texts)])
+        self.assertEqual({r["resume_id"]: r["score"] for r in rows},
+                         {r.id: float(s) for r, s in zip(self.resumes, scores)})
+        self.assertEqual(rows[[r["resume_id"] for r in rows].index(5)]["missing_skills"], ['kubernetes', 'python'])
+
+    def test_top_k_and_cursor_pages_are_slices_of_the_full_ranking(self):
+        _, full = rank_resumes_for_job(self.job, self.resumes, self.texts)
+        _, top = rank_resumes_for_job(self.job, self.resumes, self.texts, top_k=2)
+        self.assertEqual(top, full[:2])
+        after = (full[1]["score"], full[1]["resume_id"])
+        _, rest = rank_resumes_for_job(self.job, self.resumes, self.texts, after=after)
+        self.assertEqual(rest, full[2:])
+
+
+class EmbeddingBlobMigrationTests(TransactionTestCase):
+    """0022 turns JSON embedding lists into float32 blobs, and back."""
+
+    before = [('resumes', '0021_job_created_by')]
+    after = [('resumes', '0022_embedding_binary_storage')]
+
+    def _migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        self._migrate(MigrationExecutor(connection).loader.graph.leaf_nodes())
+
+    def test_json_embeddings_round_trip_through_the_blob(self):
+        apps = self._migrate(self.before)
+        owner = apps.get_model('auth', 'User').objects.create(username='owner')
+        Resume = apps.get_model('resumes', 'Resume')
+        kept = Resume.objects.create(user=owner, embedding=[0.25, -1.5, 3.0], embedding_model_version='m1')
+        empty = Resume.objects.create(user=owner, embedding=None)
+
+        apps = self._migrate(self.after)
+        Resume = apps.get_model('resumes', 'Resume')
+        blob = Resume.objects.get(id=kept.id).embedding_vec
+        self.assertEqual((read_header(blob)["dtype"], read_header(blob)["model_version"]), ('float32', 'm1'))
+        self.assertEqual(decode_embedding(blob).tolist(), [0.25, -1.5, 3.0])
+        self.assertIsNone(Resume.objects.get(id=empty.id).embedding_vec)
+
+        apps = self._migrate(self.before)
+        self.assertEqual(apps.get_model('resumes', 'Resume').objects.get(id=kept.id).embedding, [0.25, -1.5, 3.0])
+
+
+class PipelineStatsTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_staff_only(self):
+        self.client.force_authenticate(User.objects.create(username='candidate'))
+        self.assertEqual(self.client.get('/api/resumes/ops/stats/').status_code, 403)
+
+    def test_reports_loaded_models(self):
+        self.client.force_authenticate(User.objects.create(username='ops', is_staff=True))
+        footprint = {"param_bytes": 90_000_000, "rss_delta_bytes": None, "load_seconds": 1.2}
+        with mock.patch.dict('resumes.utils.model_registry._footprint', {'mini': footprint}):
+            data = self.client.get('/api/resumes/ops/stats/').json()
+        self.assertEqual(data["embedding_models"]["models"], {'mini': footprint})
+        self.assertIn("process_rss_bytes", data["embedding_models"])
+        self.assertEqual(set(data["text_cache"]["process"]), {"hits", "misses", "errors", "hit_ratio"})
+
+
+class TextCacheTests(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name)
+        patcher = mock.patch.object(text_cache, '_backend', text_cache.DiskTextCache(self.root / 'cache'))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _file(self, name, raw):
+        path = self.root / name
+        path.write_bytes(raw)
+        return str(path)
+
+    def _extract(self, path, text='Python developer'):
+        with mock.patch('resumes.utils.pdf_extract.extract_text_from_bytes', return_value=text) as parse:
+            out = extract_text_from_filefield(path)
+        return out, parse.call_count
+
+    def test_same_content_is_parsed_once(self):
+        before = text_cache.cache_stats()["process"]
+        first = self._extract(self._file('a.pdf', b'%PDF-1.4 same bytes'))
+        # a duplicate upload under another name hits the same content key
+        second = self._extract(self._file('b.pdf', b'%PDF-1.4 same bytes'))
+        after = text_cache.cache_stats()["process"]
+        self.assertEqual((first, second), (('Python developer', 1), ('Python developer', 0)))
+        self.assertEqual((after["hits"] - before["hits"], after["misses"] - before["misses"]), (1, 1))
+
+    def test_empty_results_are_not_cached(self):
+        path = self._file('scan.pdf', b'%PDF-1.4 scanned')
+        self.assertEqual(self._extract(path, text=''), ('', 1))
+        self.assertEqual(self._extract(path), ('Python developer', 1))
+
+    def test_extractor_version_is_part_of_the_key(self):
+        path = self._file('a.pdf', b'%PDF-1.4 versioned')
+        self._extract(path)
+        with mock.patch('resumes.utils.pdf_extract.extraction_version', return_value='next'):
+            self.assertEqual(self._extract(path)[1], 1)
+
+
+@override_settings(PDF_EXTRACTOR_PREFERENCE=('pdfminer', 'pdfplumber', 'pypdf2'),
+                   PDF_PLANNER_MIN_SAMPLES=2, PDF_PLANNER_EXPLORE=0)
+class ExtractorPlannerTests(TestCase):
+    text = {"readable": True, "text_layer": True, "family": "microsoft"}
+
+    def setUp(self):
+        cache.clear()
+        # plans only name installed extractors; pretend every library is
+        patcher = mock.patch.dict('resumes.utils.pdf_extract.EXTRACTORS',
+                                  dict.fromkeys(('pdfminer', 'pdfplumber', 'pypdf2', 'ocr'), lambda *a, **k: []))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _record(self, extractor, family, seconds, ok, runs=2):
+        for _ in range(runs):
+            record_attempts({"family": family}, [{"extractor": extractor, "seconds": seconds, "pages": 1, "ok": ok}])
+
+    def test_profiles_without_a_text_layer(self):
+        scan = {"readable": True, "text_layer": False, "images": True}
+        with override_settings(PDF_OCR_ENABLED=True):
+            self.assertEqual(plan_extractors(scan), ['ocr'])
+        self.assertEqual(plan_extractors(scan), [])
+        self.assertEqual(plan_extractors({"encrypted": True, "readable": False}), [])
+        # couldn't sniff: the whole chain
+        self.assertEqual(plan_extractors({"text_layer": None}), ['pdfminer', 'pdfplumber', 'pypdf2'])
+
+    def test_unmeasured_extractors_keep_the_preference_order(self):
+        self.assertEqual(plan_extractors(self.text), ['pdfminer', 'pdfplumber'])
+
+    def test_cheapest_suitable_extractor_leads_once_measured(self):
+        self._record('pdfminer', 'microsoft', 0.9, True)
+        self._record('pdfplumber', 'microsoft', 0.1, False)
+        self._record('pypdf2', 'microsoft', 0.3, True)
+        # pdfplumber is fastest but fails on this family
+        self.assertEqual(plan_extractors(self.text), ['pypdf2', 'pdfminer'])
+        # another family falls back to the totals over every family ("*")
+        self.assertEqual(plan_extractors(dict(self.text, family='pdftex')), ['pypdf2', 'pdfminer'])
+
+    def test_stats_are_shared_through_the_cache(self):
+        self._record('pypdf2', 'microsoft', 0.25, True)
+        stats = planner_stats()["pypdf2"]
+        self.assertEqual(stats["microsoft"], {"runs": 2, "ok": 2, "success_rate": 1.0, "seconds_per_page": 0.25})
+        self.assertEqual(stats["*"]["runs"], 2)
+
+
+class MatchCacheReadThroughTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.job = Job.objects.create(title='Backend', description='python', created_by=User.objects.create(username='owner'))
+        self.computed = 0
+
+        def compute(job):
+            self.computed += 1
+            return 1, [{"resume_id": 7, "score": 50.0}]
+        patcher = mock.patch('resumes.utils.match_cache.compute_job_ranking', side_effect=compute)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_second_read_is_served_from_the_cache(self):
+        first = match_cache.get_job_ranking(self.job)
+        second = match_cache.get_job_ranking(self.job)
+        self.assertEqual(self.computed, 1)
+        self.assertEqual(second["rows"], first["rows"])
+
+    @override_settings(MATCH_CACHE_FRESH_SECONDS=-1)
+    def test_stale_entry_is_served_while_one_refresh_runs(self):
+        match_cache.get_job_ranking(self.job)
+        with mock.patch('resumes.utils.match_cache._refresh_in_background') as refresh:
+            stale = match_cache.get_job_ranking(self.job)
+            match_cache.get_job_ranking(self.job)
+        self.assertEqual(stale["total"], 1)
+        self.assertEqual(self.computed, 1)
+        # the refresh lock lets only one reader start it
+        self.assertEqual(refresh.call_count, 1)
+
+
+class MatchCachePatchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.job = Job.objects.create(title='Backend', description='python django postgres',
+                                      skills_required='python, django', created_by=User.objects.create(username='owner'))
+        self.a, self.b = Resume.objects.bulk_create([
+            Resume(user=User.objects.create(username='a'), extracted_text='python django', skills='python, django'),
+            Resume(user=User.objects.create(username='b'), extracted_text='java spring', skills='java'),
+        ])
+        build_index([(r.id, r.extracted_text) for r in (self.a, self.b)], root=Path(tmp.name))
+        index = TfidfIndex(root=tmp.name)
+        index.refresh()
+        patcher = mock.patch('resumes.utils.match_cache.get_tfidf_index', return_value=index)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        match_cache.get_job_ranking(self.job)
+
+    def _read(self):
+        """A cached read; fails if it falls back to a full recompute."""
+        with mock.patch('resumes.utils.match_cache.compute_job_ranking', side_effect=AssertionError) as compute:
+            try:
+                return match_cache.get_job_ranking(self.job)
+            except AssertionError:
+                return None
+            finally:
+                self.recomputed = compute.called
+
+    def _scores(self, entry):
+        return [(r["resume_id"], r["score"]) for r in entry["rows"]]
+
+    def test_generation_bump_drops_every_ranking(self):
+        key = match_cache.ranking_key(self.job.id)
+        match_cache.invalidate_all_rankings()
+        self.assertNotEqual(match_cache.ranking_key(self.job.id), key)
+        self._read()
+        self.assertTrue(self.recomputed)
+
+    def test_changed_resumes_are_patched_into_the_cached_rows(self):
+        c = Resume.objects.bulk_create([
+            Resume(user=User.objects.create(username='c'), extracted_text='python postgres', skills='python'),
+        ])[0]
+        Resume.objects.filter(id=self.b.id).delete()
+        match_cache.note_resumes_changed([c.id])
+        match_cache.note_resumes_changed([self.b.id], deleted=True)
+        patched = self._read()
+        self.assertFalse(self.recomputed)
+        self.assertEqual({r["resume_id"] for r in patched["rows"]}, {self.a.id, c.id})
+        total, rows = match_cache.compute_job_ranking(self.job)
+        self.assertEqual(self._scores(patched), [(r["resume_id"], r["score"]) for r in rows])
+        self.assertEqual(patched["total"], total)
+
+    def test_missing_change_log_slot_forces_a_recompute(self):
+        match_cache.note_resumes_changed([self.a.id, self.b.id])
+        cache.delete(match_cache.CHANGE_SLOT_KEY.format(match_cache._change_seq()))
+        self._read()
+        self.assertTrue(self.recomputed)
+
+
+class FeatureStoreTests(TestCase):
+    docs = [
+        "Senior Python developer; Django, REST APIs and PostgreSQL. Python!",
+        "Java / Spring backend engineer",
+        "",
+        "python python python",
+        "Data engineer: Spark, Python, SQL, Airflow",
+    ]
+    query = "Backend engineer, Python + Django + PostgreSQL"
+
+    def _string_tfidf(self):
+        """The string-based TF-IDF the feature records replaced (token lists, tf = count / length)."""
+        token_lists = [tokenize(d) for d in self.docs] + [tokenize(self.query)]
+        df = Counter(t for toks in token_lists for t in set(toks))
+        n = len(token_lists)
+
+        def vector(toks):
+            return {t: c / len(toks) * (math.log((n + 1) / (df[t] + 1)) + 1) for t, c in Counter(toks).items()}
+
+        q = vector(token_lists[-1])
+        out = []
+        for toks in token_lists[:-1]:
+            d = vector(toks) if toks else {}
+            norm = math.sqrt(sum(v * v for v in d.values())) * math.sqrt(sum(v * v for v in q.values()))
+            out.append(sum(v * q.get(t, 0.0) for t, v in d.items()) / norm if norm else 0.0)
+        return out
+
+    def test_tfidf_over_feature_ids_matches_the_string_implementation(self):
+        q = build_features(self.query)
+        feats = [build_features(d) for d in self.docs]
+        sims = tfidf_cosine(q.tok_ids, q.tok_counts, [f.tok_ids for f in feats], [f.tok_counts for f in feats])
+        for got, want in zip(sims.tolist(), self._string_tfidf()):
+            self.assertAlmostEqual(got, want, places=12)
+
+    def test_blob_round_trip(self):
+        f = build_features(self.docs[0], skills='python, django, cobol', experience='4 years')
+        g = decode_features(encode_features(f))
+        for name in ('tok_ids', 'tok_counts', 'ngram_ids', 'ngram_counts', 'kw_ids', 'skill_ids'):
+            self.assertEqual(getattr(g, name).tolist(), getattr(f, name).tolist(), name)
+        self.assertEqual(g.experience, 4.0)
+
+    def test_save_rebuilds_the_record_only_when_its_inputs_change(self):
+        r = Resume(user=User.objects.create(username='c'), extracted_text='python developer', skills='python')
+        r.save()
+        blob = r.features_blob
+        r.location = 'Berlin'
+        r.save(update_fields=['location'])
+        self.assertEqual(Resume.objects.get(id=r.id).features_blob, blob)
+        r.skills = 'python, django'
+        r.save(update_fields=['skills'])
+        stored = Resume.objects.get(id=r.id)
+        self.assertNotEqual(stored.features_blob, blob)
+        self.assertEqual(stored.features.skill_ids.size, 2)
+
+
+class SkillTaxonomyTests(TestCase):
+    def setUp(self):
+        self.tax = SkillTaxonomy([
+            {"id": 1, "name": "JavaScript", "aliases": ["js", "java script"]},
+            {"id": 2, "name": "Java"},
+            {"id": 3, "name": "Spring"},
+            {"id": 4, "name": "Spring Boot"},
+            {"id": 5, "name": "C++"},
+            {"id": 6, "name": "Go", "aliases": ["golang"], "strict": ["go"]},
+            {"id": 7, "name": "Node.js", "aliases": ["nodejs"]},
+        ], version=1)
+
+    def test_longest_match_wins(self):
+        self.assertEqual(self.tax.find_skill_ids("Spring Boot services in Java, some Spring"), [4, 2, 3])
+
+    def test_aliases_map_to_one_id(self):
+        self.assertEqual(self.tax.find_skill_ids("JS and java script"), [1])
+        self.assertEqual(self.tax.lookup("NodeJS"), 7)
+
+    def test_symbols_stay_part_of_the_token(self):
+        self.assertEqual(self.tax.find_skill_ids("C++ and Node.js."), [5, 7])
+
+    def test_strict_forms_only_count_as_list_entries(self):
+        self.assertEqual(self.tax.find_skill_ids("Go to market, golang later"), [6])
+        self.assertEqual(self.tax.find_skill_ids("Go to market"), [])
+        self.assertEqual(self.tax.normalize_skill_list("Go, Spring Boot 3, COBOL"), ([6, 4], ['cobol']))
+
+    def test_ids_are_unique(self):
+        with self.assertRaises(ValueError):
+            SkillTaxonomy([{"id": 1, "name": "Python"}, {"id": 1, "name": "Perl"}])
+
+
+class SkillBitsTests(TestCase):
+    def test_has_all_and_overlap_counts(self):
+        M = skill_bits.bits_matrix([skill_bits.encode_skill_bits(ids) for ids in ([1, 5, 70], [5], [], [1, 70, 200])],
+                                   width=4)
+        mask = skill_bits.to_words([1, 70])
+        self.assertEqual(skill_bits.has_all(M, mask).tolist(), [True, False, False, True])
+        self.assertEqual(skill_bits.overlap_counts(M, mask).tolist(), [2, 0, 0, 2])
+        self.assertEqual(skill_bits.overlap_counts(M, skill_bits.to_words([5, 200])).tolist(), [1, 1, 0, 1])
+        # mask bits past the matrix width can't be had
+        self.assertEqual(skill_bits.has_all(M[:, :1], mask).tolist(), [False] * 4)
+        self.assertEqual(skill_bits.to_ids(M[3]), [1, 70, 200])
+
+    def test_resume_ids_with_all(self):
+        rows = []
+        for i, skills in enumerate(['python, sql', 'python', 'sql, python, docker', '']):
+            r = Resume(user=User.objects.create(username=f'u{i}'), skills=skills)
+            r.refresh_features()
+            rows.append(r)
+        ids = [r.id for r in Resume.objects.bulk_create(rows)]
+        must = skill_ids_for('python, sql')
+        self.assertEqual(sorted(skill_bits.resume_ids_with_all(must, chunk_size=2)), [ids[0], ids[2]])
+        self.assertEqual(skill_bits.resume_ids_with_all(must, qs=Resume.objects.filter(id=ids[2])), [ids[2]])
+
+    def test_job_ranking_skills_use_the_bitsets(self):
+        resume = Resume(id=1, user=User(id=1, username='c'), skills='js, basket weaving')
+        jobs = [Job(id=1, title='Frontend', skills_required='JavaScript, basket weaving, kubernetes'),
+                Job(id=2, title='Ops', skills_required='kubernetes'),
+                Job(id=3, title='Crafts', skills_required='Basket Weaving')]
+        with mock.patch('resumes.utils.matching.blend_scores', lambda emb, tfidf, skills: skills):
+            rows = rank_jobs_for_resume(resume, jobs, 'frontend work')
+        self.assertEqual({r["job_id"]: round(r["score"], 2) for r in rows}, {1: 66.67, 2: 0.0, 3: 100.0})
+
+
+class CandidateFilterTests(TestCase):
+    def setUp(self):
+        rows = []
+        for i, (skills, years) in enumerate([('python, sql', '5'), ('python', '6'), ('sql, python', '1'), ('', '9')]):
+            r = Resume(user=User.objects.create(username=f'u{i}'), skills=skills, experience=years,
+                       extracted_text='resume text')
+            r.refresh_features()
+            rows.append(r)
+        self.ids = [r.id for r in Resume.objects.bulk_create(rows)]
+
+    def test_must_have_masks_the_loaded_rows(self):
+        filters = parse_filters(QueryDict('must_have=Python,SQL&min_experience=2'))
+        with CaptureQueriesContext(connection) as ctx:
+            resumes, stats = apply_filters(filters)
+        self.assertEqual([r.id for r in resumes], [self.ids[0]])
+        self.assertEqual([(s["stage"], s["before"], s["after"]) for s in stats],
+                         [("eligible", 4, 4), ("latest", 4, 4), ("min_experience", 4, 3), ("must_have", 3, 1)])
+        # survivors never go back to the database as an id list
+        self.assertFalse(any(' IN (' in q['sql'] for q in ctx.captured_queries))
+
+
+class CanonicalResumeTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='cand')
+        self.first = Resume.objects.create(user=self.user, skills='python', extracted_text='python developer')
+        self.second = Resume.objects.create(user=self.user, skills='python, sql', extracted_text='python sql')
+
+    def _latest(self):
+        return list(Resume.objects.filter(user=self.user, is_latest=True).values_list('id', flat=True))
+
+    def test_new_upload_supersedes_the_previous_one(self):
+        self.assertEqual(self._latest(), [self.second.id])
+        self.assertEqual(self.second.superseded_ids, [self.first.id])
+
+    def test_one_latest_resume_per_user_is_enforced(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Resume.objects.filter(id=self.first.id).update(is_latest=True)
+
+    def test_deleting_the_latest_promotes_the_previous_one(self):
+        self.second.delete()
+        self.assertEqual(self._latest(), [self.first.id])
+        self.first.delete()
+        self.assertEqual(self._latest(), [])
+
+    def test_recommended_jobs_validates_limit(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        for bad in ('abc', '0', '-3'):
+            res = client.get(f'/api/resumes/{self.second.id}/recommend/', {'limit': bad})
+            self.assertEqual(res.status_code, 400, bad)
+
+    def test_history_results_are_cached_until_a_job_changes(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        job = Job.objects.create(title='Data', description='python', skills_required='python')
+        url = f'/api/resumes/{self.first.id}/recommend/'
+        row = {"job_id": job.id, "title": job.title, "company": None, "skills_required": "python", "score": 50.0}
+        with mock.patch('resumes.views.rank_jobs_for_resume', return_value=[row]) as rank:
+            for _ in range(2):
+                res = client.get(url, {'include_history': '1', 'limit': '1'})
+                self.assertEqual(res.data["recommended_jobs"], [row])
+            self.assertEqual(rank.call_count, 1)
+            job.save()
+            client.get(url, {'include_history': '1'})
+            self.assertEqual(rank.call_count, 2)
+
+
+class IngestionPipelineTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='cand')
+        self.resume = Resume.objects.create(user=self.user, extracted_text='python developer')
+
+    def _status(self):
+        self.resume.refresh_from_db()
+        return self.resume.ingest_status
+
+    def test_stages_advance_in_order_and_end_ready(self):
+        with mock.patch('resumes.tasks._enqueue') as enqueue:
+            tasks.start_ingestion(self.resume.id)
+            self.assertEqual(self._status(), ingestion.QUEUED)
+            for stage, nxt in zip(ingestion.STAGES, ingestion.STAGES[1:]):
+                tasks._advance(stage, self.resume.id)
+                self.assertEqual(self._status(), nxt)
+                self.assertIs(enqueue.call_args.args[0], tasks.INGEST_TASKS[nxt])
+            tasks._advance('rank', self.resume.id)
+        self.assertEqual(self._status(), ingestion.READY)
+        self.assertEqual(enqueue.call_count, len(ingestion.STAGES))
+
+    def test_claim_skips_stages_already_done_unless_forced(self):
+        ingestion.set_status(self.resume.id, 'index')
+        self.assertIsNone(ingestion.claim(self.resume.id, 'derive'))
+        self.assertEqual(self._status(), 'index')
+        self.assertIsNotNone(ingestion.claim(self.resume.id, 'rank'))
+        self.assertEqual(ingestion.claim(self.resume.id, 'derive', force=True).id, self.resume.id)
+        self.assertEqual(self._status(), 'derive')
+        self.assertIsNone(ingestion.claim(self.resume.id + 100, 'extract'))
+
+    def test_failed_stage_is_recorded_and_reported(self):
+        ingestion.set_status(self.resume.id, ingestion.QUEUED)
+        with mock.patch('resumes.utils.extraction_service.extract_text_from_filefield',
+                        side_effect=RuntimeError('boom')), mock.patch('resumes.tasks._enqueue') as enqueue:
+            result = tasks.ingest_extract(self.resume.id)
+        self.assertEqual(result, {"ok": False, "resume_id": self.resume.id, "stage": "extract"})
+        enqueue.assert_not_called()
+        self.assertEqual(self._status(), ingestion.FAILED)
+        self.assertEqual(self.resume.ingest_error, 'extract: boom')
+
+        ingestion.set_status(self.resume.id, ingestion.FAILED, 'index: disk full')
+        self.resume.refresh_from_db()
+        self.assertEqual([s["state"] for s in ingestion.status_for(self.resume)["stages"]],
+                         ['done', 'done', 'done', 'failed', 'pending'])
+
+    def test_status_endpoint(self):
+        ingestion.set_status(self.resume.id, 'embed')
+        client = APIClient()
+        client.force_authenticate(self.user)
+        res = client.get(f'/api/resumes/{self.resume.id}/status/')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual((res.data["status"], res.data["ready"]), ('embed', False))
+        self.assertEqual([s["state"] for s in res.data["stages"]], ['done', 'done', 'running', 'pending', 'pending'])
+
+        client.force_authenticate(User.objects.create(username='other'))
+        self.assertEqual(client.get(f'/api/resumes/{self.resume.id}/status/').status_code, 403)
+        self.assertEqual(client.get(f'/api/resumes/{self.resume.id + 100}/status/').status_code, 404)
+
+
+class ImportResumesTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = Path(self.tmp.name)
+        self.source, self.media = root / 'in', root / 'media'
+        (self.source / 'nested').mkdir(parents=True)
+        for name, raw in [('a.pdf', b'python sql'), ('b.pdf', b'java spring'), ('nested/c.pdf', b'python sql')]:
+            (self.source / name).write_bytes(raw)
+
+        def extract(raw, stats=None):
+            stats["complete"] = True
+            return raw.decode()
+
+        self.addCleanup(self.tmp.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=str(self.media)))
+        self.enterContext(mock.patch('resumes.management.commands.import_resumes.extract_document', extract))
+        self.enterContext(mock.patch('resumes.utils.ranking_store._dispatch'))
+
+    def _run(self):
+        with mock.patch('resumes.tasks.compact_tfidf_index.delay') as compact, \
+                mock.patch('resumes.tasks.embed_resumes.delay') as embed:
+            call_command('import_resumes', str(self.source), stdout=StringIO())
+        return compact, embed
+
+    def _files(self):
+        return sorted(p.name for p in self.media.rglob('*') if p.is_file())
+
+    def test_duplicates_are_skipped_and_the_indexes_queued(self):
+        compact, embed = self._run()
+        ids = sorted(Resume.objects.values_list('id', flat=True))
+        self.assertEqual(sorted(Resume.objects.values_list('extracted_text', flat=True)), ['java spring', 'python sql'])
+        self.assertEqual(self._files(), ['a.pdf', 'b.pdf'])
+        compact.assert_called_once_with()
+        self.assertEqual(sorted(embed.call_args.args[0]), ids)
+
+        # a second run finds every file already imported
+        compact, embed = self._run()
+        self.assertEqual(Resume.objects.count(), 2)
+        compact.assert_not_called()
+        embed.assert_not_called()
+
+    def test_a_chunk_that_rolls_back_leaves_no_files(self):
+        with mock.patch.object(Resume.objects, 'bulk_create', side_effect=RuntimeError('db gone')):
+            with self.assertRaises(RuntimeError):
+                self._run()
+        self.assertEqual(self._files(), [])
+        self.assertFalse(Resume.objects.exists())
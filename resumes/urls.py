@@ -17,11 +17,13 @@ urlpatterns = [
     # apply + recommend
     path('apply/', views.apply_for_job, name='apply_for_job'),
     path('<int:resume_id>/recommend/', views.recommended_jobs, name="recommended_jobs"),
+    path('<int:resume_id>/status/', views.resume_status, name="resume-status"),
 
     # shortlist
     path('shortlist/', views.shortlist_resume, name='shortlist_resume'),
     path('my-shortlists/', views.my_shortlists, name='my-shortlists'),
     path('shortlist/export/', views.shortlist_export_csv, name='shortlist-export'),
+    path('shortlist/export/<str:export_id>/', views.shortlist_export_status, name='shortlist-export-status'),
 
     # applications (web)
     path('my-applications/', views.my_applications, name="my-applications"),
@@ -32,6 +34,9 @@ urlpatterns = [
     path('recruiter/job/<int:job_id>/delete/', views.recruiter_delete_job, name='recruiter-delete-job'),
     path('recruiter/job/<int:job_id>/', views.recruiter_update_job, name='recruiter-update-job'),
 
+    # ops (staff)
+    path('ops/stats/', views.pipeline_stats, name='pipeline-stats'),
+
     # dashboards (use view functions, not lambdas — safer)
     path('dashboard/recruiter/', views.recruiter_dashboard, name='recruiter_dashboard'),
     path('dashboard/candidate/', views.candidate_dashboard, name='candidate_dashboard'),
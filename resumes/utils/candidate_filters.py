@@ -0,0 +1,189 @@
+# resumes/utils/candidate_filters.py
+"""
+Structured filters that shrink the candidate pool before any scoring.
+
+Every ranking starts from eligible_resumes(): recruiter-owned resumes and
+resumes with neither extracted text nor skills are never candidates, and
+only each user's canonical resume (Resume.is_latest, partial index) is,
+unless ?include_history=1 asks for older versions too. On top of that,
+match_resumes accepts:
+
+    ?min_experience=3          Resume.experience_years >= 3   (indexed)
+    ?location=pune             Resume.location, case-insensitive exact
+    ?uploaded_since=2025-01-01 Resume.uploaded_at >= ...       (indexed)
+    ?must_have=python,sql      every skill, via the skill bitsets
+
+The DB filters compile into one queryset that is read once; the skill
+stage is a has_all mask over the skill_bits of the rows it returned, so the
+survivors never go back to the database as an id list.
+apply_filters() reports how many candidates each stage removed, so a
+response can show where the pool went before similarity ran on the rest.
+"""
+from datetime import datetime, time as dt_time
+from typing import Dict, List, Optional, Tuple
+
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .skill_bits import bits_matrix, has_all, to_words
+from .skill_taxonomy import get_taxonomy
+
+TRUE_VALUES = ('1', 'true', 'yes', 'on')
+
+
+class FilterError(ValueError):
+    """Bad filter parameter; `detail` goes into the 400 response."""
+
+    def __init__(self, message: str, **detail):
+        super().__init__(message)
+        self.detail = dict(error=message, **detail)
+
+
+def flag(params, name) -> bool:
+    return (params.get(name) or '').strip().lower() in TRUE_VALUES
+
+
+def eligible_resumes(include_history: bool = False):
+    """
+    Resumes that can be ranked: not a recruiter's, with some text or
+    skills, and (unless include_history) the user's canonical one.
+    """
+    from resumes.models import Resume
+
+    no_text = (Q(extracted_text__isnull=True) | Q(extracted_text='')) & (Q(skills__isnull=True) | Q(skills=''))
+    qs = Resume.objects.filter(is_latest=True) if not include_history else Resume.objects.all()
+    return (qs
+            .exclude(user__profile__role__iexact='recruiter')
+            .exclude(user__is_staff=True)
+            .exclude(no_text))
+
+
+def is_eligible(resume_id) -> bool:
+    return eligible_resumes().filter(id=resume_id).exists()
+
+
+class CandidateFilters:
+    def __init__(self, min_experience: Optional[float] = None, location: Optional[str] = None,
+                 uploaded_since: Optional[datetime] = None, include_history: bool = False,
+                 must_have: Optional[List[int]] = None):
+        self.min_experience = min_experience
+        self.location = location
+        self.uploaded_since = uploaded_since
+        self.include_history = include_history
+        self.must_have = must_have or []
+
+    @property
+    def active(self) -> bool:
+        return bool(self.min_experience is not None or self.location or self.uploaded_since
+                    or self.include_history or self.must_have)
+
+    def db_stages(self):
+        """(name, queryset -> queryset) in the order they are applied."""
+        stages = []
+        if self.min_experience is not None:
+            stages.append(("min_experience", lambda qs: qs.filter(experience_years__gte=self.min_experience)))
+        if self.location:
+            stages.append(("location", lambda qs: qs.filter(location__iexact=self.location)))
+        if self.uploaded_since:
+            stages.append(("uploaded_since", lambda qs: qs.filter(uploaded_at__gte=self.uploaded_since)))
+        return stages
+
+    def describe(self) -> Dict:
+        out = {}
+        if self.min_experience is not None:
+            out["min_experience"] = self.min_experience
+        if self.location:
+            out["location"] = self.location
+        if self.uploaded_since:
+            out["uploaded_since"] = self.uploaded_since.isoformat()
+        if self.include_history:
+            out["include_history"] = True
+        if self.must_have:
+            out["must_have"] = [get_taxonomy().names[sid] for sid in self.must_have]
+        return out
+
+
+def _parse_since(value: str) -> datetime:
+    dt = parse_datetime(value)
+    if dt is None:
+        d = parse_date(value)
+        if d is None:
+            raise ValueError(value)
+        dt = datetime.combine(d, dt_time.min)
+    if timezone.is_naive(dt):
+        dt = timezone.make_aware(dt)
+    return dt
+
+
+def parse_filters(params) -> CandidateFilters:
+    """Query params -> CandidateFilters; raises FilterError on bad values."""
+    min_experience = None
+    raw = (params.get('min_experience') or '').strip()
+    if raw:
+        try:
+            min_experience = float(raw)
+        except ValueError:
+            raise FilterError("min_experience must be a number")
+        if min_experience < 0:
+            raise FilterError("min_experience must not be negative")
+
+    uploaded_since = None
+    raw = (params.get('uploaded_since') or '').strip()
+    if raw:
+        try:
+            uploaded_since = _parse_since(raw)
+        except ValueError:
+            raise FilterError("uploaded_since must be an ISO date or datetime")
+
+    must_have, unknown = get_taxonomy().normalize_skill_list(params.get('must_have', ''))
+    if unknown:
+        raise FilterError("Unknown skills in must_have", unknown=unknown)
+
+    return CandidateFilters(
+        min_experience=min_experience,
+        location=(params.get('location') or '').strip() or None,
+        uploaded_since=uploaded_since,
+        include_history=flag(params, 'include_history'),
+        must_have=must_have,
+    )
+
+
+def apply_filters(filters: CandidateFilters) -> Tuple[List, List[Dict]]:
+    """
+    Run the stages. Returns (surviving resumes in id order, user
+    select_related, stats) where stats is [{"stage", "before", "after",
+    "pruned"}, ...] in stage order.
+    """
+    from resumes.models import Resume
+
+    stats: List[Dict] = []
+
+    def record(name, before, after):
+        stats.append({"stage": name, "before": before, "after": after, "pruned": before - after})
+
+    total = Resume.objects.count()
+    qs = eligible_resumes(include_history=True)
+    count = qs.count()
+    record("eligible", total, count)
+    if not filters.include_history:
+        qs = qs.filter(is_latest=True)
+        after = qs.count()
+        record("latest", count, after)
+        count = after
+
+    for name, stage in filters.db_stages():
+        if not count:
+            break
+        qs = stage(qs)
+        after = qs.count()
+        record(name, count, after)
+        count = after
+
+    resumes = list(qs.select_related('user').order_by('id')) if count else []
+    if filters.must_have and count:
+        mask = to_words(filters.must_have)
+        keep = has_all(bits_matrix([r.skill_bits for r in resumes], mask.size), mask)
+        resumes = [r for r, k in zip(resumes, keep) if k]
+        record("must_have", count, len(resumes))
+    return resumes, stats
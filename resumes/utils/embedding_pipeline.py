@@ -0,0 +1,125 @@
+# resumes/utils/embedding_pipeline.py
+"""
+Batched embedding computation for resumes and jobs.
+
+- texts are grouped and sent to model.encode(list_of_texts) in batches
+- writes go through chunked bulk_update instead of one save() per row
+- rows whose text + model version hash (embedding_source_hash) is unchanged
+  are skipped, so a nightly re-embed only pays for rows that changed
+"""
+import hashlib
+import logging
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+MAX_EMBED_CHARS = 20000
+
+
+def resume_embedding_text(r) -> str:
+    text = getattr(r, 'extracted_text', None) or (r.skills or '')
+    return (text or '').strip()[:MAX_EMBED_CHARS]
+
+
+def job_embedding_text(job) -> str:
+    return " ".join(filter(None, [
+        getattr(job, 'title', '') or '',
+        getattr(job, 'description', '') or '',
+        getattr(job, 'skills_required', '') or '',
+    ])).strip()[:MAX_EMBED_CHARS]
+
+
+def content_hash(text: str, model_version: Optional[str]) -> str:
+    h = hashlib.sha256()
+    h.update((model_version or '').encode('utf-8'))
+    h.update(b'\0')
+    h.update(text.encode('utf-8', 'ignore'))
+    return h.hexdigest()
+
+
+def encode_batch(model, texts: List[str], batch_size: int):
+    """One model.encode call for the whole list (sentence-transformers style)."""
+    try:
+        return model.encode(texts, batch_size=batch_size, convert_to_numpy=True, show_progress_bar=False)
+    except TypeError:
+        # simpler encoders may not take the keyword arguments
+        return model.encode(texts)
+
+
+def embed_objects(objects: Iterable[Any],
+                  model,
+                  model_version: str,
+                  text_fn: Callable[[Any], str],
+                  batch_size: Optional[int] = None,
+                  write_chunk: Optional[int] = None,
+                  force: bool = False,
+                  on_progress: Optional[Callable[[Dict[str, int]], None]] = None) -> Dict[str, Any]:
+    """
+    Embed Resume or Job instances in batches and persist them.
+
+    Returns stats: {seen, no_text, unchanged, updated, failed, updated_ids}.
+    """
+    batch_size = batch_size or getattr(settings, 'EMBEDDING_BATCH_SIZE', 64)
+    write_chunk = write_chunk or getattr(settings, 'EMBEDDING_WRITE_CHUNK', 500)
+    stats = {"seen": 0, "no_text": 0, "unchanged": 0, "updated": 0, "failed": 0, "updated_ids": []}
+
+    pending: List[Any] = []
+    texts: List[str] = []
+    hashes: List[str] = []
+    to_write: List[Any] = []
+    model_cls = None
+
+    def flush_writes(force_all=False):
+        nonlocal to_write
+        if to_write and (force_all or len(to_write) >= write_chunk):
+            model_cls.objects.bulk_update(
+                to_write, ['embedding_vec', 'embedding_model_version', 'embedding_source_hash'],
+                batch_size=write_chunk,
+            )
+            stats["updated"] += len(to_write)
+            stats["updated_ids"].extend(o.pk for o in to_write)
+            to_write = []
+
+    def flush_encode():
+        nonlocal pending, texts, hashes
+        if not pending:
+            return
+        try:
+            vectors = encode_batch(model, texts, batch_size)
+        except Exception:
+            logger.exception("embedding batch of %d failed", len(pending))
+            stats["failed"] += len(pending)
+            vectors = None
+        if vectors is not None:
+            for obj, vec, h in zip(pending, vectors, hashes):
+                obj.set_embedding(vec, model_version)
+                obj.embedding_source_hash = h
+                to_write.append(obj)
+        pending, texts, hashes = [], [], []
+        flush_writes()
+        if on_progress:
+            on_progress(stats)
+
+    for obj in objects:
+        model_cls = model_cls or type(obj)
+        stats["seen"] += 1
+        text = text_fn(obj)
+        if not text:
+            stats["no_text"] += 1
+            continue
+        h = content_hash(text, model_version)
+        if not force and obj.embedding_source_hash == h and obj.embedding_vec is not None:
+            stats["unchanged"] += 1
+            continue
+        pending.append(obj)
+        texts.append(text)
+        hashes.append(h)
+        if len(pending) >= batch_size:
+            flush_encode()
+
+    flush_encode()
+    if model_cls is not None:
+        flush_writes(force_all=True)
+    return stats
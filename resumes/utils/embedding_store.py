@@ -0,0 +1,154 @@
+# resumes/utils/embedding_store.py
+"""
+Compact binary storage for Resume/Job embeddings.
+
+Blob layout (little endian), stored in the `embedding_vec` BinaryField:
+
+    magic    4s   b'EMB1'
+    dtype    B    1 = float32, 2 = float16, 3 = int8 (symmetric, per-row scale)
+    vlen     B    length of the model version string
+    dim      I    vector dimension
+    scale    f    int8 dequantization scale (1.0 otherwise)
+    version  vlen bytes, utf-8
+    padding  up to an 8 byte boundary
+    payload  dim * itemsize bytes
+
+Decoding is zero-copy (np.frombuffer). load_embedding_matrix() stacks many
+rows into one contiguous float32 block for bulk similarity.
+"""
+import struct
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from django.conf import settings
+
+MAGIC = b'EMB1'
+_HEADER = struct.Struct('<4sBBIf')
+
+DTYPES = {
+    'float32': (1, np.dtype('<f4')),
+    'float16': (2, np.dtype('<f2')),
+    'int8': (3, np.dtype('i1')),
+}
+_CODE_TO_DTYPE = {code: (name, dt) for name, (code, dt) in DTYPES.items()}
+
+
+class EmbeddingFormatError(ValueError):
+    pass
+
+
+def _header_size(vlen: int) -> int:
+    raw = _HEADER.size + vlen
+    return (raw + 7) & ~7
+
+
+def encode_embedding(vector, model_version: Optional[str] = None, dtype: Optional[str] = None) -> bytes:
+    """Vector (list / ndarray) -> blob. dtype defaults to settings.EMBEDDING_STORAGE_DTYPE."""
+    dtype = dtype or getattr(settings, 'EMBEDDING_STORAGE_DTYPE', 'float32')
+    if dtype not in DTYPES:
+        raise EmbeddingFormatError(f"unsupported embedding dtype {dtype!r}")
+    code, dt = DTYPES[dtype]
+    v = np.asarray(vector, dtype=np.float32).ravel()
+    scale = 1.0
+    if dtype == 'int8':
+        peak = float(np.abs(v).max()) if v.size else 0.0
+        scale = peak / 127.0 if peak else 1.0
+        payload = np.clip(np.rint(v / scale), -127, 127).astype(dt)
+    else:
+        payload = v.astype(dt)
+    version = (model_version or '').encode('utf-8')[:255]
+    header = _HEADER.pack(MAGIC, code, len(version), v.size, scale) + version
+    header += b'\0' * (_header_size(len(version)) - len(header))
+    return header + payload.tobytes()
+
+
+def read_header(blob) -> dict:
+    mv = memoryview(blob)
+    if len(mv) < _HEADER.size:
+        raise EmbeddingFormatError("embedding blob too short")
+    magic, code, vlen, dim, scale = _HEADER.unpack_from(mv, 0)
+    if magic != MAGIC or code not in _CODE_TO_DTYPE:
+        raise EmbeddingFormatError("not an embedding blob")
+    name, dt = _CODE_TO_DTYPE[code]
+    version = bytes(mv[_HEADER.size:_HEADER.size + vlen]).decode('utf-8', 'ignore')
+    return {
+        'dtype': name,
+        'np_dtype': dt,
+        'dim': dim,
+        'scale': scale,
+        'model_version': version or None,
+        'offset': _header_size(vlen),
+    }
+
+
+def decode_embedding(blob) -> Optional[np.ndarray]:
+    """
+    Blob -> 1-d vector. float32 blobs come back as a read-only view over the
+    blob (no copy); float16 / int8 are widened to float32.
+    """
+    if blob is None:
+        return None
+    h = read_header(blob)
+    raw = np.frombuffer(blob, dtype=h['np_dtype'], count=h['dim'], offset=h['offset'])
+    if h['dtype'] == 'float32':
+        return raw
+    out = raw.astype(np.float32)
+    if h['dtype'] == 'int8':
+        out *= h['scale']
+    return out
+
+
+def load_embedding_matrix(rows: Iterable[Tuple[int, Optional[bytes]]],
+                          dim: Optional[int] = None) -> Tuple[List[int], np.ndarray]:
+    """
+    (id, blob) rows -> (ids, float32 matrix of shape (n, dim)).
+
+    Payloads are copied once into one buffer and viewed with a single
+    np.frombuffer per dtype, instead of materializing a Python list per row.
+    Rows with no blob or a different dimension are skipped.
+    """
+    groups = {}
+    for pk, blob in rows:
+        if blob is None:
+            continue
+        try:
+            h = read_header(blob)
+        except EmbeddingFormatError:
+            continue
+        if dim is None:
+            dim = h['dim']
+        if h['dim'] != dim:
+            continue
+        g = groups.setdefault(h['dtype'], ([], bytearray(), []))
+        g[0].append(pk)
+        g[1].extend(memoryview(blob)[h['offset']:h['offset'] + dim * h['np_dtype'].itemsize])
+        g[2].append(h['scale'])
+
+    if not groups:
+        return [], np.zeros((0, dim or 0), dtype=np.float32)
+
+    ids: List[int] = []
+    blocks = []
+    for name, (pks, payload, scales) in groups.items():
+        dt = DTYPES[name][1]
+        block = np.frombuffer(payload, dtype=dt).reshape(len(pks), dim)
+        if name == 'int8':
+            block = block.astype(np.float32) * np.asarray(scales, dtype=np.float32)[:, None]
+        elif name != 'float32':
+            block = block.astype(np.float32)
+        ids.extend(pks)
+        blocks.append(block)
+    matrix = blocks[0] if len(blocks) == 1 else np.vstack(blocks)
+    return ids, matrix
+
+
+def load_embeddings_for(model, model_version: Optional[str] = None,
+                        ids: Optional[Sequence[int]] = None,
+                        dim: Optional[int] = None) -> Tuple[List[int], np.ndarray]:
+    """Bulk-read embeddings for a model class (Resume / Job) as one matrix."""
+    qs = model.objects.filter(embedding_vec__isnull=False)
+    if model_version is not None:
+        qs = qs.filter(embedding_model_version=model_version)
+    if ids is not None:
+        qs = qs.filter(id__in=list(ids))
+    return load_embedding_matrix(qs.values_list('id', 'embedding_vec').iterator(chunk_size=2000), dim=dim)
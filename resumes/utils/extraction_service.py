@@ -0,0 +1,319 @@
+# resumes/utils/extraction_service.py
+"""
+Process-pool PDF extraction service.
+
+PDF parsing is CPU-bound, so it runs in a pool of worker processes rather
+than in the calling thread:
+
+- the PDF is sniffed once in the caller and routed to one extractor
+  (extractor_planner); its attempts feed the planner's stats
+- a document is split into chunks of PDF_EXTRACT_PAGES_PER_TASK pages that
+  are parsed in parallel inside the workers
+- iter_pages() yields page text in page order as chunks finish
+- each document gets a wall-clock budget (PDF_EXTRACT_TIMEOUT). A stuck
+  parser can only be stopped by killing its process, so on overrun the pool
+  is torn down and rebuilt; pages finished so far are kept. Other documents
+  in flight on that pool (concurrent requests, import_resumes --workers)
+  see it go away and resubmit their unfinished chunks to the new pool
+  within their own budget, instead of failing as partial
+- workers run under an address-space limit (PDF_EXTRACT_MAX_MEMORY_MB above
+  their baseline), so a pathological PDF raises MemoryError in the worker
+  instead of growing the host, and are recycled after about
+  PDF_EXTRACT_MAX_TASKS_PER_CHILD tasks each: the whole pool is replaced,
+  the old one finishing what it was given (ProcessPoolExecutor's own
+  max_tasks_per_child deadlocks once workers retire on Python 3.11)
+
+Scanned PDFs (PDF_OCR_ENABLED) are OCR'd here only: one page per task,
+at most PDF_OCR_MAX_PAGES pages, under PDF_OCR_TIMEOUT, and pages not yet
+started are cancelled once PDF_OCR_MIN_CHARS characters are in, which is
+plenty for scoring.
+
+PDF_EXTRACT_WORKERS=0 (or a process that may not fork children, e.g. a
+daemonic Celery prefork child) falls back to extracting inline.
+"""
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import CancelledError, ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import Iterator, Optional, Tuple
+
+from django.conf import settings
+
+from . import text_cache
+from .extractor_planner import plan_extractors, record_attempts, run_plan, sniff_pdf
+from .pdf_extract import extraction_version, ocr_options, read_file_bytes
+
+logger = logging.getLogger(__name__)
+
+_pool = None
+_pool_lock = threading.Lock()
+_pool_unavailable = False
+# bumped whenever the pool is dropped: futures submitted under an older
+# generation were cancelled or killed with it, through no fault of their own
+_pool_generation = 0
+_pool_tasks = 0
+
+
+def _limit_memory(extra_mb: int):
+    try:
+        import resource
+        with open('/proc/self/statm') as f:
+            baseline = int(f.read().split()[0]) * os.sysconf('SC_PAGE_SIZE')
+        limit = baseline + extra_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except Exception:
+        # no /proc or no resource module (Windows): run unlimited
+        pass
+
+
+def _worker_init(max_memory_mb: int):
+    if max_memory_mb:
+        _limit_memory(max_memory_mb)
+
+
+def _extract_chunk(raw_bytes: bytes, page_numbers, plan, options=None):
+    """
+    Runs in a pool worker. page_numbers=None means the whole document.
+    Returns (page_texts, attempts); page_texts is None after a MemoryError.
+    """
+    try:
+        texts, attempts = run_plan(raw_bytes, plan, page_numbers, options)
+        return (texts or None), attempts
+    except MemoryError:
+        return None, [{"extractor": plan[0], "seconds": 0.0, "pages": len(page_numbers or [0]), "ok": False}]
+
+
+def _workers() -> int:
+    return int(getattr(settings, 'PDF_EXTRACT_WORKERS', 2))
+
+
+def get_pool() -> Optional[ProcessPoolExecutor]:
+    global _pool, _pool_tasks
+    if _pool is not None or _pool_unavailable or _workers() <= 0:
+        return _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=_workers(),
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_worker_init,
+                initargs=(getattr(settings, 'PDF_EXTRACT_MAX_MEMORY_MB', 768),),
+            )
+            _pool_tasks = 0
+    return _pool
+
+
+def _count_tasks(pool, n: int):
+    """Retire `pool` once it has been given PDF_EXTRACT_MAX_TASKS_PER_CHILD tasks per worker."""
+    global _pool, _pool_tasks
+    per_child = getattr(settings, 'PDF_EXTRACT_MAX_TASKS_PER_CHILD', 50)
+    if not per_child:
+        return
+    with _pool_lock:
+        if _pool is not pool:
+            return
+        _pool_tasks += n
+        if _pool_tasks < per_child * _workers():
+            return
+        _pool = None
+    # queued work still runs; the next submit starts a fresh pool
+    pool.shutdown(wait=False)
+
+
+def reset_pool(kill: bool = False):
+    """Drop the pool; kill=True terminates its workers (used on timeouts)."""
+    global _pool, _pool_generation
+    with _pool_lock:
+        pool, _pool = _pool, None
+        _pool_generation += 1
+    if pool is None:
+        return
+    if kill:
+        for proc in list((getattr(pool, '_processes', None) or {}).values()):
+            try:
+                proc.terminate()
+            except Exception:
+                pass
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _chunks(n_pages: int, per_task: int):
+    if n_pages <= 0:
+        return [None]
+    return [list(range(i, min(i + per_task, n_pages))) for i in range(0, n_pages, per_task)]
+
+
+def _submit(raw_bytes: bytes, chunks, indices, plan, options):
+    """
+    ({future: chunk index}, pool generation) for chunks[i], i in indices;
+    ({}, None) when no pool can be used. A pool dropped between get_pool()
+    and submit (another document's timeout) is replaced once.
+    """
+    global _pool_unavailable
+    for attempt in range(2):
+        generation = _pool_generation
+        pool = get_pool()
+        if pool is None:
+            return {}, None
+        try:
+            futures = {pool.submit(_extract_chunk, raw_bytes, chunks[i], plan, options): i for i in indices}
+            _count_tasks(pool, len(futures))
+            return futures, generation
+        except (AssertionError, OSError, RuntimeError) as e:
+            if attempt == 0 and _pool_generation != generation:
+                continue
+            # e.g. "daemonic processes are not allowed to have children"
+            logger.warning("PDF extraction pool unavailable, extracting inline: %s", e)
+            _pool_unavailable = True
+            reset_pool()
+            return {}, None
+    return {}, None
+
+
+def _iter_inline(raw_bytes: bytes, chunks, plan, options, profile: dict, stats: dict, stop_after_chars=None):
+    found = 0
+    for chunk in chunks:
+        texts, attempts = _extract_chunk(raw_bytes, chunk, plan, options)
+        record_attempts(profile, attempts)
+        for pno, text in zip(chunk or [0], texts or [""] * len(chunk or [0])):
+            found += len(text.strip())
+            yield pno, text
+        stats["chunks_done"] += 1
+        if stop_after_chars and found >= stop_after_chars:
+            stats["early_stop"] = True
+            return
+
+
+def iter_pages(raw_bytes: bytes, timeout: Optional[float] = None,
+               stats: Optional[dict] = None) -> Iterator[Tuple[int, str]]:
+    """
+    Yield (page_number, text) in page order as the pool finishes each chunk.
+    `stats` (optional dict) is filled with pages / plan / chunks /
+    chunks_done / complete / early_stop / seconds.
+    """
+    stats = stats if stats is not None else {}
+    started = time.monotonic()
+    profile = sniff_pdf(raw_bytes)
+    plan = plan_extractors(profile)
+    stats.update(pages=profile["pages"], plan=plan, chunks=0, chunks_done=0, complete=False, early_stop=False)
+    if not plan:
+        # encrypted, or image-only with OCR disabled: nothing to extract
+        stats.update(complete=True, seconds=round(time.monotonic() - started, 3))
+        return
+
+    options = None
+    stop_after_chars = None
+    n_pages = profile["pages"]
+    if plan[0] == "ocr":
+        # page by page so early stop can cancel pages that haven't started
+        limits = ocr_options()
+        options = {"ocr": dict(limits, max_pages=None, stop_after_chars=None)}
+        stop_after_chars = limits["stop_after_chars"]
+        n_pages = min(n_pages, limits["max_pages"] or n_pages)
+        per_task = 1
+        timeout = timeout or getattr(settings, 'PDF_OCR_TIMEOUT', 120)
+    else:
+        if "ocr" in plan:
+            options = {"ocr": ocr_options()}
+        per_task = max(1, int(getattr(settings, 'PDF_EXTRACT_PAGES_PER_TASK', 4)))
+        timeout = timeout or getattr(settings, 'PDF_EXTRACT_TIMEOUT', 60)
+    chunks = _chunks(n_pages, per_task)
+    stats["chunks"] = len(chunks)
+
+    futures, generation = _submit(raw_bytes, chunks, range(len(chunks)), plan, options)
+    if not futures:
+        yield from _iter_inline(raw_bytes, chunks, plan, options, profile, stats, stop_after_chars)
+        stats.update(complete=True, seconds=round(time.monotonic() - started, 3))
+        return
+
+    deadline = started + timeout
+    finished = {}
+    next_i = 0
+    found = 0
+    try:
+        while True:
+            try:
+                for fut in as_completed(futures, timeout=max(0.0, deadline - time.monotonic())):
+                    finished[futures[fut]] = fut
+                    while next_i in finished:
+                        chunk = chunks[next_i]
+                        try:
+                            texts, attempts = finished.pop(next_i).result()
+                            record_attempts(profile, attempts)
+                        except (BrokenProcessPool, CancelledError):
+                            raise
+                        except Exception:
+                            logger.exception("PDF chunk %s failed", chunk)
+                            texts = None
+                        if texts is None:
+                            texts = [""] * len(chunk or [0])
+                        for pno, text in zip(chunk or [0], texts):
+                            found += len(text.strip())
+                            yield pno, text
+                        next_i += 1
+                        stats["chunks_done"] = next_i
+                    if stop_after_chars and found >= stop_after_chars:
+                        # enough text to score; pages still queued are dropped
+                        for f in futures:
+                            f.cancel()
+                        stats["early_stop"] = True
+                        break
+                stats["complete"] = True
+                break
+            except (BrokenProcessPool, CancelledError):
+                if _pool_generation == generation:
+                    raise BrokenProcessPool("PDF extraction worker died")
+                # dropped for another document: pages already yielded stand, redo the rest
+                logger.info("PDF extraction pool was restarted elsewhere; resubmitting %d/%d chunks",
+                            len(chunks) - next_i, len(chunks))
+                finished = {}
+                futures, generation = _submit(raw_bytes, chunks, range(next_i, len(chunks)), plan, options)
+                if not futures:
+                    yield from _iter_inline(raw_bytes, chunks[next_i:], plan, options, profile, stats,
+                                            stop_after_chars and max(1, stop_after_chars - found))
+                    stats["complete"] = True
+                    break
+    except TimeoutError:
+        logger.warning("PDF extraction exceeded %ss (%d/%d chunks done); restarting pool",
+                       timeout, next_i, len(chunks))
+        record_attempts(profile, [{"extractor": plan[0], "seconds": float(timeout),
+                                   "pages": max(1, profile["pages"]), "ok": False}])
+        reset_pool(kill=True)
+    except BrokenProcessPool:
+        logger.warning("PDF extraction worker died (%d/%d chunks done); restarting pool", next_i, len(chunks))
+        reset_pool()
+    finally:
+        stats["seconds"] = round(time.monotonic() - started, 3)
+
+
+def extract_document(raw_bytes: bytes, timeout: Optional[float] = None, stats: Optional[dict] = None) -> str:
+    """
+    Full text of a PDF via the pool; complete results go to the text cache.
+    `stats` (optional dict) is filled as in iter_pages (a cache hit sets complete).
+    """
+    stats = stats if stats is not None else {}
+    if not raw_bytes:
+        stats["complete"] = True
+        return ""
+    key = text_cache.cache_key(text_cache.file_digest(raw_bytes), extraction_version())
+    cached = text_cache.lookup(key)
+    if cached is not None:
+        stats.update(complete=True, cached=True)
+        return cached
+
+    text = "\n".join(t for _, t in iter_pages(raw_bytes, timeout=timeout, stats=stats))
+    if not text.strip():
+        text = ""
+    if stats.get("complete"):
+        text_cache.store(key, text)
+    else:
+        logger.warning("partial extraction: %s", stats)
+    return text
+
+
+def extract_text_from_filefield(file_field, timeout: Optional[float] = None) -> str:
+    """Pool-backed counterpart of pdf_extract.extract_text_from_filefield."""
+    return extract_document(read_file_bytes(file_field), timeout=timeout)
@@ -0,0 +1,252 @@
+# resumes/utils/extractor_planner.py
+"""
+Pick one PDF extractor per document instead of running a fallback chain.
+
+sniff_pdf() opens the PDF once (PyPDF2 xref only, no layout analysis) and
+reports page count, encryption, producer and whether the sampled pages
+carry fonts (a text layer) or only images. plan_extractors() turns that
+profile into an ordered plan:
+
+- no text layer, only images  -> ["ocr"] when PDF_OCR_ENABLED, else nothing
+- encrypted and not openable  -> nothing
+- text layer                  -> the cheapest *suitable* text extractor,
+                                 with one runner-up as a safety net
+
+Suitability and cost come from latency / success stats recorded per
+extractor and per producer family ("microsoft", "pdftex", ...), so the
+routing adapts to what the uploads actually look like. The counters live
+in the Django cache (cache.incr), so every worker routes on the same
+totals and they survive restarts as long as the cache does. Until an
+extractor has PDF_PLANNER_MIN_SAMPLES observations the original preference
+order is used (PDF_EXTRACTOR_PREFERENCE), and a small fraction of documents
+(PDF_PLANNER_EXPLORE) go to the runner-up so every extractor keeps
+getting measured. planner_stats() is served by the staff stats endpoint
+(views.pipeline_stats).
+"""
+import io
+import logging
+import random
+import re
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .pdf_extract import EXTRACTORS
+
+logger = logging.getLogger(__name__)
+
+TEXT_EXTRACTORS = ("pdfminer", "pdfplumber", "pypdf2")
+
+# a run "succeeded" when it averages at least this many characters per page
+MIN_CHARS_PER_PAGE = 20
+
+STATS_KEY = "pdf_planner:{}:{}:{}"      # extractor, family, field
+FAMILIES_KEY = "pdf_planner:families"
+STAT_FIELDS = ("runs", "ok", "ms", "pages")
+
+
+def producer_family(producer: str) -> str:
+    m = re.search(r'[a-z]+', (producer or '').lower())
+    return m.group(0) if m else "unknown"
+
+
+def sniff_pdf(raw_bytes: bytes, sample_pages: int = 3) -> dict:
+    """
+    One cheap pass over the PDF structure. text_layer is None when the file
+    couldn't be opened by PyPDF2 (then every text extractor is worth a try).
+    """
+    profile = {
+        "pages": 0, "encrypted": False, "readable": False, "producer": "",
+        "family": "unknown", "text_layer": None, "images": False, "bytes": len(raw_bytes or b''),
+    }
+    try:
+        import PyPDF2
+        reader = PyPDF2.PdfReader(io.BytesIO(raw_bytes))
+        if reader.is_encrypted:
+            profile["encrypted"] = True
+            if not reader.decrypt(""):
+                return profile
+        profile["pages"] = len(reader.pages)
+        meta = reader.metadata or {}
+        producer = str(meta.get('/Producer') or meta.get('/Creator') or '')
+        profile["producer"] = producer
+        profile["family"] = producer_family(producer)
+
+        fonts = images = False
+        for page in list(reader.pages)[:sample_pages]:
+            res = page.get('/Resources')
+            res = res.get_object() if res is not None else {}
+            if res.get('/Font'):
+                fonts = True
+            xobjects = res.get('/XObject')
+            for xo in (xobjects.get_object().values() if xobjects is not None else []):
+                subtype = xo.get_object().get('/Subtype')
+                if subtype == '/Image':
+                    images = True
+                elif subtype == '/Form':
+                    # form xobjects can carry their own text
+                    fonts = True
+        profile.update(readable=True, text_layer=fonts, images=images)
+    except Exception:
+        logger.debug("PDF sniff failed", exc_info=True)
+    return profile
+
+
+def _load_stats(keys: Sequence[Tuple[str, str]]) -> Dict[Tuple[str, str], dict]:
+    """{(extractor, family): {runs, ok, ms, pages}} from the cache; absent pairs are left out."""
+    names = {STATS_KEY.format(n, f, field): (n, f, field) for n, f in keys for field in STAT_FIELDS}
+    try:
+        found = cache.get_many(list(names))
+    except Exception:
+        logger.warning("planner stats unavailable", exc_info=True)
+        return {}
+    out: Dict[Tuple[str, str], dict] = {}
+    for key, value in found.items():
+        n, f, field = names[key]
+        out.setdefault((n, f), dict.fromkeys(STAT_FIELDS, 0))[field] = int(value)
+    return out
+
+
+def _summaries(names: Sequence[str], family: str) -> Dict[str, Optional[dict]]:
+    """Per extractor, its stats for this producer family, else across all families; None until measured."""
+    min_samples = getattr(settings, 'PDF_PLANNER_MIN_SAMPLES', 5)
+    stats = _load_stats([(n, f) for n in names for f in (family, "*")])
+    out: Dict[str, Optional[dict]] = {}
+    for name in names:
+        out[name] = None
+        for key in ((name, family), (name, "*")):
+            s = stats.get(key)
+            if s and s["runs"] >= min_samples:
+                out[name] = {
+                    "success_rate": s["ok"] / s["runs"],
+                    "seconds_per_page": s["ms"] / 1000.0 / max(1, s["pages"]),
+                }
+                break
+    return out
+
+
+def _available(names: Sequence[str]) -> List[str]:
+    return [n for n in names if EXTRACTORS.get(n) is not None]
+
+
+def plan_extractors(profile: dict, allow_ocr: bool = True) -> List[str]:
+    """Ordered extractor names for this document (first = the one to run)."""
+    if profile.get("encrypted") and not profile.get("readable"):
+        return []
+    ocr_on = allow_ocr and getattr(settings, 'PDF_OCR_ENABLED', False) and EXTRACTORS.get("ocr")
+    ocr = ["ocr"] if ocr_on else []
+    if profile.get("text_layer") is False:
+        return ocr if profile.get("images") else []
+
+    preference = _available(getattr(settings, 'PDF_EXTRACTOR_PREFERENCE', TEXT_EXTRACTORS))
+    if profile.get("text_layer") is None:
+        # couldn't sniff: fall back to the full chain
+        return preference + ocr
+    if not preference:
+        return ocr
+
+    threshold = getattr(settings, 'PDF_PLANNER_MIN_SUCCESS', 0.8)
+    measured = _summaries(preference, profile.get("family", "unknown"))
+    if all(measured.values()):
+        suitable = [n for n in preference if measured[n]["success_rate"] >= threshold] or preference
+        ranked = sorted(suitable, key=lambda n: (measured[n]["seconds_per_page"], preference.index(n)))
+        ranked += [n for n in preference if n not in ranked]
+    else:
+        ranked = list(preference)
+
+    if len(ranked) > 1 and random.random() < getattr(settings, 'PDF_PLANNER_EXPLORE', 0.05):
+        ranked[0], ranked[1] = ranked[1], ranked[0]
+    return ranked[:2]
+
+
+def run_plan(raw_bytes: bytes, plan: Sequence[str], page_numbers=None,
+             options: Optional[dict] = None) -> Tuple[List[str], List[dict]]:
+    """
+    Run the plan's first extractor; the next one only runs when the previous
+    one failed or produced no text. `options` maps extractor name -> kwargs
+    (e.g. {"ocr": ocr_options()}). Returns (page_texts, attempts) where each
+    attempt is {extractor, seconds, pages, ok}. Doesn't touch settings, so
+    it's safe to call in pool workers.
+    """
+    attempts = []
+    for name in plan:
+        fn = EXTRACTORS.get(name)
+        if fn is None:
+            continue
+        started = time.monotonic()
+        try:
+            texts = fn(raw_bytes, page_numbers, **(options or {}).get(name, {}))
+        except Exception:
+            logger.exception("%s extraction failed", name)
+            texts = None
+        chars = sum(len(t.strip()) for t in texts) if texts else 0
+        n_pages = len(texts) if texts else len(page_numbers or [0])
+        attempts.append({
+            "extractor": name,
+            "seconds": time.monotonic() - started,
+            "pages": max(1, n_pages),
+            "ok": chars >= MIN_CHARS_PER_PAGE * max(1, n_pages),
+        })
+        if texts and chars:
+            return texts, attempts
+    return [], attempts
+
+
+def _incr(key: str, delta: int):
+    if cache.add(key, delta, None):
+        return
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        # evicted between add() and incr()
+        cache.set(key, delta, None)
+
+
+def record_attempts(profile: dict, attempts: Sequence[dict]):
+    if not attempts:
+        return
+    family = profile.get("family", "unknown")
+    deltas: Dict[Tuple[str, str], Dict[str, int]] = {}
+    for a in attempts:
+        for key in ((a["extractor"], family), (a["extractor"], "*")):
+            d = deltas.setdefault(key, dict.fromkeys(STAT_FIELDS, 0))
+            d["runs"] += 1
+            d["ok"] += int(a["ok"])
+            d["ms"] += int(round(a["seconds"] * 1000))
+            d["pages"] += a["pages"]
+    try:
+        for (name, fam), d in deltas.items():
+            for field, value in d.items():
+                _incr(STATS_KEY.format(name, fam, field), value)
+        families = cache.get(FAMILIES_KEY) or []
+        if family not in families:
+            # only used to list families in planner_stats(); a lost race drops one from the report
+            cache.set(FAMILIES_KEY, families + [family], None)
+    except Exception:
+        logger.warning("planner stats not recorded", exc_info=True)
+
+
+def extract_planned(raw_bytes: bytes) -> str:
+    """Sniff, plan, extract, record. Whole document, in the calling process, no OCR."""
+    profile = sniff_pdf(raw_bytes)
+    plan = plan_extractors(profile, allow_ocr=False)
+    texts, attempts = run_plan(raw_bytes, plan)
+    record_attempts(profile, attempts)
+    text = "\n".join(texts)
+    return text if text.strip() else ""
+
+
+def planner_stats() -> dict:
+    """{extractor: {family: {runs, ok, success_rate, seconds_per_page}}}; "*" is every family."""
+    families = ["*"] + list(cache.get(FAMILIES_KEY) or [])
+    out: Dict[str, dict] = {}
+    for (name, family), s in _load_stats([(n, f) for n in EXTRACTORS for f in families]).items():
+        out.setdefault(name, {})[family] = {
+            "runs": s["runs"],
+            "ok": s["ok"],
+            "success_rate": round(s["ok"] / s["runs"], 4) if s["runs"] else None,
+            "seconds_per_page": round(s["ms"] / 1000.0 / max(1, s["pages"]), 4),
+        }
+    return out
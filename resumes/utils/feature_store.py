@@ -0,0 +1,325 @@
+# resumes/utils/feature_store.py
+"""
+Pre-tokenized per-document features for Resume / Job.
+
+Every scorer used to re-normalize and re-tokenize both texts (regex and
+all) for every job x resume pair. Now each document is tokenized once,
+when its text changes, into a Features record stored in `features_blob`
+(see FeaturesMixin in models.py). Scorers only do array / set operations
+on it:
+
+    tok_ids, tok_counts      word tokens (tokenize()), for TF-IDF cosine
+    kw_ids                   normalized keyword terms (stopwords dropped)
+    ngram_ids, ngram_counts  keyword unigrams + adjacent bigrams
+    skill_ids                skills from the comma separated skills field,
+                             as taxonomy ids where known (skill_columns)
+    experience               years (parsed from free text for resumes)
+
+Terms are stored as 64-bit hashes (token_id), so no vocabulary table is
+needed and ids agree across processes. Id arrays are sorted and unique.
+
+Blob layout (little endian), 8-byte aligned:
+
+    magic       4s   b'FEA1'
+    version     B    FEATURES_VERSION
+    pad         3x
+    experience  f    NaN = unknown
+    sizes       6I   tok, ngram, kw, skill, tok_counts, ngram_counts
+    pad         4x
+    payload     uint64 id arrays, then uint32 count arrays
+
+features_source_hash (sha256 of FEATURES_VERSION, the skill taxonomy
+version and the inputs) tells
+whether the stored record is current; bump FEATURES_VERSION whenever
+tokenization changes and run `manage.py rebuild_features`.
+"""
+import hashlib
+import math
+import re
+import struct
+from functools import lru_cache
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+FEATURES_VERSION = 2
+MAGIC = b'FEA1'
+_HEADER = struct.Struct('<4sB3xf6I4x')
+
+STOPWORDS = {
+    'and', 'or', 'the', 'a', 'an', 'of', 'in', 'on', 'for', 'to', 'with', 'by', 'as',
+    'is', 'are', 'be', 'this', 'that', 'from', 'at', 'it', 'you', 'your', 'we', 'our'
+}
+
+_word_re = re.compile(r"[A-Za-z0-9_]+")
+_norm_re = re.compile(r'[^a-z0-9\+\# ]+')
+_space_re = re.compile(r'\s+')
+_years_re = re.compile(r'(\d+(?:\.\d+)?)\s*\+?\s*(?:years|yrs)', re.IGNORECASE)
+
+_EMPTY_IDS = np.zeros(0, dtype=np.uint64)
+_EMPTY_COUNTS = np.zeros(0, dtype=np.uint32)
+
+
+class FeaturesFormatError(ValueError):
+    pass
+
+
+# -------------------- tokenization (write time only) --------------------
+def tokenize(text: str) -> List[str]:
+    return [w.lower() for w in _word_re.findall(text or "")]
+
+
+def split_skills(skills: Optional[str]) -> List[str]:
+    """Comma separated skills string -> unique, lower-cased, order preserved."""
+    out = []
+    seen = set()
+    for s in (skills or "").lower().split(","):
+        s = s.strip()
+        if s and s not in seen:
+            seen.add(s)
+            out.append(s)
+    return out
+
+
+def normalize(text: str) -> str:
+    """Lower-case, keep letters / digits / + / #, collapse whitespace."""
+    if not text:
+        return ""
+    return _space_re.sub(' ', _norm_re.sub(' ', str(text).lower())).strip()
+
+
+def keyword_terms(text: str) -> List[str]:
+    """Normalized tokens without stopwords and single characters, in order."""
+    return [t for t in normalize(text).split() if len(t) > 1 and t not in STOPWORDS]
+
+
+def parse_years(value) -> Optional[float]:
+    """Years of experience from a number or free text ("Developer ... 3 years"); largest figure wins."""
+    if value is None or value == '':
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        found = [float(x) for x in _years_re.findall(str(value))]
+        return max(found) if found else None
+
+
+@lru_cache(maxsize=65536)
+def token_id(term: str) -> int:
+    return int.from_bytes(hashlib.blake2b(term.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def _counted_ids(terms: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    if not terms:
+        return _EMPTY_IDS, _EMPTY_COUNTS
+    ids = np.fromiter((token_id(t) for t in terms), dtype=np.uint64, count=len(terms))
+    uniq, counts = np.unique(ids, return_counts=True)
+    return uniq, counts.astype(np.uint32)
+
+
+def id_array(terms: Sequence[str]) -> np.ndarray:
+    """Sorted unique ids for a list of terms."""
+    return _counted_ids(terms)[0]
+
+
+# -------------------- record --------------------
+class Features:
+    __slots__ = ('tok_ids', 'tok_counts', 'ngram_ids', 'ngram_counts', 'kw_ids', 'skill_ids', 'experience')
+
+    def __init__(self, tok_ids=_EMPTY_IDS, tok_counts=_EMPTY_COUNTS, ngram_ids=_EMPTY_IDS,
+                 ngram_counts=_EMPTY_COUNTS, kw_ids=_EMPTY_IDS, skill_ids=_EMPTY_IDS,
+                 experience: Optional[float] = None):
+        self.tok_ids = tok_ids
+        self.tok_counts = tok_counts
+        self.ngram_ids = ngram_ids
+        self.ngram_counts = ngram_counts
+        self.kw_ids = kw_ids
+        self.skill_ids = skill_ids
+        self.experience = experience
+
+    @property
+    def has_text(self) -> bool:
+        return self.tok_ids.size > 0
+
+
+def skill_columns(skills: Optional[str]) -> List[Tuple[int, str, bool]]:
+    """
+    (key, label, known) per distinct skill of a comma separated skills
+    field. Known skills key on their taxonomy id (skill_taxonomy), so
+    aliases compare equal ("js" == "JavaScript"); anything else keys on a
+    hash of the entry.
+    """
+    from .skill_taxonomy import get_taxonomy
+
+    tax = get_taxonomy()
+    out: List[Tuple[int, str, bool]] = []
+    seen = set()
+    for entry in split_skills(skills):
+        sid = tax.lookup(entry)
+        found = [sid] if sid is not None else tax.find_skill_ids(entry)
+        if found:
+            cols = [(k, entry if len(found) == 1 else tax.names[k].lower(), True) for k in found]
+        else:
+            cols = [(token_id(entry), entry, False)]
+        for key, label, known in cols:
+            if key not in seen:
+                seen.add(key)
+                out.append((key, label, known))
+    return out
+
+
+def build_features(text: str, skills: Optional[str] = None, experience=None) -> Features:
+    tok_ids, tok_counts = _counted_ids(tokenize(text))
+    terms = keyword_terms(text)
+    grams = terms + [f"{terms[i]}_{terms[i + 1]}" for i in range(len(terms) - 1)]
+    ngram_ids, ngram_counts = _counted_ids(grams)
+    return Features(
+        tok_ids=tok_ids, tok_counts=tok_counts,
+        ngram_ids=ngram_ids, ngram_counts=ngram_counts,
+        kw_ids=id_array(terms),
+        skill_ids=np.unique(np.asarray([c[0] for c in skill_columns(skills)], dtype=np.uint64)),
+        experience=parse_years(experience),
+    )
+
+
+def source_hash(text: str, skills: Optional[str], experience) -> str:
+    from .skill_taxonomy import get_taxonomy
+
+    h = hashlib.sha256()
+    version = f"{FEATURES_VERSION}:{get_taxonomy().version}"
+    for part in (version, text or '', skills or '', '' if experience is None else str(experience)):
+        h.update(part.encode('utf-8', 'ignore'))
+        h.update(b'\0')
+    return h.hexdigest()
+
+
+def encode_features(f: Features) -> bytes:
+    ids = (f.tok_ids, f.ngram_ids, f.kw_ids, f.skill_ids)
+    counts = (f.tok_counts, f.ngram_counts)
+    exp = float('nan') if f.experience is None else float(f.experience)
+    header = _HEADER.pack(MAGIC, FEATURES_VERSION, exp, *(a.size for a in ids + counts))
+    return header + b''.join(np.ascontiguousarray(a, dtype='<u8').tobytes() for a in ids) \
+        + b''.join(np.ascontiguousarray(a, dtype='<u4').tobytes() for a in counts)
+
+
+def decode_features(blob) -> Features:
+    """Blob -> Features; the arrays are zero-copy views over the blob."""
+    mv = memoryview(blob)
+    if len(mv) < _HEADER.size:
+        raise FeaturesFormatError("features blob too short")
+    magic, version, exp, *sizes = _HEADER.unpack_from(mv, 0)
+    if magic != MAGIC:
+        raise FeaturesFormatError("not a features blob")
+    if version != FEATURES_VERSION:
+        raise FeaturesFormatError(f"features version {version}, expected {FEATURES_VERSION}")
+    arrays = []
+    offset = _HEADER.size
+    for i, n in enumerate(sizes):
+        dt = np.dtype('<u8') if i < 4 else np.dtype('<u4')
+        arrays.append(np.frombuffer(mv, dtype=dt, count=n, offset=offset))
+        offset += n * dt.itemsize
+    return Features(
+        tok_ids=arrays[0], ngram_ids=arrays[1], kw_ids=arrays[2], skill_ids=arrays[3],
+        tok_counts=arrays[4], ngram_counts=arrays[5],
+        experience=None if math.isnan(exp) else exp,
+    )
+
+
+# -------------------- document sources --------------------
+def resume_feature_source(r) -> Tuple[str, str, object]:
+    text = getattr(r, 'extracted_text', None) or (getattr(r, 'skills', None) or '')
+    return text.strip(), getattr(r, 'skills', None) or '', getattr(r, 'experience', None)
+
+
+def job_feature_source(job) -> Tuple[str, str, object]:
+    text = " ".join(filter(None, [
+        getattr(job, 'title', ''),
+        getattr(job, 'description', ''),
+        getattr(job, 'skills_required', ''),
+    ])).strip()
+    return text, getattr(job, 'skills_required', None) or '', getattr(job, 'experience_required', None)
+
+
+def features_for(obj, text: Optional[str] = None) -> Features:
+    """
+    Stored features of a Resume / Job when present and readable, otherwise
+    built on the fly. `text` overrides the object's own text (e.g. a resume
+    read from its file); the stored record is only used when they agree.
+    """
+    source = getattr(obj, 'feature_source', None)
+    base_text, skills, experience = source() if source else ('', '', None)
+    if text is not None:
+        text = text.strip()
+    blob = getattr(obj, 'features_blob', None)
+    if blob and (text is None or text == base_text):
+        try:
+            return decode_features(blob)
+        except FeaturesFormatError:
+            pass
+    return build_features(base_text if text is None else text, skills, experience)
+
+
+# -------------------- batch maths --------------------
+def concat_ids(arrays: Sequence[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    """Concatenate per-document id arrays -> (ids, row index of each id)."""
+    sizes = np.fromiter((a.size for a in arrays), dtype=np.int64, count=len(arrays))
+    if not sizes.sum():
+        return _EMPTY_IDS, np.zeros(0, dtype=np.int64)
+    return np.concatenate(arrays), np.repeat(np.arange(len(arrays)), sizes)
+
+
+def overlap_counts(query_ids: np.ndarray, arrays: Sequence[np.ndarray]) -> np.ndarray:
+    """|query ∩ doc| for every doc (id arrays are unique)."""
+    ids, rows = concat_ids(arrays)
+    if not ids.size or not query_ids.size:
+        return np.zeros(len(arrays), dtype=np.float64)
+    return np.bincount(rows, weights=np.isin(ids, query_ids, assume_unique=False), minlength=len(arrays))
+
+
+def membership_matrix(query_ids: Sequence[int], arrays: Sequence[np.ndarray]) -> np.ndarray:
+    """Boolean (n_docs x len(query_ids)): doc i contains query id j. query_ids keep their order."""
+    q = np.asarray(query_ids, dtype=np.uint64)
+    M = np.zeros((len(arrays), q.size), dtype=bool)
+    ids, rows = concat_ids(arrays)
+    if not q.size or not ids.size:
+        return M
+    order = np.argsort(q)
+    q_sorted = q[order]
+    pos = np.searchsorted(q_sorted, ids)
+    pos_c = np.minimum(pos, q.size - 1)
+    hit = (pos < q.size) & (q_sorted[pos_c] == ids)
+    M[rows[hit], order[pos_c[hit]]] = True
+    return M
+
+
+def tfidf_cosine(q_ids: np.ndarray, q_counts: np.ndarray,
+                 doc_ids: Sequence[np.ndarray], doc_counts: Sequence[np.ndarray]) -> np.ndarray:
+    """
+    Cosine (0..1) of the query against each doc, with a smoothed idf
+    fitted over docs + query: log((N + 1) / (df + 1)) + 1. tf is the raw
+    count; dividing by document length would cancel out in the cosine.
+    """
+    n = len(doc_ids)
+    if n == 0 or not q_ids.size:
+        return np.zeros(n, dtype=np.float64)
+    ids, rows = concat_ids(doc_ids)
+    if not ids.size:
+        return np.zeros(n, dtype=np.float64)
+    counts = np.concatenate(doc_counts).astype(np.float64)
+
+    vocab, inv = np.unique(np.concatenate([ids, q_ids]), return_inverse=True)
+    df = np.bincount(inv, minlength=vocab.size)
+    idf = np.log((n + 2) / (df + 1.0)) + 1.0
+    d_inv, q_inv = inv[:ids.size], inv[ids.size:]
+
+    q_dense = np.zeros(vocab.size, dtype=np.float64)
+    q_dense[q_inv] = q_counts * idf[q_inv]
+    q_norm = float(np.linalg.norm(q_dense))
+    if not q_norm:
+        return np.zeros(n, dtype=np.float64)
+    w = counts * idf[d_inv]
+    dots = np.bincount(rows, weights=w * q_dense[d_inv], minlength=n)
+    norms = np.sqrt(np.bincount(rows, weights=w * w, minlength=n))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sims = np.where(norms > 0, dots / (norms * q_norm), 0.0)
+    return np.clip(sims, 0.0, 1.0)
@@ -0,0 +1,104 @@
+# resumes/utils/ingestion.py
+"""
+Status bookkeeping for the staged resume ingestion pipeline.
+
+An upload only writes the file and inserts the row (ingest_status
+"queued"). The rest runs as one Celery task per stage (resumes/tasks.py),
+each queueing the next when it finishes:
+
+    extract  file -> extracted_text (extraction pool, OCR)
+    derive   skills / experience from the text, features + skill bits
+    embed    resume embedding, coalesced with other uploads into one batch
+             (skipped when no model is available)
+    index    TF-IDF index + vector index
+    rank     ranked sets, cached rankings, recommendations -> "ready"
+
+Stages write with queryset .update(), so post_save handlers don't fire
+on every step; the rank stage publishes the finished resume once.
+
+Every stage is idempotent. claim() refuses a stage the resume has
+already moved past (a redelivered or duplicate task), unless forced. A
+stage that raises leaves "failed" with the error; re-queueing from that
+stage (or start_ingestion(force=True)) resumes the pipeline.
+
+With INGEST_SEPARATE_QUEUES each stage is routed to its own queue
+(ingest_extract, ingest_derive, ...) so it can get its own worker pool.
+"""
+import logging
+from typing import Optional
+
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+STAGES = ('extract', 'derive', 'embed', 'index', 'rank')
+QUEUED = 'queued'
+READY = 'ready'
+FAILED = 'failed'
+STATUS_CHOICES = [(QUEUED, 'Queued')] + [(s, s.capitalize()) for s in STAGES] + [(READY, 'Ready'), (FAILED, 'Failed')]
+
+
+def _position(status: str) -> int:
+    if status == READY:
+        return len(STAGES)
+    if status in STAGES:
+        return STAGES.index(status)
+    # queued / failed: any stage may run
+    return -1
+
+
+def in_progress(resume) -> bool:
+    return getattr(resume, 'ingest_status', READY) in (QUEUED,) + STAGES
+
+
+def set_status(resume_id, status: str, error: str = ''):
+    from resumes.models import Resume
+    Resume.objects.filter(id=resume_id).update(
+        ingest_status=status, ingest_error=error, ingest_updated_at=timezone.now()
+    )
+
+
+def claim(resume_id, stage: str, force: bool = False):
+    """The Resume to run `stage` on (marked as in that stage), or None when it's gone or already past it."""
+    from resumes.models import Resume
+
+    resume = Resume.objects.filter(id=resume_id).first()
+    if resume is None:
+        return None
+    if not force and _position(resume.ingest_status) > STAGES.index(stage):
+        logger.info("resume %s already past %s (%s); skipping", resume_id, stage, resume.ingest_status)
+        return None
+    set_status(resume_id, stage)
+    return resume
+
+
+def fail(resume_id, stage: str, exc: Exception):
+    logger.exception("resume %s ingestion failed at %s", resume_id, stage)
+    set_status(resume_id, FAILED, f"{stage}: {exc}"[:2000])
+
+
+def status_for(resume) -> dict:
+    """Response body for GET /api/resumes/<id>/status/."""
+    status = resume.ingest_status
+    failed_at: Optional[str] = None
+    if status == FAILED and resume.ingest_error:
+        failed_at = resume.ingest_error.split(':', 1)[0]
+    current = _position(status) if status != FAILED else (STAGES.index(failed_at) if failed_at in STAGES else -1)
+
+    stages = []
+    for i, stage in enumerate(STAGES):
+        if status == READY or i < current:
+            state = 'done'
+        elif i == current:
+            state = 'failed' if status == FAILED else 'running'
+        else:
+            state = 'pending'
+        stages.append({"stage": stage, "state": state})
+    return {
+        "resume": resume.id,
+        "status": status,
+        "ready": status == READY,
+        "error": resume.ingest_error or None,
+        "updated_at": resume.ingest_updated_at,
+        "stages": stages,
+    }
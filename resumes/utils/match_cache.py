@@ -0,0 +1,348 @@
+# resumes/utils/match_cache.py
+"""
+Read-through cache of full job -> resume rankings.
+
+match_resumes used to rank the whole pool on every page request. Now the
+complete sorted ranking is computed once per job, stored under
+job_matches_<generation>_<job_id>, and pages are sliced out of it.
+
+- fresh for MATCH_CACHE_FRESH_SECONDS, kept for MATCH_CACHE_TTL
+- a stale entry is served immediately while one background refresh runs
+  (stale-while-revalidate)
+- a miss takes a per-key lock (cache.add) so concurrent requests don't all
+  recompute; the others wait up to MATCH_CACHE_LOCK_WAIT seconds for the
+  winner's result before computing themselves
+
+Invalidation (signals.py):
+- keys carry a generation number; invalidate_all_rankings() bumps it, one
+  cache.incr instead of a delete per job
+- a job change drops only that job's entry
+- a resume change is appended to a change log (numbered cache slots:
+  cache.incr, then the slot is written). Each entry remembers the log
+  position it has seen; on read, only the changed resumes are re-scored and
+  moved within the cached rows. Too many pending changes, missing log slots
+  (expired, or not written yet) or no TF-IDF index (per-resume scores need
+  the corpus idf) fall back to a full recompute.
+
+Pools above VECTOR_PREFILTER_MIN are narrowed by vector_index.prefilter()
+first, so the rows cover the nearest candidates only; "total" still counts
+the whole eligible pool.
+"""
+import bisect
+import logging
+import threading
+import time
+import uuid
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .candidate_filters import eligible_resumes
+from .matching import job_text_for, rank_resumes_for_job
+from .model_registry import get_model as get_embedding_model
+from .pdf_extract import extract_text_from_filefield
+from .tfidf_index import get_index as get_tfidf_index
+from .vector_index import prefilter
+
+logger = logging.getLogger(__name__)
+
+WAIT_POLL_SECONDS = 0.05
+
+GENERATION_KEY = "job_matches_gen"
+CHANGE_SEQ_KEY = "job_matches_change_seq"
+CHANGE_SLOT_KEY = "job_matches_change_{}"
+
+
+def _generation() -> int:
+    cache.add(GENERATION_KEY, 1, None)
+    return cache.get(GENERATION_KEY) or 1
+
+
+def ranking_key(job_id) -> str:
+    return f"job_matches_{_generation()}_{job_id}"
+
+
+def _lock_key(key: str) -> str:
+    return f"{key}:lock"
+
+
+def _change_seq() -> int:
+    return cache.get(CHANGE_SEQ_KEY) or 0
+
+
+def invalidate_all_rankings():
+    """Drop every cached ranking at once (bulk imports, weight changes)."""
+    cache.add(GENERATION_KEY, 1, None)
+    cache.incr(GENERATION_KEY)
+
+
+def invalidate_job_ranking(job_id):
+    cache.delete(ranking_key(job_id))
+
+
+def note_resumes_changed(resume_ids: Iterable[int], deleted: bool = False):
+    """Log resume changes; cached rankings patch themselves on next read."""
+    ids = [int(i) for i in resume_ids]
+    if not ids:
+        return
+    cache.add(CHANGE_SEQ_KEY, 0, None)
+    last = cache.incr(CHANGE_SEQ_KEY, len(ids))
+    first = last - len(ids) + 1
+    ttl = getattr(settings, 'MATCH_CACHE_TTL', 3600)
+    cache.set_many({CHANGE_SLOT_KEY.format(first + i): (rid, deleted) for i, rid in enumerate(ids)}, ttl)
+
+
+def get_resume_text(r):
+    """Return text for a Resume instance r. Tries common fields then file fields."""
+    for field_name in ('extracted_text', 'text', 'content', 'skills'):
+        try:
+            val = getattr(r, field_name, None)
+        except Exception:
+            val = None
+        if val:
+            try:
+                if hasattr(val, 'read'):
+                    data = val.read()
+                    if isinstance(data, bytes):
+                        return data.decode('utf-8', 'ignore').strip()
+                    return str(data).strip()
+                return str(val).strip()
+            except Exception:
+                try:
+                    return str(val)
+                except Exception:
+                    pass
+
+    try:
+        file_field = None
+        for name in ('file', 'resume_file', 'upload'):
+            if getattr(r, name, None):
+                file_field = getattr(r, name)
+                break
+        if file_field:
+            text = extract_text_from_filefield(file_field)
+            if text:
+                return text.strip()
+    except Exception:
+        pass
+
+    return ""
+
+
+def job_embedding_for(job):
+    """
+    Stored job embedding; computed once with the registry model (already
+    loaded per process) when the job has none yet, and stored for next time.
+    """
+    from resumes.models import Job
+
+    if job.embedding_vec is not None:
+        return job.embedding
+    model = get_embedding_model()
+    if model is None:
+        return None
+    try:
+        vec = model.encode(job_text_for(job), convert_to_numpy=True)
+    except Exception:
+        logger.exception("job embedding failed for job %s", job.id)
+        return None
+    job.set_embedding(vec, settings.EMBEDDING_MODEL_NAME)
+    # queryset update: no post_save, so the match caches stay warm
+    Job.objects.filter(id=job.id).update(
+        embedding_vec=job.embedding_vec, embedding_model_version=job.embedding_model_version
+    )
+    return job.embedding
+
+
+def compute_job_ranking(job) -> Tuple[int, List[dict]]:
+    """
+    (eligible pool size, sorted rows) for `job`, one batched pass. Rows
+    cover the prefiltered pool; the total is counted before the prefilter.
+    """
+    # ordered by id so ties rank the same way when rows are patched later
+    resumes = list(eligible_resumes().select_related('user').order_by('id'))
+    pool = len(resumes)
+    job_embedding = job_embedding_for(job)
+    # large pools: only the vector index's nearest candidates get the full blend
+    resumes = prefilter('resume', job, resumes)
+    index = get_tfidf_index()
+    texts = resume_texts_for(resumes, index)
+    _, rows = rank_resumes_for_job(job, resumes, texts, top_k=None, job_embedding=job_embedding, index=index)
+    return pool, rows
+
+
+def pool_total(scored: int) -> int:
+    """
+    Eligible pool size behind a stored ranking of `scored` rows. prefilter()
+    keeps at least VECTOR_PREFILTER_K rows when it cuts anything, so a
+    shorter ranking is the whole pool and needs no COUNT.
+    """
+    if scored < getattr(settings, 'VECTOR_PREFILTER_K', 1000):
+        return scored
+    return eligible_resumes().count()
+
+
+def resume_texts_for(resumes, index) -> List[Optional[str]]:
+    texts = []
+    for r in resumes:
+        # indexed resumes are scored from their stored term vector
+        if index is not None and index.contains(r.id):
+            texts.append(None)
+            continue
+        try:
+            texts.append(get_resume_text(r))
+        except Exception as e:
+            logger.exception("resume text error for resume %s: %s", getattr(r, 'id', None), e)
+            texts.append('')
+    return texts
+
+
+def _row_order(row):
+    return (-row["score"], row["resume_id"])
+
+
+def _patch(job, entry: dict, changes: Dict[int, bool]) -> Optional[dict]:
+    """Re-score only the changed resumes and move their rows; None = can't patch."""
+    index = get_tfidf_index()
+    if index is None:
+        return None
+    rows = entry["rows"]
+    kept = [r for r in rows if r["resume_id"] not in changes]
+    # changed resumes that were cut by the prefilter have no row to drop,
+    # so the pool is recounted rather than adjusted
+    total = eligible_resumes().count()
+
+    live = [rid for rid, deleted in changes.items() if not deleted]
+    resumes = list(eligible_resumes().select_related('user').filter(id__in=live).order_by('id'))
+    if resumes:
+        job_embedding = job_embedding_for(job)
+        # same candidate cut as the full ranking, judged against the whole pool
+        resumes = prefilter('resume', job, resumes, pool_size=total)
+    if resumes:
+        _, new_rows = rank_resumes_for_job(
+            job, resumes, resume_texts_for(resumes, index), job_embedding=job_embedding, index=index
+        )
+        for row in new_rows:
+            bisect.insort(kept, row, key=_row_order)
+    return dict(entry, rows=kept, total=total)
+
+
+def _apply_changes(job, key: str, entry: dict) -> Optional[dict]:
+    """Bring a cached entry up to date with the resume change log; None = recompute."""
+    seq = _change_seq()
+    seen = entry.get("change_seq", 0)
+    if seq <= seen:
+        return entry
+    if seq - seen > getattr(settings, 'MATCH_CACHE_PATCH_MAX', 200):
+        return None
+    slots = [CHANGE_SLOT_KEY.format(i) for i in range(seen + 1, seq + 1)]
+    found = cache.get_many(slots)
+    if len(found) < len(slots):
+        # log slots expired; we can't tell what changed
+        return None
+    changes = {}
+    for slot in slots:
+        rid, deleted = found[slot]
+        changes[rid] = deleted
+    patched = _patch(job, entry, changes)
+    if patched is None:
+        return None
+    patched["change_seq"] = seq
+    cache.set(key, patched, getattr(settings, 'MATCH_CACHE_TTL', 3600))
+    return patched
+
+
+def _compute_and_store(job, key: str) -> dict:
+    # read the log position first: changes made while we compute get replayed
+    change_seq = _change_seq()
+    total, rows = compute_job_ranking(job)
+    now = time.time()
+    entry = {
+        "total": total,
+        "rows": rows,
+        "computed_at": now,
+        "fresh_until": now + getattr(settings, 'MATCH_CACHE_FRESH_SECONDS', 300),
+        "change_seq": change_seq,
+    }
+    cache.set(key, entry, getattr(settings, 'MATCH_CACHE_TTL', 3600))
+    return entry
+
+
+def _release(key: str, token):
+    if cache.get(_lock_key(key)) == token:
+        cache.delete(_lock_key(key))
+
+
+def refresh_job_ranking(job_id, token: Optional[str] = None, key: Optional[str] = None) -> Optional[dict]:
+    """Recompute and store one job's ranking (used by the background refresh)."""
+    from resumes.models import Job
+
+    key = key or ranking_key(job_id)
+    try:
+        job = Job.objects.get(id=job_id)
+        return _compute_and_store(job, key)
+    except Job.DoesNotExist:
+        cache.delete(key)
+        return None
+    finally:
+        if token:
+            _release(key, token)
+
+
+def _refresh_in_background(job_id, key, token):
+    if getattr(settings, 'CELERY_TASK_ALWAYS_EAGER', False):
+        # no broker: an eager task would run inside this request, use a thread instead
+        def run():
+            from django.db import connection
+            try:
+                refresh_job_ranking(job_id, token, key)
+            except Exception:
+                logger.exception("background ranking refresh failed for job %s", job_id)
+                _release(key, token)
+            finally:
+                connection.close()
+        threading.Thread(target=run, daemon=True).start()
+        return
+    from resumes.tasks import refresh_job_matches
+    try:
+        refresh_job_matches.delay(job_id, token, key)
+    except Exception as e:
+        logger.warning("Celery enqueue failed; ranking for job %s stays stale: %s", job_id, e)
+        _release(key, token)
+
+
+def get_job_ranking(job) -> dict:
+    """
+    Cached {"total", "rows", "computed_at", "fresh_until"} for `job`,
+    computing it (once across concurrent callers) on a miss.
+    """
+    # the key is fixed up front: a generation bump while we compute leaves
+    # our result under the old generation, where nobody reads it
+    key = ranking_key(job.id)
+    lock_seconds = getattr(settings, 'MATCH_CACHE_LOCK_SECONDS', 60)
+    entry = cache.get(key)
+    if entry is not None:
+        entry = _apply_changes(job, key, entry)
+    if entry is not None:
+        if entry["fresh_until"] < time.time():
+            token = uuid.uuid4().hex
+            if cache.add(_lock_key(key), token, lock_seconds):
+                _refresh_in_background(job.id, key, token)
+        return entry
+
+    token = uuid.uuid4().hex
+    if not cache.add(_lock_key(key), token, lock_seconds):
+        # someone else is computing: wait for their result
+        deadline = time.monotonic() + getattr(settings, 'MATCH_CACHE_LOCK_WAIT', 10)
+        while time.monotonic() < deadline:
+            time.sleep(WAIT_POLL_SECONDS)
+            entry = cache.get(key)
+            if entry is not None:
+                return _apply_changes(job, key, entry) or _compute_and_store(job, key)
+        token = None
+    try:
+        return _compute_and_store(job, key)
+    finally:
+        if token:
+            _release(key, token)
@@ -0,0 +1,304 @@
+# resumes/utils/matching.py
+"""
+Batched job -> resumes matching engine.
+
+Scores one job against a whole candidate pool in a single NumPy pass instead
+of looping per resume:
+
+- documents are read as pre-tokenized features (feature_store), so no
+  text is re-tokenized per comparison
+- one shared IDF fitted over the corpus (all resumes + the job text), or
+  the persistent corpus index when there is one
+- TF-IDF cosine computed at matrix level (bincount over id arrays)
+- embedding cosine for rows that have a stored embedding
+- skills overlap as one AND + popcount over stored skill bitsets
+- top-k selection with argpartition, so only the returned rows get sorted
+
+blend_batch() is the blend itself; scoring's "blend" strategy calls it too,
+so benchmarks measure what production serves. Result rows keep the shape match_resumes has always returned.
+"""
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from . import skill_bits
+from .feature_store import (
+    features_for, membership_matrix, overlap_counts, skill_columns, tfidf_cosine, tokenize,
+)
+
+logger = logging.getLogger(__name__)
+
+# blend weights (same as the per-row loop in views.match_resumes); see blend_scores
+WEIGHTS_WITH_EMBEDDING = {"embedding": 0.6, "tfidf": 0.2, "skills": 0.2}
+WEIGHTS_NO_EMBEDDING = {"tfidf": 0.8, "skills": 0.2}
+
+
+def job_text_for(job) -> str:
+    return " ".join(filter(None, [
+        getattr(job, 'title', ''),
+        getattr(job, 'description', ''),
+        getattr(job, 'skills_required', ''),
+    ])).strip()
+
+
+# -------------------- embeddings --------------------
+def embedding_cosine_batch(query_emb, doc_embs: Sequence[Any]) -> np.ndarray:
+    """
+    Cosine (0..1) between query_emb and each doc embedding.
+    Rows with a missing / wrong-sized embedding get NaN.
+    """
+    n = len(doc_embs)
+    out = np.full(n, np.nan, dtype=np.float64)
+    if query_emb is None or n == 0:
+        return out
+    try:
+        q = np.asarray(query_emb, dtype=np.float32).ravel()
+    except Exception:
+        return out
+    dim = q.size
+    q_norm = float(np.linalg.norm(q))
+    if not dim or not q_norm:
+        return out
+
+    idx = [i for i, e in enumerate(doc_embs) if e is not None and len(e) == dim]
+    if not idx:
+        return out
+    M = np.asarray([doc_embs[i] for i in idx], dtype=np.float32)
+    norms = np.linalg.norm(M, axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sims = np.where(norms > 0, (M @ q) / (norms * q_norm), 0.0)
+    out[np.asarray(idx)] = np.clip(sims, 0.0, 1.0)
+    return out
+
+
+def _embedding_if_version(obj, version: Optional[str]):
+    """Stored embedding, only when it came from the same model as the query side."""
+    if getattr(obj, 'embedding_model_version', None) != version:
+        return None
+    return getattr(obj, 'embedding', None)
+
+
+# -------------------- blend --------------------
+def has_embedding(emb: np.ndarray) -> np.ndarray:
+    return ~np.isnan(emb) & (np.nan_to_num(emb) > 0)
+
+
+def blend_scores(emb: np.ndarray, tfidf: np.ndarray, skills: np.ndarray) -> np.ndarray:
+    """
+    Final 0..100 score from the component scores (each 0..100). Rows with an
+    embedding score use WEIGHTS_WITH_EMBEDDING, the rest WEIGHTS_NO_EMBEDDING.
+    """
+    w_e, w_n = WEIGHTS_WITH_EMBEDDING, WEIGHTS_NO_EMBEDDING
+    final = np.where(
+        has_embedding(emb),
+        w_e["embedding"] * np.nan_to_num(emb) + w_e["tfidf"] * tfidf + w_e["skills"] * skills,
+        w_n["tfidf"] * tfidf + w_n["skills"] * skills,
+    )
+    return np.clip(np.round(final, 2), 0.0, 100.0)
+
+
+class Blend:
+    """Component and final scores of one blend_batch() call (0..100 each, one per doc)."""
+
+    __slots__ = ('final', 'emb', 'tfidf', 'skills', 'has_text', '_known', '_other', '_mask', '_R', '_O')
+
+    def __init__(self, final, emb, tfidf, skills, has_text, known, other, mask, R, O):
+        self.final, self.emb, self.tfidf, self.skills, self.has_text = final, emb, tfidf, skills, has_text
+        self._known, self._other, self._mask, self._R, self._O = known, other, mask, R, O
+
+    def missing(self, i: int) -> List[str]:
+        """Query skills doc i lacks (decoded only for the rows that are shown)."""
+        labels = [self._known[sid] for sid in skill_bits.to_ids(self._mask & ~self._R[i])]
+        labels += [label for (_, label), hit in zip(self._other, self._O[i]) if not hit]
+        return sorted(labels)
+
+
+def blend_batch(query_f, query_skills: Optional[str], query_emb,
+                doc_feats: Sequence[Any], doc_bits: Sequence[Any], doc_embs: Sequence[Any],
+                tfidf: Optional[np.ndarray] = None, has_text: Optional[np.ndarray] = None) -> Blend:
+    """
+    The production blend of one query against many documents; every scorer
+    (rank_resumes_for_job, scoring's "blend" strategy) goes through here.
+
+    - query_f / doc_feats: feature_store.Features
+    - query_skills: the query's comma separated skills field
+    - doc_bits: stored skill bitsets (skill_bits.bits_for)
+    - tfidf / has_text: precomputed TF-IDF (0..100) from a corpus index;
+      default: cosine with an idf fitted over the docs + query
+    """
+    n = len(doc_feats)
+    if tfidf is None:
+        tfidf = tfidf_cosine(query_f.tok_ids, query_f.tok_counts,
+                             [f.tok_ids for f in doc_feats], [f.tok_counts for f in doc_feats]) * 100.0
+        has_text = np.fromiter((f.has_text for f in doc_feats), dtype=bool, count=n)
+
+    emb = embedding_cosine_batch(query_emb, doc_embs) * 100.0
+
+    # taxonomy skills: one AND + popcount over the (docs x words) bitset
+    # matrix; free-text query skills the taxonomy doesn't know: feature ids
+    columns = skill_columns(query_skills)
+    known = {key: label for key, label, is_known in columns if is_known}
+    other = [(key, label) for key, label, is_known in columns if not is_known]
+    mask = skill_bits.to_words(known)
+    R = skill_bits.bits_matrix(doc_bits, mask.size)
+    O = membership_matrix([key for key, _ in other], [f.skill_ids for f in doc_feats])
+    if columns:
+        skills = (skill_bits.overlap_counts(R, mask) + O.sum(axis=1)) * (100.0 / len(columns))
+    else:
+        skills = np.zeros(n, dtype=np.float64)
+
+    final = blend_scores(emb, np.where(has_text, tfidf, 0.0), skills)
+    return Blend(final, emb, tfidf, skills, has_text, known, other, mask, R, O)
+
+
+# -------------------- ranking --------------------
+def top_k_indices(scores: np.ndarray, k: Optional[int] = None) -> np.ndarray:
+    """
+    Indices of the k best scores, best first. Ties keep input order.
+    argpartition picks the k winners in O(n); only those k get sorted.
+    """
+    n = scores.size
+    if k is None or k >= n:
+        cand = np.arange(n)
+    elif k <= 0:
+        return np.arange(0)
+    else:
+        cand = np.argpartition(-scores, k - 1)[:k]
+        # argpartition is arbitrary among ties at the boundary; keep earliest rows
+        kth = scores[cand].min()
+        above = np.flatnonzero(scores > kth)
+        ties = np.flatnonzero(scores == kth)[:k - above.size]
+        cand = np.concatenate([above, ties])
+    order = np.lexsort((cand, -scores[cand]))
+    return cand[order]
+
+
+def rank_resumes_for_job(job, resumes: Sequence[Any], texts: Sequence[Optional[str]],
+                         top_k: Optional[int] = None,
+                         job_embedding: Optional[Iterable[float]] = None,
+                         index=None,
+                         after: Optional[Tuple[float, int]] = None) -> Tuple[int, List[Dict[str, Any]]]:
+    """
+    Score `job` against every resume in one pass.
+
+    - resumes: Resume instances (user should be select_related)
+    - texts: resume text per resume, same order; may be None for resumes
+      already in `index`
+    - top_k: only build result rows for the best k (None = all)
+    - job_embedding: defaults to job.embedding
+    - index: optional tfidf_index.TfidfIndex; scores against the corpus idf
+      and the stored term vectors instead of re-tokenizing resume text
+    - after: (score, resume_id) keyset cursor; only rows ranked after it
+      (lower score, or equal score and higher id; resumes in id order)
+
+    Returns (total, rows) with rows sorted by score desc.
+    """
+    n = len(resumes)
+    if n == 0:
+        return 0, []
+
+    feats = [features_for(r, t) for r, t in zip(resumes, texts)]
+    tfidf = has_text = None
+    if index is not None:
+        job_tokens = tokenize(job_text_for(job))
+        ids = [r.id for r in resumes]
+        indexed = np.fromiter((index.contains(i) for i in ids), dtype=bool, count=n)
+        doc_tokens = [None if indexed[i] else tokenize((t or '').strip()) for i, t in enumerate(texts)]
+        has_text = indexed | np.fromiter((bool((t or '').strip()) for t in texts), dtype=bool, count=n)
+        tfidf = np.nan_to_num(index.cosine(job_tokens, ids, doc_tokens)) * 100.0
+
+    # embeddings only where both sides come from the same model
+    if job_embedding is None:
+        job_embedding = getattr(job, 'embedding', None)
+    version = getattr(job, 'embedding_model_version', None)
+    b = blend_batch(
+        features_for(job), getattr(job, 'skills_required', ''), job_embedding,
+        feats, [skill_bits.bits_for(r) for r in resumes], [_embedding_if_version(r, version) for r in resumes],
+        tfidf=tfidf, has_text=has_text,
+    )
+    final, emb, tfidf, skills, has_text = b.final, b.emb, b.tfidf, b.skills, b.has_text
+    has_emb = has_embedding(emb)
+
+    pool = np.arange(n)
+    if after is not None:
+        after_score, after_id = after
+        resume_ids = np.fromiter((r.id for r in resumes), dtype=np.int64, count=n)
+        pool = np.flatnonzero((final < after_score) | ((final == after_score) & (resume_ids > after_id)))
+
+    rows = []
+    for i in pool[top_k_indices(final[pool], top_k)]:
+        r = resumes[i]
+        rows.append({
+            "resume_id": r.id,
+            "user": getattr(r.user, 'username', ''),
+            "skills": r.skills or '',
+            "experience": r.experience or 0,
+            "embedding_score": round(float(emb[i]), 2) if has_emb[i] else None,
+            "tfidf_score": round(float(tfidf[i]), 2) if has_text[i] else None,
+            "skills_score": round(float(skills[i]), 2),
+            "score": float(final[i]),
+            "missing_skills": b.missing(i),
+        })
+    return n, rows
+
+
+def rank_jobs_for_resume(resume, jobs: Sequence[Any], resume_text: Optional[str],
+                         index=None, top_k: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Score one resume against many jobs (recommended_jobs). Same blend as
+    rank_resumes_for_job; idf comes from `index` when given, otherwise it is
+    fitted over the jobs + resume.
+    """
+    jobs = [j for j in jobs if job_text_for(j)]
+    n = len(jobs)
+    if n == 0:
+        return []
+
+    job_feats = [features_for(j) for j in jobs]
+    resume_f = features_for(resume, resume_text)
+    if index is not None:
+        job_tokens = [tokenize(job_text_for(j)) for j in jobs]
+    if index is not None and index.contains(resume.id):
+        # the stored row is the resume; score it against each job text
+        tfidf = np.nan_to_num(index.cosine_many(resume.id, job_tokens)) * 100.0
+    elif index is not None:
+        resume_tokens = tokenize(resume_text)
+        tfidf = np.fromiter((index.similarity(resume_tokens, toks) for toks in job_tokens),
+                            dtype=np.float64, count=n) * 100.0
+    else:
+        tfidf = tfidf_cosine(resume_f.tok_ids, resume_f.tok_counts,
+                             [f.tok_ids for f in job_feats], [f.tok_counts for f in job_feats]) * 100.0
+
+    version = getattr(resume, 'embedding_model_version', None)
+    emb = embedding_cosine_batch(getattr(resume, 'embedding', None),
+                                 [_embedding_if_version(j, version) for j in jobs]) * 100.0
+
+    # share of each job's skills the resume has: taxonomy skills as one AND +
+    # popcount of the resume bitset over the (jobs x words) matrix, free-text
+    # job skills against the resume's own free-text entries
+    blob = skill_bits.bits_for(resume) or b''
+    resume_words = skill_bits.decode_skill_bits(blob, len(blob) // 8)
+    J = skill_bits.bits_matrix([skill_bits.bits_for(j) for j in jobs], resume_words.size)
+    resume_other = np.asarray([key for key, _, known in skill_columns(getattr(resume, 'skills', ''))
+                               if not known], dtype=np.uint64)
+    hits = skill_bits.overlap_counts(J, resume_words) + overlap_counts(resume_other, [f.skill_ids for f in job_feats])
+    n_skills = np.fromiter((f.skill_ids.size for f in job_feats), dtype=np.float64, count=n)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        skills = np.where(n_skills > 0, hits * 100.0 / n_skills, 0.0)
+
+    final = blend_scores(emb, tfidf, skills)
+
+    return [{
+        "job_id": jobs[i].id,
+        "title": jobs[i].title,
+        "company": getattr(jobs[i], 'company', ''),
+        "skills_required": jobs[i].skills_required,
+        "score": float(final[i]),
+    } for i in top_k_indices(final, top_k)]
+
+
+def score_resume_for_job_pair(job, resume, resume_text: Optional[str], index=None) -> Optional[float]:
+    """Single job/resume score (0..100), e.g. the snapshot stored on apply."""
+    _, rows = rank_resumes_for_job(job, [resume], [resume_text], index=index)
+    return rows[0]["score"] if rows else None
@@ -0,0 +1,124 @@
+# resumes/utils/model_registry.py
+"""
+Process-wide registry of embedding models.
+
+Models are loaded lazily on first use, once per process and per
+embedding_model_version, behind a lock so concurrent threads don't load
+twice. Nothing is imported at module import time, so manage.py commands
+that never embed stay fast.
+
+warm_up() preloads models; it is wired to gunicorn's on_starting hook
+(gunicorn.conf.py) and Celery's worker_init signal (core/celery.py), both
+of which run before workers fork, so children share the weights
+copy-on-write. Enable with EMBEDDING_WARMUP=1.
+
+memory_footprint() is served by the staff stats endpoint (views.pipeline_stats).
+"""
+import logging
+import threading
+import time
+from typing import Dict, Iterable, Optional
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_models: Dict[str, object] = {}
+_footprint: Dict[str, dict] = {}
+_failed: Dict[str, float] = {}
+_lock = threading.Lock()
+
+# after a failed load, don't retry on every request
+RETRY_AFTER_SECONDS = 300
+
+
+def default_version() -> str:
+    return getattr(settings, 'EMBEDDING_MODEL_NAME', 'all-MiniLM-L6-v2')
+
+
+def _rss_bytes() -> Optional[int]:
+    try:
+        import os
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except Exception:
+        return None
+
+
+def _param_bytes(model) -> Optional[int]:
+    try:
+        return int(sum(p.numel() * p.element_size() for p in model.parameters()))
+    except Exception:
+        return None
+
+
+def _load(version: str):
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(version)
+
+
+def get_model(version: Optional[str] = None):
+    """Loaded model for `version` (default settings.EMBEDDING_MODEL_NAME), or None."""
+    if not getattr(settings, 'EMBEDDINGS_ENABLED', True):
+        return None
+    version = version or default_version()
+    model = _models.get(version)
+    if model is not None:
+        return model
+    with _lock:
+        model = _models.get(version)
+        if model is not None:
+            return model
+        failed_at = _failed.get(version)
+        if failed_at and time.monotonic() - failed_at < RETRY_AFTER_SECONDS:
+            return None
+        rss_before = _rss_bytes()
+        started = time.monotonic()
+        try:
+            model = _load(version)
+        except ImportError:
+            logger.warning("sentence-transformers is not installed; embeddings disabled")
+            _failed[version] = time.monotonic()
+            return None
+        except Exception:
+            logger.exception("embedding model %s failed to load", version)
+            _failed[version] = time.monotonic()
+            return None
+        rss_after = _rss_bytes()
+        _models[version] = model
+        _failed.pop(version, None)
+        _footprint[version] = {
+            "param_bytes": _param_bytes(model),
+            "rss_delta_bytes": (rss_after - rss_before) if rss_before and rss_after else None,
+            "load_seconds": round(time.monotonic() - started, 3),
+        }
+        logger.info("embedding model %s loaded in %.2fs", version, _footprint[version]["load_seconds"])
+        return model
+
+
+def warm_up(versions: Optional[Iterable[str]] = None):
+    """Preload models (pre-fork). Failures are logged, never raised."""
+    for v in versions or [default_version()]:
+        get_model(v)
+
+
+def loaded_versions():
+    return list(_models)
+
+
+def memory_footprint() -> dict:
+    """Gauge: per loaded model bytes + current process RSS."""
+    return {
+        "process_rss_bytes": _rss_bytes(),
+        "models": {v: dict(info) for v, info in _footprint.items()},
+    }
+
+
+def unload(version: Optional[str] = None):
+    with _lock:
+        if version is None:
+            _models.clear()
+            _footprint.clear()
+        else:
+            _models.pop(version, None)
+            _footprint.pop(version, None)
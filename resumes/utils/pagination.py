@@ -0,0 +1,183 @@
+# resumes/utils/pagination.py
+"""
+Keyset (cursor) pagination for the list endpoints.
+
+Every list is ordered by an indexed, non-null column plus id, e.g.
+('-applied_at', '-id'), so the order is total and stable. A page is
+
+    WHERE (applied_at, id) < (<last applied_at>, <last id>) ORDER BY ... LIMIT n+1
+
+which stays an index range scan however deep the page is (no OFFSET).
+The cursor is the last row's ordering values as opaque urlsafe base64;
+clients only pass it back:
+
+    GET /api/resumes/applications/?page_size=50
+    Link: <...?page_size=50&cursor=WyIyMDI1...>; rel="next"
+    X-Next-Cursor: WyIyMDI1...
+
+List bodies stay plain arrays; the next cursor travels in the Link /
+X-Next-Cursor headers, and there is none on the last page. Clients that
+need the whole list follow it (the recruiter dashboard's apiFetchAll).
+?page_size= defaults to API_PAGE_SIZE, capped at API_MAX_PAGE_SIZE.
+
+Paging is opt-in: a request with neither ?page_size= nor ?cursor= still
+gets the whole list, as before pagination existed, so clients that don't
+follow the Link header yet see no truncated lists. API_PAGINATE_BY_DEFAULT
+pages those too once every client does.
+"""
+import base64
+import binascii
+import json
+import logging
+from typing import List, Optional, Sequence
+
+from django.conf import settings
+from django.db import models
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ParseError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+logger = logging.getLogger(__name__)
+
+CURSOR_PARAM = 'cursor'
+PAGE_SIZE_PARAM = 'page_size'
+
+
+class CursorError(ParseError):
+    """Malformed or foreign cursor (400)."""
+    default_detail = "Invalid cursor"
+
+
+def _json_value(value):
+    return value.isoformat() if hasattr(value, 'isoformat') else str(value)
+
+
+def encode_cursor(values: Sequence) -> str:
+    raw = json.dumps(list(values), separators=(',', ':'), default=_json_value).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def paging_requested(request) -> bool:
+    params = request.query_params
+    return (CURSOR_PARAM in params or PAGE_SIZE_PARAM in params
+            or getattr(settings, 'API_PAGINATE_BY_DEFAULT', False))
+
+
+def decode_cursor(token: str, length: int) -> list:
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        values = json.loads(raw.decode('utf-8'))
+    except (binascii.Error, ValueError, UnicodeDecodeError):
+        raise CursorError()
+    if not isinstance(values, list) or len(values) != length:
+        raise CursorError()
+    return values
+
+
+def page_size_for(request) -> int:
+    default = getattr(settings, 'API_PAGE_SIZE', 50)
+    limit = getattr(settings, 'API_MAX_PAGE_SIZE', 200)
+    try:
+        size = int(request.query_params.get(PAGE_SIZE_PARAM) or default)
+    except (TypeError, ValueError):
+        size = default
+    return max(1, min(size, limit))
+
+
+def next_links(request, cursor: Optional[str]) -> dict:
+    """Response headers pointing at the page after this one."""
+    if not cursor:
+        return {}
+    url = replace_query_param(request.build_absolute_uri(), CURSOR_PARAM, cursor)
+    return {'Link': f'<{url}>; rel="next"', 'X-Next-Cursor': cursor}
+
+
+class KeysetPagination(BasePagination):
+    """
+    ordering: the keyset, most significant first; must end in the pk and
+    use non-null columns. Usable as a DRF pagination_class (subclass with
+    `ordering` set) or directly from function views:
+
+        paginator = KeysetPagination(('-posted_at', '-id'))
+        page = paginator.paginate_queryset(qs, request)
+        return paginator.get_paginated_response(JobSerializer(page, many=True).data)
+    """
+    ordering: Sequence[str] = ('-id',)
+
+    def __init__(self, ordering: Optional[Sequence[str]] = None):
+        if ordering is not None:
+            self.ordering = tuple(ordering)
+        self.next_cursor: Optional[str] = None
+        self.request = None
+
+    @property
+    def fields(self) -> List[str]:
+        return [o.lstrip('-') for o in self.ordering]
+
+    def _decode(self, model, token: str) -> list:
+        values = decode_cursor(token, len(self.ordering))
+        out = []
+        for name, value in zip(self.fields, values):
+            field = model._meta.get_field(name)
+            if isinstance(field, models.DateTimeField):
+                try:
+                    value = parse_datetime(value) if isinstance(value, str) else None
+                except ValueError:
+                    value = None
+            elif field.get_internal_type() in ('AutoField', 'BigAutoField', 'IntegerField', 'BigIntegerField'):
+                value = value if isinstance(value, int) else None
+            if value is None:
+                raise CursorError()
+            out.append(value)
+        return out
+
+    def after(self, values: Sequence) -> Q:
+        """Rows strictly after `values` in this ordering (row-value comparison, spelled out)."""
+        q = Q()
+        equal = Q()
+        for order, value in zip(self.ordering, values):
+            name = order.lstrip('-')
+            op = 'lt' if order.startswith('-') else 'gt'
+            q |= equal & Q(**{f'{name}__{op}': value})
+            equal &= Q(**{name: value})
+        return q
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        qs = queryset.order_by(*self.ordering)
+        names, deferring = qs.query.deferred_loading
+        if names and not deferring:
+            # an only() queryset still loads the keyset columns the next cursor is read from
+            qs = qs.only(*names, *self.fields)
+        self.next_cursor = None
+        if not paging_requested(request):
+            return list(qs)
+        token = request.query_params.get(CURSOR_PARAM)
+        if token:
+            qs = qs.filter(self.after(self._decode(queryset.model, token)))
+        size = page_size_for(request)
+        rows = list(qs[:size + 1])
+        page, more = rows[:size], len(rows) > size
+        if more:
+            last = page[-1]
+            self.next_cursor = encode_cursor(getattr(last, name) for name in self.fields)
+        return page
+
+    def response_headers(self) -> dict:
+        return next_links(self.request, self.next_cursor) if self.request is not None else {}
+
+    def get_paginated_response(self, data):
+        return Response(data, headers=self.response_headers())
+
+    def get_paginated_response_schema(self, schema):
+        return schema
+
+
+def paginated(request, queryset, ordering: Sequence[str], serializer_class, **serializer_kwargs) -> Response:
+    """One page of `queryset` serialized with serializer_class (CursorError -> 400 via DRF)."""
+    paginator = KeysetPagination(ordering)
+    page = paginator.paginate_queryset(queryset, request)
+    return paginator.get_paginated_response(serializer_class(page, many=True, **serializer_kwargs).data)
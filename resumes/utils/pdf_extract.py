@@ -1,9 +1,10 @@
 # resumes/utils/pdf_extract.py
 import io
 import logging
-import contextlib
 import os,sys
 
+from . import text_cache
+
 
 if os.name=="nt":
     devnull="NUL"
@@ -21,128 +22,141 @@ logging.getLogger("pdfminer").setLevel(logging.ERROR)
 
 logger = logging.getLogger(__name__)
 
-# try pdfminer high-level, fallback to pdfplumber / PyPDF2
+# Page-level extractors. Each takes raw PDF bytes and a list of 0-based page
+# numbers (None = every page) and returns one string per page. They raise on
+# failure; extractor_planner decides which one runs and records how it went.
 try:
-    from pdfminer.high_level import extract_text as _pdfminer_extract_text
-
-    def _try_pdfminer(fp):
-        # pdfminer accepts path or file-like; we'll pass bytes buffer
-        try:
-            if hasattr(fp, "read"):
-                data = fp.read()
-                return _pdfminer_extract_text(io.BytesIO(data))
-            return _pdfminer_extract_text(fp)
-        except Exception:
-            logger.exception("pdfminer extraction failed")
-            return None
+    from pdfminer.high_level import extract_pages as _pdfminer_extract_pages
+    from pdfminer.layout import LTTextContainer
+
+    def _pages_pdfminer(raw_bytes, page_numbers=None):
+        wanted = sorted(set(page_numbers)) if page_numbers is not None else None
+        texts = [
+            "".join(el.get_text() for el in layout if isinstance(el, LTTextContainer))
+            for layout in _pdfminer_extract_pages(io.BytesIO(raw_bytes), page_numbers=wanted)
+        ]
+        if wanted is None:
+            return texts
+        by_page = dict(zip(wanted, texts))
+        return [by_page.get(p, "") for p in page_numbers]
 except Exception:
-    _pdfminer_extract_text = None
-
-    def _try_pdfminer(fp):
-        return None
+    _pages_pdfminer = None
 
 
 try:
     import pdfplumber
 
-    def _try_pdfplumber(fp):
-        try:
-            text_parts = []
-            if hasattr(fp, "read"):
-                # pdfplumber expects a filename or file-like; use bytesIO
-                f = io.BytesIO(fp.read())
-            else:
-                f = fp
-            with pdfplumber.open(f) as pdf:
-                for p in pdf.pages:
-                    text_parts.append(p.extract_text() or "")
-            return "\n".join(text_parts)
-        except Exception:
-            logger.exception("pdfplumber extraction failed")
-            return None
+    def _pages_pdfplumber(raw_bytes, page_numbers=None):
+        with pdfplumber.open(io.BytesIO(raw_bytes)) as pdf:
+            n = len(pdf.pages)
+            wanted = range(n) if page_numbers is None else page_numbers
+            return [(pdf.pages[p].extract_text() or "") if p < n else "" for p in wanted]
 except Exception:
-    _try_pdfplumber = lambda fp: None
+    _pages_pdfplumber = None
 
 
 try:
     import PyPDF2
 
-    def _try_pypdf2(fp):
-        try:
-            text_parts = []
-            if hasattr(fp, "read"):
-                reader = PyPDF2.PdfReader(io.BytesIO(fp.read()))
-            else:
-                reader = PyPDF2.PdfReader(fp)
-            for p in reader.pages:
-                try:
-                    text_parts.append(p.extract_text() or "")
-                except Exception:
-                    text_parts.append("")
-            return "\n".join(text_parts)
-        except Exception:
-            logger.exception("PyPDF2 extraction failed")
-            return None
+    def _pages_pypdf2(raw_bytes, page_numbers=None):
+        reader = PyPDF2.PdfReader(io.BytesIO(raw_bytes))
+        if reader.is_encrypted:
+            reader.decrypt("")
+        n = len(reader.pages)
+        out = []
+        for p in (range(n) if page_numbers is None else page_numbers):
+            try:
+                out.append((reader.pages[p].extract_text() or "") if p < n else "")
+            except Exception:
+                out.append("")
+        return out
 except Exception:
-    _try_pypdf2 = lambda fp: None
+    _pages_pypdf2 = None
 
 
-# Optional OCR fallback (requires pytesseract and PIL + tesseract installed)
+# Optional OCR (requires pytesseract and PIL + tesseract / poppler installed).
+# Opt-in (PDF_OCR_ENABLED) and only run from the background extraction
+# service, never inline in a request.
 try:
     import pytesseract
     from PIL import Image
-    from pdf2image import convert_from_bytes, convert_from_path
+    from pdf2image import convert_from_bytes
 
-    def _try_ocr(fp, poppler_path=None, tesseract_lang=None):
+    def _pages_ocr(raw_bytes, page_numbers=None, dpi=300, lang=None, poppler_path=None,
+                   max_pages=None, stop_after_chars=None):
         """
-        Convert PDF to images using pdf2image (poppler) and run pytesseract OCR.
-        Suppresses poppler/pdf2image stderr so terminal is not spammed with font/pdfinfo warnings.
-
-        - fp: file-like with .read() or a path (string / pathlike)
-        - poppler_path: optional path to poppler 'bin' (Windows). If None, rely on PATH.
-        - tesseract_lang: optional language code for pytesseract (e.g. 'eng')
+        Rasterize lazily, one grayscale page at a time, at `dpi` (Tesseract
+        is tuned for ~300 dpi text) and OCR it, so only one page bitmap is
+        in memory. Stops once `stop_after_chars` characters are found; the
+        remaining pages come back as "". poppler (pdftoppm / pdfinfo) and
+        tesseract are child processes; pdf2image and pytesseract already run
+        them with stderr=PIPE, so their font / syntax warnings never reach
+        the terminal. Only the Python loggers need quieting (top of module).
         """
-        try:
-            # capture poppler/pdf2image stderr (these are printed by poppler/pdfinfo)
-            stderr_buf = io.StringIO()
-            with contextlib.redirect_stderr(stderr_buf):
-                if hasattr(fp, "read"):
-                    pdf_bytes = fp.read()
-                    if poppler_path:
-                        pages = convert_from_bytes(pdf_bytes, poppler_path=poppler_path)
-                    else:
-                        pages = convert_from_bytes(pdf_bytes)
-                else:
-                    # path-like
-                    if poppler_path:
-                        pages = convert_from_path(fp, poppler_path=poppler_path)
-                    else:
-                        pages = convert_from_path(fp)
-
-            text_pages = []
-            for img in pages:
-                # ensure image is PIL Image; pytesseract accepts it directly
-                if tesseract_lang:
-                    text_pages.append(pytesseract.image_to_string(img, lang=tesseract_lang))
-                else:
-                    text_pages.append(pytesseract.image_to_string(img))
-            return "\n".join(text_pages)
-        except Exception:
-            # keep the exception logged, but suppress poppler stderr messages
-            logger.exception("OCR extraction failed")
-            return None
-
+        kwargs = {"poppler_path": poppler_path} if poppler_path else {}
+        if page_numbers is None:
+            from pdf2image import pdfinfo_from_bytes
+            page_numbers = range(int(pdfinfo_from_bytes(raw_bytes, **kwargs).get("Pages", 0)))
+        page_numbers = list(page_numbers)
+        limit = len(page_numbers) if max_pages is None else min(max_pages, len(page_numbers))
+        out = []
+        found = 0
+        for p in page_numbers[:limit]:
+            images = convert_from_bytes(raw_bytes, dpi=dpi, grayscale=True,
+                                        first_page=p + 1, last_page=p + 1, **kwargs)
+            text = "".join(pytesseract.image_to_string(img, lang=lang) if lang else pytesseract.image_to_string(img)
+                           for img in images)
+            del images
+            out.append(text)
+            found += len(text.strip())
+            if stop_after_chars and found >= stop_after_chars:
+                break
+        return out + [""] * (len(page_numbers) - len(out))
 except Exception:
-    _try_ocr = lambda fp, *a, **k: None
+    _pages_ocr = None
 
 
-def extract_text_from_filefield(file_field):
+def ocr_options():
+    """OCR keyword arguments from settings (read in the caller, not in pool workers)."""
+    from django.conf import settings
+    return {
+        "dpi": getattr(settings, 'PDF_OCR_DPI', 300),
+        "lang": getattr(settings, 'PDF_OCR_LANG', None),
+        "poppler_path": getattr(settings, 'PDF_OCR_POPPLER_PATH', None),
+        "max_pages": getattr(settings, 'PDF_OCR_MAX_PAGES', 4),
+        "stop_after_chars": getattr(settings, 'PDF_OCR_MIN_CHARS', 1500),
+    }
+
+
+# name -> page extractor; None when the library isn't installed
+EXTRACTORS = {
+    "pdfminer": _pages_pdfminer,
+    "pdfplumber": _pages_pdfplumber,
+    "pypdf2": _pages_pypdf2,
+    "ocr": _pages_ocr,
+}
+
+
+# Bump whenever the extractor chain changes: cached text is keyed by
+# sha256(file bytes) + extraction_version() (see text_cache.py).
+EXTRACTOR_VERSION = "2"
+
+
+def extraction_version():
+    """EXTRACTOR_VERSION plus the OCR config, so turning OCR on re-extracts scans."""
+    from django.conf import settings
+    if getattr(settings, 'PDF_OCR_ENABLED', False) and EXTRACTORS.get("ocr"):
+        return f"{EXTRACTOR_VERSION}+ocr{getattr(settings, 'PDF_OCR_DPI', 300)}{getattr(settings, 'PDF_OCR_LANG', '') or ''}"
+    return EXTRACTOR_VERSION
+
+
+def read_file_bytes(file_field):
     """
     Given a Django FieldFile / UploadedFile or a path-like string,
-    try several extractors and return text safely.
+    return the raw file bytes (or None).
     """
     if file_field is None:
-        return ""
+        return None
 
     file_obj = file_field
     file_path = None
@@ -183,41 +197,45 @@ def extract_text_from_filefield(file_field):
                 raw_bytes = f.read()
     except Exception:
         raw_bytes = None
+    return raw_bytes
 
+
+def extract_text_from_bytes(raw_bytes):
+    """
+    Text of raw PDF bytes (uncached). The PDF is sniffed once and routed to
+    the cheapest suitable extractor (see extractor_planner). No OCR here;
+    scanned files are handled by the background extraction service.
+    """
     if not raw_bytes:
         return ""
-
-    # Always give fresh BytesIO to each extractor
-    try:
-        if _pdfminer_extract_text:
-            txt = _try_pdfminer(io.BytesIO(raw_bytes))
-            if txt and txt.strip():
-                return txt
-    except Exception:
-        pass
-
-    try:
-        txt = _try_pdfplumber(io.BytesIO(raw_bytes))
-        if txt and txt.strip():
-            return txt
-    except Exception:
-        pass
-
+    from .extractor_planner import extract_planned
     try:
-        txt = _try_pypdf2(io.BytesIO(raw_bytes))
-        if txt and txt.strip():
-            return txt
+        return extract_planned(raw_bytes)
     except Exception:
-        pass
-
-    #try:
-        #txt = _try_ocr(io.BytesIO(raw_bytes))#
-        #if txt and txt.strip():
-            #return txt
-    #except Exception:
-        #pass
+        logger.exception("PDF extraction failed")
+        return ""
 
-   # return ""
 
+def extract_text_from_filefield(file_field):
+    """
+    Given a Django FieldFile / UploadedFile or a path-like string,
+    try several extractors and return text safely.
 
+    Results are cached by content hash, so the same file (or a duplicate
+    upload of it) is parsed once per EXTRACTOR_VERSION.
+    """
+    raw_bytes = read_file_bytes(file_field)
+    if not raw_bytes:
+        return ""
 
+    key = text_cache.cache_key(text_cache.file_digest(raw_bytes), extraction_version())
+    cached = text_cache.lookup(key)
+    if cached is not None:
+        return cached
+
+    txt = extract_text_from_bytes(raw_bytes)
+    # an empty result may be a scan the background OCR pass hasn't reached
+    # yet, so only real text is cached from here
+    if txt:
+        text_cache.store(key, txt)
+    return txt
@@ -0,0 +1,192 @@
+# resumes/utils/query_planner.py
+"""
+Serializer-driven queryset optimization.
+
+plan_for(SerializerClass, Model) walks the serializer's declared fields
+and works out what a list of it will touch:
+
+    nested serializer / "a.b" source over a FK or one-to-one -> select_related
+    many=True nested serializer, M2M, reverse FK            -> prefetch_related
+    plain model fields                                       -> only()
+
+SerializerMethodFields can't be inspected, so a serializer lists what its
+get_* methods read in `query_hints`, as model paths:
+
+    query_hints = {'candidate_name': ('user__username', 'user__email')}
+
+A method field without hints (or a source that isn't a model field, or
+source='*') makes its level load every column of that model, so a missing
+hint costs width, never an extra query per row. optimize(queryset,
+SerializerClass) applies the plan; plans are cached per class.
+"""
+import logging
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+from django.db.models import Prefetch
+from rest_framework import serializers
+
+logger = logging.getLogger(__name__)
+
+
+class QueryPlan:
+    def __init__(self):
+        self.select: set = set()
+        self.prefetch: Dict[str, Optional[type]] = {}   # path -> child serializer (or None)
+        self.columns: set = set()
+        self.full: set = set()                           # level prefixes loaded whole
+
+    def only_fields(self, model) -> Tuple[str, ...]:
+        """only() arguments; every level keeps its pk and the FKs it is joined through."""
+        cols = set(self.columns) | set(self.select)
+        for prefix in self.full:
+            level = _model_at(model, prefix)
+            cols.update(_join(prefix, f.name) for f in level._meta.concrete_fields)
+        return tuple(sorted(cols))
+
+    def __repr__(self):
+        return f"QueryPlan(select={sorted(self.select)}, prefetch={sorted(self.prefetch)}, columns={len(self.columns)})"
+
+
+def _join(prefix: str, name: str) -> str:
+    return f"{prefix}__{name}" if prefix else name
+
+
+def _model_at(model, prefix: str):
+    for part in filter(None, prefix.split('__')):
+        model = model._meta.get_field(part).related_model
+    return model
+
+
+def _get_field(model, name):
+    try:
+        return model._meta.get_field(name)
+    except Exception:
+        return None
+
+
+def _add_path(plan: QueryPlan, model, prefix: str, parts) -> None:
+    """One model path ("resume__user__email") from the level at `prefix`."""
+    for i, name in enumerate(parts):
+        field = _get_field(model, name)
+        if field is None:
+            # property / method: anything on this model may be read
+            plan.full.add(prefix)
+            return
+        path = _join(prefix, name)
+        if field.is_relation and (field.many_to_many or field.one_to_many):
+            plan.prefetch.setdefault(path, None)
+            return
+        if field.is_relation and not field.concrete:
+            # reverse one-to-one: joined, loaded whole
+            plan.select.add(path)
+            plan.full.add(path)
+            return
+        if not field.is_relation:
+            plan.columns.add(path)
+            return
+        if i == len(parts) - 1:
+            # a relation used as a value: its id, or the whole object when asked for it
+            plan.columns.add(path)
+            return
+        plan.select.add(path)
+        model, prefix = field.related_model, path
+
+
+def _walk(plan: QueryPlan, serializer, model, prefix: str) -> None:
+    plan.columns.add(_join(prefix, model._meta.pk.name))
+    hints = getattr(type(serializer), 'query_hints', {}) or {}
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if isinstance(field, serializers.SerializerMethodField):
+            if name not in hints:
+                plan.full.add(prefix)
+            for path in hints.get(name, ()):
+                _add_path(plan, model, prefix, path.split('__'))
+            continue
+
+        source = getattr(field, 'source', name)
+        if source == '*':
+            plan.full.add(prefix)
+            continue
+        attrs = source.split('.')
+
+        if isinstance(field, serializers.ListSerializer) or isinstance(field, serializers.ManyRelatedField):
+            child = getattr(field, 'child', None)
+            rel = _get_field(model, attrs[0])
+            if rel is None or len(attrs) > 1:
+                plan.full.add(prefix)
+                continue
+            path = _join(prefix, attrs[0])
+            plan.prefetch[path] = type(child) if isinstance(child, serializers.ModelSerializer) else None
+            continue
+
+        if isinstance(field, serializers.ModelSerializer):
+            # nested object: join every step, then plan the nested serializer at that level
+            rel_model = model
+            path = prefix
+            ok = True
+            for part in attrs:
+                rel = _get_field(rel_model, part)
+                if rel is None or not rel.is_relation or rel.many_to_many or rel.one_to_many:
+                    ok = False
+                    break
+                path = _join(path, part)
+                plan.select.add(path)
+                if not rel.concrete:
+                    plan.full.add(path)
+                rel_model = rel.related_model
+            if not ok:
+                plan.full.add(prefix)
+                continue
+            _walk(plan, field, rel_model, path)
+            continue
+
+        if isinstance(field, serializers.RelatedField) and not isinstance(field, serializers.PrimaryKeyRelatedField):
+            # StringRelatedField / SlugRelatedField ...: needs the related object
+            _add_path(plan, model, prefix, attrs)
+            rel = _get_field(model, attrs[0])
+            if rel is not None and rel.is_relation and rel.concrete and not rel.many_to_many:
+                path = _join(prefix, attrs[0])
+                plan.select.add(path)
+                plan.full.add(path)
+            continue
+
+        _add_path(plan, model, prefix, attrs)
+
+
+@lru_cache(maxsize=None)
+def plan_for(serializer_class, model) -> QueryPlan:
+    plan = QueryPlan()
+    _walk(plan, serializer_class(), model, '')
+    return plan
+
+
+def optimize(queryset, serializer_class, only: bool = True):
+    """
+    queryset with the select_related / prefetch_related (and, unless
+    only=False, the only()) that serializing it with serializer_class needs.
+    """
+    model = queryset.model
+    plan = plan_for(serializer_class, model)
+    if plan.select:
+        queryset = queryset.select_related(*sorted(plan.select))
+    for path, child in sorted(plan.prefetch.items()):
+        if child is not None:
+            rel_model = _model_at(model, path)
+            # joins only: the child rows also need the FK back to the parent
+            queryset = queryset.prefetch_related(Prefetch(path, queryset=optimize(rel_model.objects.all(), child, only=False)))
+        else:
+            queryset = queryset.prefetch_related(path)
+    if only and '' not in plan.full:
+        queryset = queryset.only(*plan.only_fields(model))
+    return queryset
+
+
+class OptimizedQuerysetMixin:
+    """ViewSet mixin: get_queryset() is optimized for the serializer; only() on reads."""
+
+    def get_queryset(self):
+        qs = super().get_queryset()
+        return optimize(qs, self.get_serializer_class(), only=getattr(self, 'action', None) in ('list', 'retrieve'))
@@ -0,0 +1,402 @@
+# resumes/utils/ranking_store.py
+"""
+Incrementally maintained rankings: one sorted set per job,
+job:<job_id> = (resume id -> score), read by match_resumes.
+
+Maintenance (Celery tasks in tasks.py, scheduled from signals.py):
+- a resume is created / changed: its scores against every job are computed
+  in one vectorized pass (rank_jobs_for_resume) and upserted into each
+  job:<id> set
+- a resume is deleted: it is removed from every job set
+- a job is created / changed: only job:<id> is rebuilt (one full ranking)
+- a job is deleted: its set is dropped
+
+Both passes also feed the materialized resume -> job recommendations
+(recommendations.py), which is why they return the scores they computed.
+
+Reads are then a range over one sorted set, O(page), or (with a
+match_resumes cursor) the range after a given (score, resume id), found by
+bisect / ZRANK in O(log n) rather than by offset. A set only serves
+reads once it has been fully built ("ready"); until then callers use the
+match cache and schedule a rebuild.
+
+Backends: Redis sorted sets when REDIS_URL is set (shared by all workers),
+otherwise an in-process dict + bisect-maintained sorted list per set, which
+is only coherent within one process (dev / eager Celery).
+"""
+import bisect
+import logging
+import queue
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+
+# recomputed vs stored score difference that marks a set as out of date
+SCORE_DRIFT = 1e-6
+
+
+def job_key(job_id) -> str:
+    return f"job:{job_id}"
+
+
+class LocalRankingStore:
+    """Per-process sorted sets; each kept as {member: score} + a sorted list."""
+
+    def __init__(self):
+        self._scores: Dict[str, Dict[int, float]] = {}
+        self._order: Dict[str, List[Tuple[float, int]]] = {}
+        self._ready = set()
+        self._lock = threading.RLock()
+
+    def _upsert_one(self, key, member, score):
+        scores = self._scores.setdefault(key, {})
+        order = self._order.setdefault(key, [])
+        old = scores.get(member)
+        if old is not None:
+            i = bisect.bisect_left(order, (-old, member))
+            if i < len(order) and order[i] == (-old, member):
+                order.pop(i)
+        scores[member] = score
+        bisect.insort(order, (-score, member))
+
+    def replace(self, key: str, mapping: Dict[int, float]):
+        with self._lock:
+            self._scores[key] = dict(mapping)
+            self._order[key] = sorted((-s, m) for m, s in mapping.items())
+            self._ready.add(key)
+
+    def upsert_many(self, items: Iterable[Tuple[str, int, float]]):
+        with self._lock:
+            for key, member, score in items:
+                self._upsert_one(key, member, score)
+
+    def remove_many(self, items: Iterable[Tuple[str, int]]):
+        with self._lock:
+            for key, member in items:
+                old = self._scores.get(key, {}).pop(member, None)
+                if old is not None:
+                    order = self._order[key]
+                    i = bisect.bisect_left(order, (-old, member))
+                    if i < len(order) and order[i] == (-old, member):
+                        order.pop(i)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._scores.pop(key, None)
+            self._order.pop(key, None)
+            self._ready.discard(key)
+
+    def members(self, key: str) -> List[int]:
+        with self._lock:
+            return list(self._scores.get(key, {}))
+
+    def is_ready(self, key: str) -> bool:
+        return key in self._ready
+
+    def count(self, key: str) -> int:
+        return len(self._scores.get(key, {}))
+
+    def range(self, key: str, start: int, end: int) -> List[Tuple[int, float]]:
+        with self._lock:
+            return [(m, -s) for s, m in self._order.get(key, [])[start:end]]
+
+    def range_after(self, key: str, score: float, member: int, limit: int) -> List[Tuple[int, float]]:
+        with self._lock:
+            order = self._order.get(key, [])
+            i = bisect.bisect_right(order, (-score, member))
+            return [(m, -s) for s, m in order[i:i + limit]]
+
+
+class RedisRankingStore:
+    """
+    One Redis sorted set per key. Ties must order like LocalRankingStore
+    (score desc, then resume id asc), and Redis breaks ties by member bytes,
+    so members are zero-padded ids and scores are stored negated: ZRANGE
+    then reads score desc, id asc. (Plain str(id) members sorted "10" before
+    "9"; sets in that old layout lived under "rank:" and are simply rebuilt.)
+    """
+    prefix = "ranking:"
+
+    def __init__(self, url: str):
+        import redis
+        self.client = redis.Redis.from_url(url)
+
+    def _k(self, key):
+        return self.prefix + key
+
+    @staticmethod
+    def _member(member: int) -> str:
+        return f"{int(member):012d}"
+
+    @staticmethod
+    def _rows(rows) -> List[Tuple[int, float]]:
+        return [(int(m), -float(s)) for m, s in rows]
+
+    def replace(self, key: str, mapping: Dict[int, float]):
+        # build aside and RENAME, so readers never see a half-built set
+        tmp = self._k(key) + ":tmp"
+        pipe = self.client.pipeline()
+        pipe.delete(tmp)
+        if mapping:
+            pipe.zadd(tmp, {self._member(m): -s for m, s in mapping.items()})
+            pipe.rename(tmp, self._k(key))
+        else:
+            pipe.delete(self._k(key))
+        pipe.set(self._k(key) + ":ready", 1)
+        pipe.execute()
+
+    def upsert_many(self, items: Iterable[Tuple[str, int, float]]):
+        pipe = self.client.pipeline(transaction=False)
+        for key, member, score in items:
+            pipe.zadd(self._k(key), {self._member(member): -score})
+        pipe.execute()
+
+    def remove_many(self, items: Iterable[Tuple[str, int]]):
+        pipe = self.client.pipeline(transaction=False)
+        for key, member in items:
+            pipe.zrem(self._k(key), self._member(member))
+        pipe.execute()
+
+    def delete(self, key: str):
+        self.client.delete(self._k(key), self._k(key) + ":ready")
+
+    def members(self, key: str) -> List[int]:
+        return [int(m) for m in self.client.zrange(self._k(key), 0, -1)]
+
+    def is_ready(self, key: str) -> bool:
+        return bool(self.client.exists(self._k(key) + ":ready"))
+
+    def count(self, key: str) -> int:
+        return int(self.client.zcard(self._k(key)))
+
+    def range(self, key: str, start: int, end: int) -> List[Tuple[int, float]]:
+        if end <= start:
+            return []
+        return self._rows(self.client.zrange(self._k(key), start, end - 1, withscores=True))
+
+    def range_after(self, key: str, score: float, member: int, limit: int) -> List[Tuple[int, float]]:
+        k = self._k(key)
+        name = self._member(member)
+        pipe = self.client.pipeline(transaction=False)
+        pipe.zrank(k, name)
+        pipe.zscore(k, name)
+        rank, current = pipe.execute()
+        if rank is not None and current is not None and -float(current) == score:
+            return self._rows(self.client.zrange(k, rank + 1, rank + limit, withscores=True))
+        # the cursor's row moved or left the set: continue where it would sit,
+        # i.e. after equal-score rows with a lower id, then below its score
+        ties = self.client.zrangebyscore(k, -score, -score, withscores=True)
+        rows = [(m, s) for m, s in ties if m > name.encode()][:limit]
+        if len(rows) < limit:
+            rows += self.client.zrangebyscore(k, f"({-score}", '+inf', start=0, num=limit - len(rows),
+                                              withscores=True)
+        return self._rows(rows)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                backend = getattr(settings, 'RANKING_STORE_BACKEND', 'auto')
+                url = getattr(settings, 'REDIS_URL', '')
+                if backend == 'redis' or (backend == 'auto' and url):
+                    _store = RedisRankingStore(url)
+                else:
+                    _store = LocalRankingStore()
+    return _store
+
+
+# -------------------- maintenance --------------------
+def rebuild_job(job) -> Dict[int, float]:
+    """Full ranking for one job -> job:<id>. Returns {resume_id: score}."""
+    from .match_cache import compute_job_ranking
+
+    _, rows = compute_job_ranking(job)
+    scores = {r["resume_id"]: r["score"] for r in rows}
+    get_store().replace(job_key(job.id), scores)
+    return scores
+
+
+def update_resume(resume) -> Optional[Dict[int, float]]:
+    """
+    One resume against every job, upserted into the job sets. Returns
+    {job_id: score}; jobs the vector prefilter cuts lose their stale score
+    for this resume. A resume that isn't a candidate (candidate_filters:
+    a recruiter's, empty, or superseded by a newer upload) is removed from
+    the sets instead and None is returned.
+    """
+    from resumes.models import Job
+    from .candidate_filters import is_eligible
+    from .match_cache import get_resume_text
+    from .matching import rank_jobs_for_resume
+    from .tfidf_index import get_index
+    from .vector_index import prefilter
+
+    if not is_eligible(resume.id):
+        remove_resume(resume.id)
+        return None
+    store = get_store()
+    index = get_index()
+    text = None if index is not None and index.contains(resume.id) else get_resume_text(resume)
+    all_jobs = list(Job.objects.all())
+    jobs = prefilter('job', resume, all_jobs)
+    rows = rank_jobs_for_resume(resume, jobs, text or '', index=index)
+    scores = {r["job_id"]: r["score"] for r in rows}
+    store.upsert_many((job_key(jid), resume.id, s) for jid, s in scores.items())
+    store.remove_many((job_key(j.id), resume.id) for j in all_jobs if j.id not in scores)
+    return scores
+
+
+def remove_resume(resume_id):
+    from resumes.models import Job
+    job_ids = Job.objects.values_list('id', flat=True).iterator()
+    get_store().remove_many((job_key(jid), resume_id) for jid in job_ids)
+
+
+def remove_job(job_id):
+    get_store().delete(job_key(job_id))
+
+
+# -------------------- reads --------------------
+def page_for_job(job_id, start: int, end: int) -> Optional[Tuple[int, List[Tuple[int, float]]]]:
+    """
+    (total, [(resume_id, score)]) for one page, or None if the set isn't
+    built. total is the eligible pool, counted before the vector prefilter.
+    """
+    from .match_cache import pool_total
+
+    store = get_store()
+    key = job_key(job_id)
+    if not store.is_ready(key):
+        return None
+    return pool_total(store.count(key)), store.range(key, start, end)
+
+
+def page_after_for_job(job_id, after: Tuple[float, int], limit: int) -> Optional[Tuple[int, List[Tuple[int, float]]]]:
+    """Like page_for_job, for the `limit` rows ranked after (score, resume_id)."""
+    from .match_cache import pool_total
+
+    store = get_store()
+    key = job_key(job_id)
+    if not store.is_ready(key):
+        return None
+    score, resume_id = after
+    return pool_total(store.count(key)), store.range_after(key, score, resume_id, limit)
+
+
+def rows_for_page(job, ranked: List[Tuple[int, float]]) -> List[dict]:
+    """
+    Full match rows (user, skills, missing_skills, ...) for just this page,
+    in stored order. "score" is the stored score the page (and its cursor)
+    is ordered by; if re-scoring disagrees (corpus idf or a model changed
+    since the set was built), the set is rebuilt in the background.
+    """
+    from resumes.models import Resume
+    from .match_cache import job_embedding_for, resume_texts_for
+    from .matching import rank_resumes_for_job
+    from .tfidf_index import get_index
+
+    ids = [rid for rid, _ in ranked]
+    resumes = list(Resume.objects.select_related('user').filter(id__in=ids))
+    if not resumes:
+        return []
+    index = get_index()
+    _, rows = rank_resumes_for_job(
+        job, resumes, resume_texts_for(resumes, index), job_embedding=job_embedding_for(job), index=index
+    )
+    by_id = {r["resume_id"]: r for r in rows}
+    out = []
+    drifted = False
+    for rid, stored in ranked:
+        row = by_id.get(rid)
+        if row is None:
+            continue
+        drifted = drifted or abs(row["score"] - stored) > SCORE_DRIFT
+        out.append(dict(row, score=stored))
+    # without a TF-IDF index the page's idf is fitted over the page alone, so only indexed scores compare
+    if drifted and index is not None:
+        schedule_job_rebuild(job.id)
+    return out
+
+
+# -------------------- scheduling --------------------
+_local_queue: "queue.Queue" = queue.Queue()
+_local_worker = None
+_local_worker_lock = threading.Lock()
+
+
+def _local_loop():
+    from django.db import close_old_connections
+    while True:
+        task, args = _local_queue.get()
+        try:
+            task(*args)
+        except Exception:
+            logger.exception("ranking update %s%s failed", task.name, args)
+        finally:
+            close_old_connections()
+
+
+def _dispatch(task, *args, dedupe_key: Optional[str] = None):
+    """
+    Run a maintenance task in the background after the current transaction
+    commits. Without a broker (eager mode) a single local worker thread runs
+    them in order, so a later update can't be overwritten by an earlier one.
+    """
+    global _local_worker
+    if getattr(settings, 'CELERY_TASK_ALWAYS_EAGER', False):
+        with _local_worker_lock:
+            if _local_worker is None:
+                _local_worker = threading.Thread(target=_local_loop, name="ranking-store", daemon=True)
+                _local_worker.start()
+        transaction.on_commit(lambda: _local_queue.put((task, args)))
+        return
+
+    delay = getattr(settings, 'RANKING_UPDATE_DELAY', 2)
+    # several saves in a row (upload = create + update) -> one task that reads the final state
+    if dedupe_key and not cache.add(dedupe_key, 1, delay + 30):
+        return
+
+    def send():
+        try:
+            task.apply_async(args, countdown=delay)
+        except Exception as e:
+            logger.warning("Celery enqueue failed; ranking update %s%s skipped: %s", task.name, args, e)
+            if dedupe_key:
+                cache.delete(dedupe_key)
+    transaction.on_commit(send)
+
+
+def pending_key(kind: str, obj_id) -> str:
+    return f"rank_pending_{kind}_{obj_id}"
+
+
+def schedule_resume_update(resume_id):
+    from resumes.tasks import update_resume_ranking
+    _dispatch(update_resume_ranking, resume_id, dedupe_key=pending_key("resume", resume_id))
+
+
+def schedule_resume_removal(resume_id):
+    from resumes.tasks import remove_resume_ranking
+    _dispatch(remove_resume_ranking, resume_id)
+
+
+def schedule_job_rebuild(job_id):
+    from resumes.tasks import rebuild_job_ranking
+    _dispatch(rebuild_job_ranking, job_id, dedupe_key=pending_key("job", job_id))
+
+
+def schedule_job_removal(job_id):
+    from resumes.tasks import remove_job_ranking
+    _dispatch(remove_job_ranking, job_id)
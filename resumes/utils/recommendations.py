@@ -0,0 +1,162 @@
+# resumes/utils/recommendations.py
+"""
+Materialized resume -> job recommendations (ResumeRecommendation).
+
+recommended_jobs reads one row by primary key instead of scoring the
+resume against every job. Rows are written in the background:
+
+- resume uploaded / changed: the update_resume_ranking task already scores
+  the resume against every job; the best RECOMMENDATIONS_TOP_K are stored
+- job created / changed: the rebuild_job_ranking task already scores every
+  resume against the job; the job is merged into each existing row. A row
+  where that job fell below its old K-th score (a job never stored could now
+  outrank it), or where the job is no longer scored at all, is re-scored in
+  full in the background
+- job deleted: ids that no longer exist are dropped when the row is read
+- resume superseded by a newer upload: its row is dropped; only canonical
+  resumes (Resume.is_latest) are materialized
+
+Rows older than RECOMMENDATIONS_MAX_AGE are still served, and a refresh is
+scheduled. Only a resume with no row at all is scored synchronously.
+
+Superseded resumes (?include_history=1) are never materialized; their best
+K are kept in the cache (history_for_resume) per resume version until any
+job changes.
+
+recommended_jobs therefore returns at most RECOMMENDATIONS_TOP_K jobs (the
+response says so in "top_k"); ?limit= only narrows that further.
+"""
+import logging
+from datetime import timedelta
+from typing import Callable, Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+HISTORY_KEY = "history_recs_{}_{}_{}"
+HISTORY_GEN_KEY = "history_recs_gen"
+
+
+def top_k() -> int:
+    return getattr(settings, 'RECOMMENDATIONS_TOP_K', 50)
+
+
+def _best(scores: Dict[int, float], k: int):
+    # score desc, job id asc for ties
+    ranked = sorted(scores.items(), key=lambda kv: (-kv[1], kv[0]))[:k]
+    return [jid for jid, _ in ranked], [float(s) for _, s in ranked]
+
+
+def store_for_resume(resume_id, scores: Dict[int, float]):
+    """Keep the best K of a full {job_id: score} map for one resume."""
+    from resumes.models import ResumeRecommendation
+
+    job_ids, vals = _best(scores, top_k())
+    ResumeRecommendation.objects.update_or_create(
+        resume_id=resume_id,
+        defaults={"job_ids": job_ids, "scores": vals, "computed_at": timezone.now()},
+    )
+
+
+def drop_for_resume(resume_id):
+    from resumes.models import ResumeRecommendation
+    ResumeRecommendation.objects.filter(resume_id=resume_id).delete()
+
+
+def merge_job(job_id, scores: Dict[int, float], chunk_size: int = 500) -> int:
+    """
+    Merge one job's {resume_id: score} into the existing rows. Rows keep
+    their computed_at: only this job's entry is new. Rows the merge can't
+    settle on their own get a full refresh scheduled.
+    """
+    from resumes.models import ResumeRecommendation
+    from .ranking_store import schedule_resume_update
+
+    k = top_k()
+    changed = []
+    refresh = []
+    updated = 0
+    qs = ResumeRecommendation.objects.only('resume_id', 'job_ids', 'scores')
+    for rec in qs.iterator(chunk_size=chunk_size):
+        score = scores.get(rec.resume_id)
+        stored = job_id in rec.job_ids
+        if score is None:
+            # not scored against this job any more (pre-filtered out): its entry is stale
+            if stored:
+                refresh.append(rec.resume_id)
+            continue
+        full = len(rec.job_ids) >= k
+        if full and stored and rec.scores and score < min(rec.scores):
+            # unstored jobs score up to the old K-th score, so one may now outrank this job
+            refresh.append(rec.resume_id)
+        current = dict(zip(rec.job_ids, rec.scores))
+        current.pop(job_id, None)
+        if full and current and score <= min(current.values()) and not stored:
+            continue
+        current[job_id] = score
+        rec.job_ids, rec.scores = _best(current, k)
+        changed.append(rec)
+        if len(changed) >= chunk_size:
+            ResumeRecommendation.objects.bulk_update(changed, ['job_ids', 'scores'])
+            updated += len(changed)
+            changed = []
+    if changed:
+        ResumeRecommendation.objects.bulk_update(changed, ['job_ids', 'scores'])
+        updated += len(changed)
+    for resume_id in refresh:
+        schedule_resume_update(resume_id)
+    return updated
+
+
+def get_for_resume(resume_id):
+    """The stored row (or None). Schedules a refresh when it is stale."""
+    from resumes.models import ResumeRecommendation
+    from .ranking_store import schedule_resume_update
+
+    rec = ResumeRecommendation.objects.filter(resume_id=resume_id).first()
+    if rec is None:
+        return None
+    max_age = getattr(settings, 'RECOMMENDATIONS_MAX_AGE', 24 * 3600)
+    if rec.computed_at < timezone.now() - timedelta(seconds=max_age):
+        schedule_resume_update(resume_id)
+    return rec
+
+
+def rows_for(rec, limit: Optional[int] = None) -> List[dict]:
+    """Response rows for a stored recommendation; deleted jobs are skipped."""
+    from resumes.models import Job
+
+    pairs = list(zip(rec.job_ids, rec.scores))
+    jobs = Job.objects.only('id', 'title', 'company', 'skills_required').in_bulk([jid for jid, _ in pairs])
+    rows = [{
+        "job_id": jid,
+        "title": jobs[jid].title,
+        "company": jobs[jid].company,
+        "skills_required": jobs[jid].skills_required,
+        "score": score,
+    } for jid, score in pairs if jid in jobs]
+    return rows[:limit] if limit is not None else rows
+
+
+def _history_generation() -> int:
+    cache.add(HISTORY_GEN_KEY, 1, None)
+    return cache.get(HISTORY_GEN_KEY) or 1
+
+
+def invalidate_history():
+    """A job changed: drop every cached superseded-resume result at once."""
+    cache.add(HISTORY_GEN_KEY, 1, None)
+    cache.incr(HISTORY_GEN_KEY)
+
+
+def history_for_resume(resume, compute: Callable[[], List[dict]]) -> List[dict]:
+    """Best K rows of a superseded resume; compute() scores it on a cache miss."""
+    key = HISTORY_KEY.format(_history_generation(), resume.id, resume.features_source_hash or '')
+    rows = cache.get(key)
+    if rows is None:
+        rows = compute()[:top_k()]
+        cache.set(key, rows, getattr(settings, 'RECOMMENDATIONS_HISTORY_TTL', 3600))
+    return rows
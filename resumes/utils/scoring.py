@@ -1,191 +1,283 @@
 # resumes/utils/scoring.py
-import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
+"""
+One scoring engine with named strategies.
+
+There used to be three unrelated score_resume_for_job functions (this
+module, utils/ats.py and the shadowed resumes/utils.py), each tokenizing
+both texts its own way on every call. Now:
 
+- prepare() turns a text (+ skills / experience / embedding) into a
+  Document; its tokens live in a Features record (feature_store), stored
+  on saved resumes / jobs and built once otherwise, so strategies only do
+  array and set operations
+- strategies are registered by name and are batch-first:
+  fn(query, docs) -> np.ndarray of 0..100 scores, one per doc
+- score_batch() / score_resume_for_job() are the entry points; the
+  single-pair function is just a batch of one
 
-    
-    
+Built-in strategies:
 
+    blend        embedding + TF-IDF + skills: matching.blend_batch, the same
+                 function matching.rank_resumes_for_job scores with
+    keyword      uni+bigram Jaccard, keyword coverage and experience fit
+                 (the former ats.py scorer; no heavy dependencies)
+    tfidf_ngram  TF-IDF over keyword uni+bigrams (the former resumes/utils.py
+                 scorer, which used sklearn)
 
-from typing import Optional, Dict, Any, Iterable
-import math
+benchmark() times each strategy over a corpus and reports how closely its
+rankings agree with a reference strategy (manage.py benchmark_scoring).
+"""
 import logging
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from . import skill_bits
+from .feature_store import (
+    Features, build_features, features_for, overlap_counts, tfidf_cosine,
+)
+from .matching import blend_batch, job_text_for
 
 logger = logging.getLogger(__name__)
 
-# sklearn imports are optional (TF-IDF fallback)
-try:
-    from sklearn.feature_extraction.text import TfidfVectorizer
-    from sklearn.metrics.pairwise import cosine_similarity
-except Exception:
-    TfidfVectorizer = None
-    cosine_similarity = None
+DEFAULT_STRATEGY = "blend"
+
+
+# -------------------- documents --------------------
+class Document:
+    """
+    One side of a comparison: its pre-tokenized Features (feature_store)
+    plus the few raw values strategies need. Features come from the stored
+    record when the document is a saved Resume / Job, otherwise they are
+    built once, on first use.
+    """
 
-# numpy for embedding math (optional)
-try:
-    import numpy as np
-except Exception:
-    np = None
+    __slots__ = ('id', 'text', 'skills', 'experience', 'embedding', '_features')
 
+    def __init__(self, text: str = "", skills: Optional[str] = None, experience=None,
+                 embedding=None, id=None, features: Optional[Features] = None):
+        self.id = id
+        self.text = (text or "").strip()
+        self.skills = skills or ""
+        self.experience = experience
+        self.embedding = embedding
+        self._features = features
 
-def _safe_cosine_similarity(a: Iterable[float], b: Iterable[float]) -> float:
-    """Return cosine similarity in range [0.0, 1.0]. Safe to None/zero lengths."""
-    try:
-        if np is None:
-            # simple python fallback (less efficient)
-            a_list = list(a)
-            b_list = list(b)
-            denom = math.sqrt(sum(x * x for x in a_list)) * math.sqrt(sum(x * x for x in b_list))
-            if denom == 0:
-                return 0.0
-            dot = sum(x * y for x, y in zip(a_list, b_list))
-            return max(0.0, min(1.0, float(dot / denom)))
-        else:
-            a_arr = np.array(a, dtype=float)
-            b_arr = np.array(b, dtype=float)
-            denom = (np.linalg.norm(a_arr) * np.linalg.norm(b_arr))
-            if denom == 0:
-                return 0.0
-            sim = float(np.dot(a_arr, b_arr) / denom)
-            return max(0.0, min(1.0, sim))
-    except Exception:
-        logger.exception("safe cosine similarity failure")
-        return 0.0
-
-
-def _tfidf_pct(job_text: str, resume_text: str) -> float:
-    """Return TF-IDF cosine similarity * 100.0. If sklearn not present, return 0.0."""
-    try:
-        if not job_text or not resume_text:
-            return 0.0
-        if TfidfVectorizer is None or cosine_similarity is None:
-            return 0.0
-        vec = TfidfVectorizer(stop_words='english').fit([job_text, resume_text])
-        job_v = vec.transform([job_text])
-        res_v = vec.transform([resume_text])
-        sim = cosine_similarity(job_v, res_v)[0][0]
-        return float(sim * 100.0)
-    except Exception:
-        logger.exception("TFIDF similarity failed")
-        return 0.0
-
-
-def _skills_pct(job_skills: Optional[str], resume_skills: Optional[str]) -> float:
-    """Very small, robust skill overlap score (0..100). Input: CSV-ish strings."""
+    @property
+    def features(self) -> Features:
+        if self._features is None:
+            self._features = build_features(self.text, self.skills, self.experience)
+        return self._features
+
+    def warm(self) -> "Document":
+        """Build the features now (e.g. before timing)."""
+        self.features
+        return self
+
+
+def prepare(text: str, skills: Optional[str] = None, experience=None, embedding=None, id=None) -> Document:
+    return Document(text, skills=skills, experience=experience, embedding=embedding, id=id)
+
+
+def prepare_job(job) -> Document:
+    return Document(
+        job_text_for(job),
+        skills=getattr(job, 'skills_required', ''),
+        experience=getattr(job, 'experience_required', None),
+        embedding=getattr(job, 'embedding', None),
+        id=getattr(job, 'id', None),
+        features=features_for(job),
+    )
+
+
+def prepare_resume(resume, text: Optional[str] = None) -> Document:
+    return Document(
+        text if text is not None else (getattr(resume, 'extracted_text', '') or ''),
+        skills=getattr(resume, 'skills', ''),
+        experience=getattr(resume, 'experience', None),
+        embedding=getattr(resume, 'embedding', None),
+        id=getattr(resume, 'id', None),
+        features=features_for(resume, text),
+    )
+
+
+# -------------------- registry --------------------
+Strategy = Callable[[Document, Sequence[Document]], np.ndarray]
+STRATEGIES: Dict[str, Strategy] = {}
+
+
+def register(name: str):
+    """Decorator: register fn(query, docs) -> np.ndarray (0..100 per doc) under `name`."""
+    def deco(fn: Strategy) -> Strategy:
+        STRATEGIES[name] = fn
+        return fn
+    return deco
+
+
+def get_strategy(name: Optional[str] = None) -> Strategy:
+    name = name or DEFAULT_STRATEGY
     try:
-        js = set([s.strip().lower() for s in (job_skills or "").split(',') if s.strip()])
-        rs = set([s.strip().lower() for s in (resume_skills or "").split(',') if s.strip()])
-        if not js:
-            return 0.0
-        common = js & rs
-        pct = (len(common) / len(js)) * 100.0
-        return round(float(pct), 2)
-    except Exception:
-        logger.exception("skills pct failed")
-        return 0.0
-
-
-def score_resume_for_job(job_text: str,
-                         resume_text: str,
+        return STRATEGIES[name]
+    except KeyError:
+        raise ValueError(f"unknown scoring strategy {name!r} (available: {', '.join(sorted(STRATEGIES))})")
+
+
+def score_batch(query: Document, docs: Sequence[Document], strategy: Optional[str] = None) -> np.ndarray:
+    """Scores (0..100) of every doc against `query`, in input order."""
+    if not docs:
+        return np.zeros(0, dtype=np.float64)
+    scores = np.asarray(get_strategy(strategy)(query, docs), dtype=np.float64)
+    return np.clip(np.round(scores, 2), 0.0, 100.0)
+
+
+def score_resume_for_job(job_text: str, resume_text: str,
                          job_skills: Optional[str] = None,
                          resume_skills: Optional[str] = None,
-                         model: Optional[Any] = None) -> Dict[str, Any]:
+                         strategy: Optional[str] = None,
+                         **extra) -> float:
     """
-    Score a resume vs job, prefer embeddings if model provided.
+    Single job/resume score (0..100). `extra` may carry job_experience,
+    resume_experience, job_embedding and resume_embedding.
+    """
+    query = prepare(job_text, skills=job_skills, experience=extra.get('job_experience'),
+                    embedding=extra.get('job_embedding'))
+    doc = prepare(resume_text, skills=resume_skills, experience=extra.get('resume_experience'),
+                  embedding=extra.get('resume_embedding'))
+    return float(score_batch(query, [doc], strategy)[0])
+
+
+# -------------------- strategies --------------------
+@register("blend")
+def blend_strategy(query: Document, docs: Sequence[Document]) -> np.ndarray:
+    # documents without stored bits are encoded from their skills field
+    return blend_batch(
+        query.features, query.skills, query.embedding,
+        [d.features for d in docs], [skill_bits.bits_for(d) for d in docs], [d.embedding for d in docs],
+    ).final
+
+
+KEYWORD_WEIGHTS = {'sim': 0.6, 'kw': 0.3, 'exp': 0.1}
+
+
+def experience_fit(required: Optional[float], have: Optional[float]) -> float:
+    """1.0 when `have` years meet `required` (or nothing is required), else the ratio."""
+    j = required or 0.0
+    r = have or 0.0
+    if j <= 0 or r >= j:
+        return 1.0
+    return max(0.0, r / j)
+
+
+@register("keyword")
+def keyword_strategy(query: Document, docs: Sequence[Document]) -> np.ndarray:
+    q = query.features
+    feats = [d.features for d in docs]
+    w = KEYWORD_WEIGHTS
+
+    # uni+bigram Jaccard
+    inter = overlap_counts(q.ngram_ids, [f.ngram_ids for f in feats])
+    sizes = np.fromiter((f.ngram_ids.size for f in feats), dtype=np.float64, count=len(feats))
+    union = q.ngram_ids.size + sizes - inter
+    sim = np.where((sizes > 0) & (q.ngram_ids.size > 0), inter / np.maximum(union, 1.0), 0.0)
+
+    # share of the job's keywords present, boosted by its listed skills
+    kw = np.zeros(len(feats), dtype=np.float64)
+    if q.kw_ids.size:
+        kw = overlap_counts(q.kw_ids, [f.kw_ids for f in feats]) / q.kw_ids.size
+        if q.skill_ids.size:
+            boost = overlap_counts(q.skill_ids, [f.kw_ids for f in feats]) / q.skill_ids.size * 0.5
+            kw = np.minimum(1.0, kw + np.minimum(0.5, boost))
+
+    exp = np.fromiter((experience_fit(q.experience, f.experience) for f in feats), dtype=np.float64, count=len(feats))
+    return np.clip(w['sim'] * sim + w['kw'] * kw + w['exp'] * exp, 0.0, 1.0) * 100.0
+
+
+@register("tfidf_ngram")
+def tfidf_ngram_strategy(query: Document, docs: Sequence[Document]) -> np.ndarray:
+    """uni+bigram TF-IDF cosine over keyword terms; one idf fitted over the whole batch."""
+    q = query.features
+    feats = [d.features for d in docs]
+    return tfidf_cosine(q.ngram_ids, q.ngram_counts,
+                        [f.ngram_ids for f in feats], [f.ngram_counts for f in feats]) * 100.0
 
-    - job_text, resume_text: strings
-    - job_skills, resume_skills: comma-separated strings
-    - model: optional embedding model (must expose `.encode(text, convert_to_numpy=True)` or `.encode(text)`)
 
-    Returns dict:
-      { score, embedding_pct, tfidf_pct, skills_pct, explain }
+# -------------------- benchmark --------------------
+def _ranks(scores: np.ndarray) -> np.ndarray:
+    """Average ranks (ties share the mean rank), for Spearman correlation."""
+    order = np.argsort(-scores, kind='stable')
+    ranks = np.empty(scores.size, dtype=np.float64)
+    ranks[order] = np.arange(scores.size, dtype=np.float64)
+    for v in np.unique(scores):
+        tie = scores == v
+        if tie.sum() > 1:
+            ranks[tie] = ranks[tie].mean()
+    return ranks
+
+
+def spearman(a: np.ndarray, b: np.ndarray) -> Optional[float]:
+    if a.size < 2:
+        return None
+    ra, rb = _ranks(a), _ranks(b)
+    if ra.std() == 0 or rb.std() == 0:
+        return None
+    return float(np.corrcoef(ra, rb)[0, 1])
+
+
+def top_k_overlap(a: np.ndarray, b: np.ndarray, k: int) -> Optional[float]:
+    k = min(k, a.size)
+    if k <= 0:
+        return None
+    top_a = set(np.argsort(-a, kind='stable')[:k].tolist())
+    top_b = set(np.argsort(-b, kind='stable')[:k].tolist())
+    return len(top_a & top_b) / k
+
+
+def benchmark(queries: Sequence[Document], docs: Sequence[Document],
+              strategies: Optional[Iterable[str]] = None,
+              reference: str = DEFAULT_STRATEGY,
+              repeats: int = 3, k: int = 10) -> Dict[str, Dict[str, Any]]:
     """
-    # normalize
-    job_text_local = (job_text or "").strip()
-    resume_text_local = (resume_text or "").strip()
-
-    result = {
-        "score": 0.0,
-        "embedding_pct": 0.0,
-        "tfidf_pct": 0.0,
-        "skills_pct": 0.0,
-        "explain": {}
-    }
-
-    # quick exit if no job text
-    if not job_text_local:
-        return result
-
-    # 1) Try embedding similarity if model provided
-    used_embedding = False
-    if model is not None:
-        try:
-            # support either numpy or python list outputs
-            job_emb = None
-            try:
-                job_emb = model.encode(job_text_local, convert_to_numpy=True)
-            except TypeError:
-                # some local models may not accept convert_to_numpy
-                job_emb = model.encode(job_text_local)
-            except Exception:
-                # other errors - try plain encode
-                try:
-                    job_emb = model.encode(job_text_local)
-                except Exception:
-                    job_emb = None
-
-            # same for resume
-            resume_emb = None
-            try:
-                resume_emb = model.encode(resume_text_local, convert_to_numpy=True)
-            except Exception:
-                try:
-                    resume_emb = model.encode(resume_text_local)
-                except Exception:
-                    resume_emb = None
-
-            if job_emb is not None and resume_emb is not None:
-                sim = _safe_cosine_similarity(job_emb, resume_emb)
-                embedding_pct = float(sim * 100.0)
-                result["embedding_pct"] = round(embedding_pct, 4)
-                used_embedding = True
-        except Exception:
-            logger.exception("Embedding scoring failed")
-
-    # 2) TF-IDF fallback (or always compute for comparison)
-    try:
-        tfidf_pct = _tfidf_pct(job_text_local, resume_text_local)
-        result["tfidf_pct"] = round(float(tfidf_pct), 4)
-    except Exception:
-        result["tfidf_pct"] = 0.0
+    Time every strategy on every query (best of `repeats`) and compare its
+    rankings with `reference`. Returns {strategy: {ms_per_query, us_per_doc,
+    spearman, top_k_overlap}}; agreement figures are means over queries.
 
-    # 3) Skills overlap
-    try:
-        skills_pct = _skills_pct(job_skills, resume_skills)
-        result["skills_pct"] = float(skills_pct)
-    except Exception:
-        result["skills_pct"] = 0.0
-
-    # 4) Compose final score:
-    # - if embedding used: weight embedding 0.7, skills 0.3 (tweakable)
-    # - if not: weight tfidf 0.8, skills 0.2
-    try:
-        if used_embedding and result["embedding_pct"]:
-            final = (0.7 * result["embedding_pct"]) + (0.3 * result["skills_pct"])
-        else:
-            final = (0.8 * result["tfidf_pct"]) + (0.2 * result["skills_pct"])
-        final = max(0.0, min(100.0, float(final)))
-        result["score"] = round(final, 2)
-    except Exception:
-        result["score"] = 0.0
-
-    # add explanation small summary
-    result["explain"] = {
-        "used_embedding": bool(used_embedding),
-        "embedding_pct": result["embedding_pct"],
-        "tfidf_pct": result["tfidf_pct"],
-        "skills_pct": result["skills_pct"]
-    }
-
-    return result
+    Documents are prepared before timing starts, so the numbers are scoring
+    cost only; prepare_ms reports the shared tokenization stage once.
+    """
+    names = list(strategies or STRATEGIES)
+    if reference not in names:
+        names.insert(0, reference)
+
+    t0 = time.perf_counter()
+    for d in list(queries) + list(docs):
+        d.warm()
+    prepare_ms = (time.perf_counter() - t0) * 1000.0
+
+    timings: Dict[str, List[float]] = {n: [] for n in names}
+    scores: Dict[str, List[np.ndarray]] = {n: [] for n in names}
+    for q in queries:
+        for n in names:
+            best = None
+            for _ in range(max(1, repeats)):
+                t = time.perf_counter()
+                s = score_batch(q, docs, n)
+                elapsed = time.perf_counter() - t
+                best = elapsed if best is None else min(best, elapsed)
+            timings[n].append(best)
+            scores[n].append(s)
+
+    def _mean(values):
+        values = [v for v in values if v is not None]
+        return round(float(np.mean(values)), 4) if values else None
 
+    report = {"_corpus": {"queries": len(queries), "docs": len(docs), "prepare_ms": round(prepare_ms, 2)}}
+    for n in names:
+        per_query = np.asarray(timings[n]) if timings[n] else np.zeros(1)
+        report[n] = {
+            "ms_per_query": round(float(per_query.mean()) * 1000.0, 3),
+            "us_per_doc": round(float(per_query.mean()) * 1e6 / max(1, len(docs)), 3),
+            "spearman": _mean([spearman(s, r) for s, r in zip(scores[n], scores[reference])]),
+            f"top{k}_overlap": _mean([top_k_overlap(s, r, k) for s, r in zip(scores[n], scores[reference])]),
+        }
+    return report
@@ -0,0 +1,200 @@
+# resumes/utils/shortlist_export.py
+"""
+Streaming shortlist CSV export.
+
+Rows come from one values_list() query (job, resume, candidate and
+recruiter columns joined in SQL) read with .iterator(chunk_size), and are
+written through a csv writer whose "file" just hands each line back, so
+neither the rows nor the CSV are ever held in memory:
+
+    rows = export_rows(queryset(...), base_url)
+    StreamingHttpResponse(gzip_chunks(csv_chunks(rows)))
+
+Very large exports can run as a background job instead (the
+export_shortlist task): the same generator is written to a file under
+SHORTLIST_EXPORT_DIR, and the job's state lives in the cache under
+shortlist_export_<id> until SHORTLIST_EXPORT_TTL expires.
+"""
+import csv
+import logging
+import os
+import uuid
+import zlib
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+from urllib.parse import urljoin
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+HEADER = ['shortlist_id', 'job_id', 'job_title', 'resume_id', 'candidate_username', 'candidate_email',
+          'resume_url', 'skills', 'experience', 'shortlisted_by', 'created_at', 'email_sent', 'email_sent_at']
+COLUMNS = ('id', 'job_id', 'job__title', 'resume_id', 'resume__user__username', 'resume__user__email',
+           'resume__file', 'resume__skills', 'resume__experience', 'shortlisted_by__username',
+           'created_at', 'email_sent', 'email_sent_at')
+FLUSH_BYTES = 64 * 1024
+JOB_KEY = "shortlist_export_{}"
+
+
+def queryset(job_id=None, include_history: bool = False):
+    from resumes.models import Shortlist
+
+    qs = Shortlist.objects.all()
+    if job_id:
+        qs = qs.filter(job__id=job_id)
+    # one row per candidate (their canonical resume) unless include_history
+    if not include_history:
+        qs = qs.filter(resume__is_latest=True)
+    return qs.order_by('id').values_list(*COLUMNS)
+
+
+def _iso(value):
+    return value.isoformat() if value else ''
+
+
+def export_rows(values, base_url: str, chunk_size: int = 2000) -> Iterator[list]:
+    """CSV rows for a queryset() result, read chunk by chunk."""
+    for (sid, job_id, title, resume_id, username, email, file_name, skills, experience,
+         shortlisted_by, created_at, email_sent, email_sent_at) in values.iterator(chunk_size=chunk_size):
+        yield [
+            sid, job_id or '', title or '', resume_id or '', username or '', email or '',
+            urljoin(base_url, default_storage.url(file_name)) if file_name else '',
+            skills or '', experience or '', shortlisted_by or '',
+            _iso(created_at), email_sent, _iso(email_sent_at),
+        ]
+
+
+class _Echo:
+    """File-like object for csv.writer: write() returns the line instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def parse_delimiter(value: str) -> str:
+    """
+    ?delimiter= checked before anything is streamed or queued: one character,
+    and not one csv.writer would produce unreadable output with.
+    """
+    if not isinstance(value, str) or len(value) != 1:
+        raise ValueError("delimiter must be exactly one character")
+    if value in '"\r\n':
+        raise ValueError("delimiter can't be a quote or a line break")
+    return value
+
+
+def csv_chunks(rows: Iterable[list], delimiter: str = ',') -> Iterator[bytes]:
+    """Encoded CSV (header first) in ~FLUSH_BYTES pieces."""
+    writer = csv.writer(_Echo(), delimiter=delimiter)
+    buf = [writer.writerow(HEADER)]
+    size = len(buf[0])
+    for row in rows:
+        line = writer.writerow(row)
+        buf.append(line)
+        size += len(line)
+        if size >= FLUSH_BYTES:
+            yield ''.join(buf).encode('utf-8')
+            buf, size = [], 0
+    if buf:
+        yield ''.join(buf).encode('utf-8')
+
+
+def gzip_chunks(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """Gzip a byte stream on the fly."""
+    z = zlib.compressobj(level, zlib.DEFLATED, 31)   # wbits 31: gzip header + trailer
+    for chunk in chunks:
+        out = z.compress(chunk)
+        if out:
+            yield out
+    yield z.flush()
+
+
+def filename(gzipped: bool) -> str:
+    name = f"shortlist_{timezone.now().strftime('%Y%m%d_%H%M%S')}.csv"
+    return name + '.gz' if gzipped else name
+
+
+# -------------------- background export jobs --------------------
+def export_dir() -> Path:
+    return Path(getattr(settings, 'SHORTLIST_EXPORT_DIR', None) or Path(settings.BASE_DIR) / 'exports')
+
+
+def _ttl() -> int:
+    return getattr(settings, 'SHORTLIST_EXPORT_TTL', 24 * 3600)
+
+
+def get_job(export_id) -> Optional[dict]:
+    return cache.get(JOB_KEY.format(export_id))
+
+
+def _put_job(export_id, job: dict):
+    cache.set(JOB_KEY.format(export_id), job, _ttl())
+
+
+def create_job(user_id, params: dict) -> str:
+    """Register a queued export; params: job_id, include_history, delimiter, gzip, base_url."""
+    export_id = uuid.uuid4().hex
+    _put_job(export_id, {"id": export_id, "user_id": user_id, "status": "queued", "params": params,
+                         "rows": 0, "filename": filename(bool(params.get("gzip"))), "path": None, "error": None})
+    return export_id
+
+
+def prune_files():
+    """Delete export files older than the job TTL (their cache entries are gone)."""
+    cutoff = timezone.now().timestamp() - _ttl()
+    try:
+        entries = list(os.scandir(export_dir()))
+    except OSError:
+        return
+    for entry in entries:
+        try:
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+        except OSError:
+            pass
+
+
+def run_job(export_id) -> Optional[dict]:
+    """Write the export to a file; rows are counted as they stream through."""
+    job = get_job(export_id)
+    if job is None:
+        return None
+    prune_files()
+    params = job["params"]
+    _put_job(export_id, dict(job, status="running"))
+
+    counted = {"rows": 0}
+
+    def counting(rows):
+        for row in rows:
+            counted["rows"] += 1
+            yield row
+
+    path = export_dir() / f"{export_id}_{job['filename']}"
+    tmp = path.with_suffix(path.suffix + '.part')
+    try:
+        os.makedirs(path.parent, exist_ok=True)
+        rows = counting(export_rows(queryset(params.get("job_id"), params.get("include_history")), params["base_url"]))
+        chunks = csv_chunks(rows, params.get("delimiter", ','))
+        if params.get("gzip"):
+            chunks = gzip_chunks(chunks)
+        with open(tmp, 'wb') as f:
+            for chunk in chunks:
+                f.write(chunk)
+        os.replace(tmp, path)
+    except Exception as e:
+        logger.exception("shortlist export %s failed", export_id)
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        job = dict(job, status="failed", error=str(e))
+        _put_job(export_id, job)
+        return job
+    job = dict(job, status="done", rows=counted["rows"], path=str(path), finished_at=timezone.now().isoformat())
+    _put_job(export_id, job)
+    return job
@@ -0,0 +1,142 @@
+# resumes/utils/skill_bits.py
+"""
+Skills as fixed-width bitsets over the skill taxonomy.
+
+Bit i of a bitset is set when the document has taxonomy skill id i
+(skill_taxonomy). Resume.skill_bits / Job.skill_bits store them as
+little-endian uint64 words, only as many words as the highest id needs.
+Loaded side by side they form an (n x W) uint64 matrix, so for a whole
+candidate pool:
+
+    overlap with a job   popcount(R & job)           -> counts per resume
+    has every must-have  (R & must) == must          -> boolean mask
+    missing skills       job & ~R[i]                 -> decoded per shown row
+
+Ids that don't fit the taxonomy (free-text job skills) are not in the
+bitsets; callers match those separately (feature_store.skill_columns).
+"""
+from typing import Iterable, List, Optional, Sequence
+
+import numpy as np
+
+WORD_BITS = 64
+_WORD = np.dtype('<u8')
+
+if hasattr(np, 'bitwise_count'):
+    def popcount(words: np.ndarray) -> np.ndarray:
+        return np.bitwise_count(words)
+else:
+    _BYTE_COUNTS = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+    def popcount(words: np.ndarray) -> np.ndarray:
+        b = words.view(np.uint8).reshape(words.shape + (8,))
+        return _BYTE_COUNTS[b].sum(axis=-1, dtype=np.uint8)
+
+
+def width_for(ids: Iterable[int]) -> int:
+    top = max(ids, default=-1)
+    return top // WORD_BITS + 1 if top >= 0 else 0
+
+
+def to_words(ids: Iterable[int], width: Optional[int] = None) -> np.ndarray:
+    ids = [int(i) for i in ids if int(i) >= 0]
+    w = width if width is not None else width_for(ids)
+    words = np.zeros(w, dtype=_WORD)
+    for i in ids:
+        if i // WORD_BITS < w:
+            words[i // WORD_BITS] |= np.uint64(1) << np.uint64(i % WORD_BITS)
+    return words
+
+
+def encode_skill_bits(ids: Iterable[int]) -> bytes:
+    return to_words(ids).tobytes()
+
+
+def decode_skill_bits(blob, width: int) -> np.ndarray:
+    """Stored bitset -> `width` words (zero padded / truncated)."""
+    out = np.zeros(width, dtype=_WORD)
+    if blob:
+        words = np.frombuffer(memoryview(blob), dtype=_WORD)
+        n = min(width, words.size)
+        out[:n] = words[:n]
+    return out
+
+
+def bits_matrix(blobs: Sequence, width: int) -> np.ndarray:
+    """(len(blobs) x width) uint64 matrix; None / empty blobs are all-zero rows."""
+    if not width:
+        return np.zeros((len(blobs), 0), dtype=_WORD)
+    # pad / cut every row to the same byte width, then one frombuffer for all
+    row = width * _WORD.itemsize
+    buf = b''.join(bytes(b or b'')[:row].ljust(row, b'\0') for b in blobs)
+    return np.frombuffer(buf, dtype=_WORD).reshape(len(blobs), width).copy()
+
+
+def bits_for(obj) -> bytes:
+    """Stored skill_bits of a Resume / Job, or computed from its skills field."""
+    blob = getattr(obj, 'skill_bits', None)
+    if blob is not None:
+        return blob
+    from .skill_taxonomy import skill_ids_for
+    skills = getattr(obj, 'skills', None) if hasattr(obj, 'skills') else getattr(obj, 'skills_required', None)
+    return encode_skill_bits(skill_ids_for(skills))
+
+
+def to_ids(words: np.ndarray) -> List[int]:
+    """Set bit positions of a word array, ascending."""
+    bits = np.unpackbits(np.ascontiguousarray(words, dtype=_WORD).view(np.uint8), bitorder='little')
+    return np.flatnonzero(bits).tolist()
+
+
+def _fit(mask: np.ndarray, width: int) -> np.ndarray:
+    if mask.size == width:
+        return mask
+    out = np.zeros(width, dtype=_WORD)
+    n = min(width, mask.size)
+    out[:n] = mask[:n]
+    return out
+
+
+def overlap_counts(M: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """Number of mask bits set in each row."""
+    if not mask.any():
+        return np.zeros(M.shape[0], dtype=np.int64)
+    return popcount(M & _fit(mask, M.shape[1])).sum(axis=1, dtype=np.int64)
+
+
+def has_all(M: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """Rows that contain every bit of mask (M must be at least as wide as mask's set bits)."""
+    if not mask.any():
+        return np.ones(M.shape[0], dtype=bool)
+    if mask.size > M.shape[1] and mask[M.shape[1]:].any():
+        return np.zeros(M.shape[0], dtype=bool)
+    mask = _fit(mask, M.shape[1])
+    return ((M & mask) == mask).all(axis=1)
+
+
+def resume_ids_with_all(skill_ids: Sequence[int], qs=None, chunk_size: int = 5000) -> List[int]:
+    """
+    Ids of resumes (from `qs`, default all) whose skill_bits contain every
+    skill in `skill_ids`. Scans skill_bits in chunks; each chunk is one
+    vectorized AND / compare.
+    """
+    from resumes.models import Resume
+
+    mask = to_words(skill_ids)
+    qs = (Resume.objects.all() if qs is None else qs).exclude(skill_bits__isnull=True)
+    out: List[int] = []
+    ids, blobs = [], []
+
+    def flush():
+        keep = has_all(bits_matrix(blobs, mask.size), mask)
+        out.extend(i for i, k in zip(ids, keep) if k)
+
+    for rid, blob in qs.values_list('id', 'skill_bits').iterator(chunk_size=chunk_size):
+        ids.append(rid)
+        blobs.append(blob)
+        if len(ids) >= chunk_size:
+            flush()
+            ids, blobs = [], []
+    if ids:
+        flush()
+    return out
@@ -0,0 +1,168 @@
+# resumes/utils/skill_taxonomy.py
+"""
+Skill taxonomy: canonical skills with aliases, matched in one pass.
+
+The taxonomy lives in a JSON data file (SKILL_TAXONOMY_PATH, default
+resumes/data/skills.json):
+
+    {"version": 1, "skills": [
+        {"id": 3, "key": "javascript", "name": "JavaScript",
+         "aliases": ["js", "java script"], "strict": []}, ...]}
+
+`id` is the stable integer stored on Resume.skill_ids / Job.skill_ids, so
+skill overlap is an integer-set intersection. Never reuse an id.
+
+Every name and alias is tokenized the same way as the text and inserted
+into a token trie. find_skill_ids() tokenizes the text once and walks the
+trie from each token, keeping the longest match ("spring boot" over
+"spring"), so the cost is one pass over the text whatever the taxonomy size.
+
+Short or ambiguous forms ("C", "R", "Go", "cv") are listed under `strict`:
+they only count when they are a whole entry of a comma separated skills
+list (normalize_skill_list), never in free text.
+"""
+import json
+import logging
+import re
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATH = Path(__file__).resolve().parents[1] / 'data' / 'skills.json'
+
+# keeps c++ / c# / node.js / ci/cd together
+_token_re = re.compile(r"[a-z0-9][a-z0-9+#./-]*")
+_END = object()
+
+
+def skill_tokens(text: str) -> List[str]:
+    out = []
+    for t in _token_re.findall((text or '').lower()):
+        t = t.rstrip('./-')
+        if t:
+            out.append(t)
+    return out
+
+
+class SkillTaxonomy:
+    def __init__(self, skills: Iterable[dict], version=None):
+        self.version = version
+        self.names: Dict[int, str] = {}
+        self.keys: Dict[int, str] = {}
+        self._trie: dict = {}
+        self._exact: Dict[str, int] = {}
+        self.max_len = 1
+        for s in skills:
+            sid = int(s['id'])
+            if sid in self.names:
+                raise ValueError(f"duplicate skill id {sid}")
+            self.names[sid] = s['name']
+            self.keys[sid] = s.get('key') or s['name']
+            strict = {' '.join(skill_tokens(f)) for f in s.get('strict', [])}
+            for form in [s['name']] + list(s.get('aliases', [])) + list(s.get('strict', [])):
+                toks = skill_tokens(form)
+                if not toks:
+                    continue
+                self._exact.setdefault(' '.join(toks), sid)
+                if ' '.join(toks) not in strict:
+                    self._insert(toks, sid)
+
+    def _insert(self, toks: List[str], sid: int):
+        node = self._trie
+        for t in toks:
+            node = node.setdefault(t, {})
+        node.setdefault(_END, sid)
+        self.max_len = max(self.max_len, len(toks))
+
+    def find_in_tokens(self, toks: List[str]) -> List[int]:
+        """Skill ids found in a token list, in order of first occurrence."""
+        found: List[int] = []
+        seen = set()
+        i, n = 0, len(toks)
+        while i < n:
+            node = self._trie
+            match: Optional[Tuple[int, int]] = None
+            j = i
+            while j < n and j - i < self.max_len:
+                node = node.get(toks[j])
+                if node is None:
+                    break
+                j += 1
+                if _END in node:
+                    match = (node[_END], j)
+            if match is None:
+                i += 1
+                continue
+            sid, i = match
+            if sid not in seen:
+                seen.add(sid)
+                found.append(sid)
+        return found
+
+    def find_skill_ids(self, text: str) -> List[int]:
+        return self.find_in_tokens(skill_tokens(text))
+
+    def lookup(self, entry: str) -> Optional[int]:
+        """Id of one skills-list entry when it is exactly a known name / alias."""
+        return self._exact.get(' '.join(skill_tokens(entry)))
+
+    def normalize_skill_list(self, skills: Optional[str]) -> Tuple[List[int], List[str]]:
+        """
+        Comma separated skills -> (known ids in order, unknown entries).
+        An entry is matched exactly first, then scanned ("Python 3, SQL/ETL").
+        """
+        ids: List[int] = []
+        unknown: List[str] = []
+        seen = set()
+        for entry in (skills or '').split(','):
+            entry = entry.strip()
+            if not entry:
+                continue
+            sid = self.lookup(entry)
+            found = [sid] if sid is not None else self.find_skill_ids(entry)
+            if not found:
+                unknown.append(entry.lower())
+            for sid in found:
+                if sid not in seen:
+                    seen.add(sid)
+                    ids.append(sid)
+        return ids, unknown
+
+    def display(self, ids: Iterable[int]) -> str:
+        return ", ".join(self.names[i] for i in ids if i in self.names)
+
+
+_taxonomy: Optional[SkillTaxonomy] = None
+_taxonomy_lock = threading.Lock()
+
+
+def load_taxonomy(path=None) -> SkillTaxonomy:
+    path = Path(path or getattr(settings, 'SKILL_TAXONOMY_PATH', None) or DEFAULT_PATH)
+    data = json.loads(path.read_text(encoding='utf-8'))
+    return SkillTaxonomy(data.get('skills', []), version=data.get('version'))
+
+
+def get_taxonomy() -> SkillTaxonomy:
+    """Process-wide taxonomy, compiled on first use."""
+    global _taxonomy
+    if _taxonomy is None:
+        with _taxonomy_lock:
+            if _taxonomy is None:
+                _taxonomy = load_taxonomy()
+                logger.info("skill taxonomy v%s loaded: %d skills", _taxonomy.version, len(_taxonomy.names))
+    return _taxonomy
+
+
+def extract_skills(text: str) -> str:
+    """Canonical skill names found in free text, comma separated."""
+    tax = get_taxonomy()
+    return tax.display(tax.find_skill_ids(text))
+
+
+def skill_ids_for(skills: Optional[str]) -> List[int]:
+    """Sorted taxonomy ids of a comma separated skills field."""
+    return sorted(get_taxonomy().normalize_skill_list(skills)[0])
@@ -0,0 +1,162 @@
+# resumes/utils/text_cache.py
+"""
+Content-addressed cache for extracted document text.
+
+Key = sha256(file bytes) + extractor version, so duplicate uploads and
+repeated reads of the same file cost one hash instead of a PDF parse, and
+bumping the extractor version invalidates everything at once.
+
+Backends (settings.TEXT_CACHE_BACKEND):
+- "disk"  (default) gzip files under settings.TEXT_CACHE_DIR/<ab>/<key>.txt.gz
+- "redis" zlib-compressed values in Redis (REDIS_URL), shared by all workers
+- "off"
+
+Hit/miss counters: cache_stats(), served by the staff stats endpoint
+(views.pipeline_stats).
+"""
+import gzip
+import hashlib
+import logging
+import os
+import threading
+import zlib
+from pathlib import Path
+from typing import Optional
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_stats = {"hits": 0, "misses": 0, "errors": 0}
+_stats_lock = threading.Lock()
+REDIS_STATS_KEY = "text_cache:stats"
+
+
+def file_digest(raw_bytes: bytes) -> str:
+    return hashlib.sha256(raw_bytes).hexdigest()
+
+
+def cache_key(digest: str, extractor_version: str) -> str:
+    return f"{digest}-{extractor_version}"
+
+
+class DiskTextCache:
+    def __init__(self, root: Path):
+        self.root = Path(root)
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.txt.gz"
+
+    def get(self, key: str) -> Optional[str]:
+        try:
+            with gzip.open(self._path(key), 'rt', encoding='utf-8') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def set(self, key: str, text: str):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        with gzip.open(tmp, 'wt', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp, path)
+
+    def incr_stat(self, name: str):
+        pass
+
+
+class RedisTextCache:
+    prefix = "text_cache:"
+
+    def __init__(self, url: str, ttl: Optional[int] = None):
+        import redis
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+
+    def get(self, key: str) -> Optional[str]:
+        raw = self.client.get(self.prefix + key)
+        return zlib.decompress(raw).decode('utf-8') if raw is not None else None
+
+    def set(self, key: str, text: str):
+        self.client.set(self.prefix + key, zlib.compress(text.encode('utf-8')), ex=self.ttl)
+
+    def incr_stat(self, name: str):
+        self.client.hincrby(REDIS_STATS_KEY, name, 1)
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_text_cache():
+    """Configured backend (per process), or None when disabled/unavailable."""
+    global _backend
+    if _backend is not None:
+        return _backend or None
+    with _backend_lock:
+        if _backend is not None:
+            return _backend or None
+        kind = getattr(settings, 'TEXT_CACHE_BACKEND', 'disk')
+        try:
+            if kind == 'redis' and getattr(settings, 'REDIS_URL', ''):
+                _backend = RedisTextCache(settings.REDIS_URL, getattr(settings, 'TEXT_CACHE_TTL', None))
+            elif kind in ('disk', 'redis'):
+                _backend = DiskTextCache(getattr(settings, 'TEXT_CACHE_DIR', Path(settings.BASE_DIR) / 'search_index' / 'text'))
+            else:
+                _backend = False
+        except Exception:
+            logger.exception("text cache backend %s unavailable", kind)
+            _backend = False
+    return _backend or None
+
+
+def _count(name: str, backend=None):
+    with _stats_lock:
+        _stats[name] += 1
+    if backend is not None:
+        try:
+            backend.incr_stat(name)
+        except Exception:
+            pass
+
+
+def lookup(key: str) -> Optional[str]:
+    backend = get_text_cache()
+    if backend is None:
+        return None
+    try:
+        text = backend.get(key)
+    except Exception:
+        logger.exception("text cache read failed")
+        _count("errors")
+        return None
+    _count("hits" if text is not None else "misses", backend)
+    return text
+
+
+def store(key: str, text: str):
+    backend = get_text_cache()
+    if backend is None:
+        return
+    try:
+        backend.set(key, text or '')
+    except Exception:
+        logger.exception("text cache write failed")
+        _count("errors")
+
+
+def cache_stats() -> dict:
+    """Process-local counters; for Redis also the shared cross-worker totals."""
+    with _stats_lock:
+        out = {"process": dict(_stats)}
+    backend = get_text_cache()
+    if isinstance(backend, RedisTextCache):
+        try:
+            shared = backend.client.hgetall(REDIS_STATS_KEY)
+            out["shared"] = {k.decode(): int(v) for k, v in shared.items()}
+        except Exception:
+            pass
+    total = out["process"]["hits"] + out["process"]["misses"]
+    out["process"]["hit_ratio"] = round(out["process"]["hits"] / total, 4) if total else None
+    return out
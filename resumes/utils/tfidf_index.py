@@ -0,0 +1,506 @@
+# resumes/utils/tfidf_index.py
+"""
+Persistent corpus-level TF-IDF index over Resume.extracted_text.
+
+Layout on disk (settings.RESUME_TFIDF_INDEX_DIR):
+
+    CURRENT                  name of the live segment, e.g. "seg-1726831200123"
+    seg-<version>/
+        meta.json            {"version", "n_docs", "n_terms", "built_at"}
+        vocab.json           list of terms (position = term id)
+        df.npy               int64 document frequency per term
+        doc_ids.npy          int64 resume id per row
+        indptr.npy           int64 CSR row pointers
+        indices.npy          int32 term ids
+        tf.npy               float32 term frequency (count / doc length)
+        delta.jsonl          upsert/delete ops applied since the segment was built
+
+The .npy arrays are opened with mmap_mode='r' so every worker shares the
+page cache. Incremental changes (resumes/signals.py, via the
+sync_tfidf_index task) are appended to delta.jsonl; each worker replays new
+lines on access. Ops are keyed by resume id and idempotent, so replaying the
+same line twice is harmless.
+`manage.py rebuild_tfidf_index` compacts everything into a fresh segment;
+once delta.jsonl passes RESUME_TFIDF_DELTA_MAX_BYTES the compact_tfidf_index
+task does the same in the background.
+
+A LOCK file (flock) is held by writers from reading CURRENT to appending
+their op, and by build_index from copying the old delta tail to flipping
+CURRENT, so no op can land in a segment that is being retired.
+"""
+import json
+import logging
+import math
+import os
+import shutil
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from django.conf import settings
+
+from resumes.utils.feature_store import tokenize
+
+logger = logging.getLogger(__name__)
+
+CURRENT_FILE = "CURRENT"
+DELTA_FILE = "delta.jsonl"
+LOCK_FILE = "LOCK"
+COMPACT_PENDING_KEY = "tfidf_compact_pending"
+MAX_TEXT_CHARS = 50000
+
+
+def index_dir() -> Path:
+    return Path(getattr(settings, 'RESUME_TFIDF_INDEX_DIR', Path(settings.BASE_DIR) / 'search_index' / 'tfidf'))
+
+
+@contextmanager
+def _root_lock(root: Path):
+    """Exclusive cross-process lock on the index directory (no-op without fcntl, e.g. Windows)."""
+    try:
+        import fcntl
+    except ImportError:
+        yield
+        return
+    fd = os.open(root / LOCK_FILE, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)
+
+
+def term_frequencies(text: str) -> Dict[str, float]:
+    toks = tokenize((text or '')[:MAX_TEXT_CHARS])
+    if not toks:
+        return {}
+    L = float(len(toks))
+    return {t: c / L for t, c in Counter(toks).items()}
+
+
+class TfidfIndex:
+    """
+    In-process view of one on-disk segment plus replayed delta ops.
+    Use get_index() instead of constructing this directly.
+    """
+
+    def __init__(self, root: Optional[Path] = None):
+        self.root = Path(root) if root else index_dir()
+        self._lock = threading.RLock()
+        self._reset_empty()
+
+    # -------------------- loading --------------------
+    def _reset_empty(self):
+        self.segment = None
+        self.terms: List[str] = []
+        self.vocab: Dict[str, int] = {}
+        self.df = np.zeros(0, dtype=np.int64)
+        self.doc_ids = np.zeros(0, dtype=np.int64)
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.indices = np.zeros(0, dtype=np.int32)
+        self.tf = np.zeros(0, dtype=np.float32)
+        self.row_of: Dict[int, int] = {}
+        self.dead_rows = set()                 # base rows replaced or deleted
+        self.delta: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+        self._delta_offset = 0
+
+    def _current_segment(self) -> Optional[str]:
+        try:
+            return (self.root / CURRENT_FILE).read_text().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def _load_segment(self, name: str):
+        seg = self.root / name
+        self._reset_empty()
+        self.terms = json.loads((seg / 'vocab.json').read_text())
+        self.vocab = {t: i for i, t in enumerate(self.terms)}
+        # df is patched by deltas -> private writable copy; the rest stays mapped
+        self.df = np.array(np.load(seg / 'df.npy'), dtype=np.int64)
+        self.doc_ids = np.load(seg / 'doc_ids.npy', mmap_mode='r')
+        self.indptr = np.load(seg / 'indptr.npy', mmap_mode='r')
+        self.indices = np.load(seg / 'indices.npy', mmap_mode='r')
+        self.tf = np.load(seg / 'tf.npy', mmap_mode='r')
+        self.row_of = {int(d): i for i, d in enumerate(self.doc_ids)}
+        self.segment = name
+
+    def refresh(self):
+        """Pick up a new segment (after rebuild) and replay unseen delta ops."""
+        with self._lock:
+            name = self._current_segment()
+            if name != self.segment:
+                if name is None:
+                    self._reset_empty()
+                else:
+                    try:
+                        self._load_segment(name)
+                    except Exception:
+                        logger.exception("tfidf index: failed to load segment %s", name)
+                        self._reset_empty()
+                        return
+            if self.segment:
+                self._replay_delta()
+
+    def _replay_delta(self):
+        path = self.root / self.segment / DELTA_FILE
+        try:
+            size = path.stat().st_size
+        except FileNotFoundError:
+            return
+        if size <= self._delta_offset:
+            return
+        with open(path, 'rb') as f:
+            f.seek(self._delta_offset)
+            chunk = f.read(size - self._delta_offset)
+        # only consume complete lines; a half-written tail is read next time
+        end = chunk.rfind(b'\n') + 1
+        for line in chunk[:end].splitlines():
+            try:
+                op = json.loads(line)
+            except ValueError:
+                continue
+            if op.get('op') == 'upsert':
+                self._apply_upsert(int(op['id']), op.get('tf') or {})
+            elif op.get('op') == 'delete':
+                self._apply_delete(int(op['id']))
+        self._delta_offset += end
+
+    # -------------------- mutation --------------------
+    def _doc_terms(self, resume_id: int) -> Optional[np.ndarray]:
+        if resume_id in self.delta:
+            return self.delta[resume_id][0]
+        row = self.row_of.get(resume_id)
+        if row is not None and row not in self.dead_rows:
+            return np.asarray(self.indices[self.indptr[row]:self.indptr[row + 1]])
+        return None
+
+    def _apply_delete(self, resume_id: int):
+        old = self._doc_terms(resume_id)
+        if old is None:
+            return
+        self.df[old] -= 1
+        self.delta.pop(resume_id, None)
+        row = self.row_of.get(resume_id)
+        if row is not None:
+            self.dead_rows.add(row)
+
+    def _apply_upsert(self, resume_id: int, tfs: Dict[str, float]):
+        self._apply_delete(resume_id)
+        if not tfs:
+            return
+        new_terms = [t for t in tfs if t not in self.vocab]
+        if new_terms:
+            for t in new_terms:
+                self.vocab[t] = len(self.terms)
+                self.terms.append(t)
+            self.df = np.concatenate([self.df, np.zeros(len(new_terms), dtype=np.int64)])
+        ids = np.fromiter((self.vocab[t] for t in tfs), dtype=np.int32, count=len(tfs))
+        vals = np.fromiter(tfs.values(), dtype=np.float32, count=len(tfs))
+        self.df[ids] += 1
+        self.delta[resume_id] = (ids, vals)
+
+    def _append_op(self, op: dict) -> int:
+        """Append to the live segment's delta; returns the delta size in bytes."""
+        line = (json.dumps(op, separators=(',', ':')) + '\n').encode('utf-8')
+        with self._lock:
+            self.refresh()
+            if not self.segment:
+                # no index built yet; rebuild_tfidf_index will pick this row up
+                return 0
+            with _root_lock(self.root):
+                # CURRENT can't flip while the lock is held: re-check, then append
+                self.refresh()
+                if not self.segment:
+                    return 0
+                fd = os.open(self.root / self.segment / DELTA_FILE, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+                try:
+                    os.write(fd, line)
+                    size = os.fstat(fd).st_size
+                finally:
+                    os.close(fd)
+            # apply through the log so ops from other workers keep their order
+            self._replay_delta()
+        return size
+
+    def upsert(self, resume_id: int, text: str):
+        """Add or replace one resume. Empty text removes it."""
+        tfs = term_frequencies(text)
+        if tfs:
+            size = self._append_op({'op': 'upsert', 'id': int(resume_id), 'tf': tfs})
+        else:
+            size = self._append_op({'op': 'delete', 'id': int(resume_id)})
+        _maybe_compact(size)
+
+    def delete(self, resume_id: int):
+        _maybe_compact(self._append_op({'op': 'delete', 'id': int(resume_id)}))
+
+    # -------------------- queries --------------------
+    @property
+    def n_docs(self) -> int:
+        return len(self.row_of) - len(self.dead_rows) + len(self.delta)
+
+    def idf(self) -> np.ndarray:
+        n = self.n_docs
+        return np.log((n + 1) / (self.df + 1.0)) + 1.0
+
+    def contains(self, resume_id: int) -> bool:
+        return self._doc_terms(int(resume_id)) is not None
+
+    def _query_vector(self, tokens: Sequence[str], idf: np.ndarray) -> Tuple[Dict[int, float], Dict[str, float], float]:
+        """Known-term weights by id, unknown-term weights by string, and the norm."""
+        if not tokens:
+            return {}, {}, 0.0
+        L = float(len(tokens))
+        unseen_idf = math.log(self.n_docs + 1) + 1.0
+        known, unknown = {}, {}
+        for t, c in Counter(tokens).items():
+            tid = self.vocab.get(t)
+            if tid is not None:
+                known[tid] = (c / L) * float(idf[tid])
+            else:
+                unknown[t] = (c / L) * unseen_idf
+        norm = math.sqrt(sum(v * v for v in known.values()) + sum(v * v for v in unknown.values()))
+        return known, unknown, norm
+
+    def cosine(self, query_tokens: Sequence[str], resume_ids: Sequence[int],
+               fallback_tokens: Optional[Sequence[Optional[List[str]]]] = None) -> np.ndarray:
+        """
+        TF-IDF cosine (0..1) of the query against each resume, using corpus idf.
+        Resumes missing from the index are scored from fallback_tokens[i]
+        when given, otherwise they get NaN.
+        """
+        with self._lock:
+            self.refresh()
+            n = len(resume_ids)
+            out = np.full(n, np.nan, dtype=np.float64)
+            idf = self.idf()
+            known, unknown, q_norm = self._query_vector(query_tokens, idf)
+            q_dense = np.zeros(len(self.terms), dtype=np.float64)
+            if known:
+                q_dense[np.fromiter(known.keys(), dtype=np.int64)] = np.fromiter(known.values(), dtype=np.float64)
+
+            base_pos, base_rows, others = [], [], []
+            for i, rid in enumerate(resume_ids):
+                rid = int(rid)
+                row = self.row_of.get(rid)
+                if rid in self.delta:
+                    ids, vals = self.delta[rid]
+                    out[i] = self._dot(ids, vals.astype(np.float64), idf, q_dense, q_norm)
+                elif row is not None and row not in self.dead_rows:
+                    base_pos.append(i)
+                    base_rows.append(row)
+                else:
+                    others.append(i)
+
+            if base_rows:
+                out[np.asarray(base_pos)] = self._base_cosine(np.asarray(base_rows, dtype=np.int64), idf, q_dense, q_norm)
+
+            if fallback_tokens is not None:
+                unseen_idf = math.log(self.n_docs + 1) + 1.0
+                for i in others:
+                    toks = fallback_tokens[i]
+                    if not toks:
+                        continue
+                    L = float(len(toks))
+                    dot = norm2 = 0.0
+                    for t, c in Counter(toks).items():
+                        tid = self.vocab.get(t)
+                        w = (c / L) * (float(idf[tid]) if tid is not None else unseen_idf)
+                        norm2 += w * w
+                        dot += w * (q_dense[tid] if tid is not None else unknown.get(t, 0.0))
+                    out[i] = min(1.0, dot / (math.sqrt(norm2) * q_norm)) if norm2 and q_norm else 0.0
+            return out
+
+    def _dot(self, ids, vals, idf, q_dense, q_norm) -> float:
+        w = vals * idf[ids]
+        norm = float(np.sqrt(np.dot(w, w)))
+        if not norm or not q_norm:
+            return 0.0
+        return min(1.0, float(np.dot(w, q_dense[ids])) / (norm * q_norm))
+
+    def _base_cosine(self, rows: np.ndarray, idf, q_dense, q_norm) -> np.ndarray:
+        starts = np.asarray(self.indptr[rows])
+        lengths = np.asarray(self.indptr[rows + 1]) - starts
+        if not q_norm or not lengths.sum():
+            return np.zeros(rows.size, dtype=np.float64)
+        # positions of every nnz of the requested rows, grouped by row
+        seg = np.repeat(np.arange(rows.size), lengths)
+        offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        pos = np.repeat(starts, lengths) + offsets
+        cols = np.asarray(self.indices[pos], dtype=np.int64)
+        w = np.asarray(self.tf[pos], dtype=np.float64) * idf[cols]
+        dots = np.bincount(seg, weights=w * q_dense[cols], minlength=rows.size)
+        norms = np.sqrt(np.bincount(seg, weights=w * w, minlength=rows.size))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sims = np.where(norms > 0, dots / (norms * q_norm), 0.0)
+        return np.clip(sims, 0.0, 1.0)
+
+    def cosine_many(self, resume_id: int, queries: Sequence[Sequence[str]]) -> np.ndarray:
+        """
+        One indexed resume against many ad-hoc documents (e.g. job texts).
+        NaN for every query when the resume is not indexed.
+        """
+        with self._lock:
+            self.refresh()
+            out = np.full(len(queries), np.nan, dtype=np.float64)
+            rid = int(resume_id)
+            if rid in self.delta:
+                ids, vals = self.delta[rid]
+            else:
+                row = self.row_of.get(rid)
+                if row is None or row in self.dead_rows:
+                    return out
+                lo, hi = int(self.indptr[row]), int(self.indptr[row + 1])
+                ids, vals = np.asarray(self.indices[lo:hi]), np.asarray(self.tf[lo:hi])
+            idf = self.idf()
+            w = vals.astype(np.float64) * idf[ids]
+            d_norm = float(np.sqrt(np.dot(w, w)))
+            doc = dict(zip(ids.tolist(), w.tolist()))
+            for i, toks in enumerate(queries):
+                known, _, q_norm = self._query_vector(toks, idf)
+                if not q_norm or not d_norm:
+                    out[i] = 0.0
+                    continue
+                dot = sum(v * doc.get(k, 0.0) for k, v in known.items())
+                out[i] = min(1.0, dot / (q_norm * d_norm))
+            return out
+
+    def similarity(self, a_tokens: Sequence[str], b_tokens: Sequence[str]) -> float:
+        """Cosine (0..1) of two ad-hoc documents weighted by the corpus idf."""
+        with self._lock:
+            self.refresh()
+            idf = self.idf()
+            qa, ua, na = self._query_vector(a_tokens, idf)
+            qb, ub, nb = self._query_vector(b_tokens, idf)
+            if not na or not nb:
+                return 0.0
+            dot = sum(v * qb.get(k, 0.0) for k, v in qa.items())
+            dot += sum(v * ub.get(k, 0.0) for k, v in ua.items())
+            return max(0.0, min(1.0, dot / (na * nb)))
+
+
+# -------------------- build --------------------
+def build_index(rows: Iterable[Tuple[int, str]], root: Optional[Path] = None) -> dict:
+    """
+    Write a fresh segment from (resume_id, text) pairs and make it current.
+    Delta ops appended to the old segment while building are carried over.
+    """
+    root = Path(root) if root else index_dir()
+    root.mkdir(parents=True, exist_ok=True)
+    old = None
+    old_offset = 0
+    try:
+        old = (root / CURRENT_FILE).read_text().strip() or None
+        old_offset = (root / old / DELTA_FILE).stat().st_size if old else 0
+    except FileNotFoundError:
+        pass
+
+    vocab: Dict[str, int] = {}
+    df: List[int] = []
+    doc_ids, indptr, indices, tf = [], [0], [], []
+    for rid, text in rows:
+        tfs = term_frequencies(text)
+        if not tfs:
+            continue
+        for t, v in tfs.items():
+            tid = vocab.get(t)
+            if tid is None:
+                tid = vocab[t] = len(df)
+                df.append(0)
+            df[tid] += 1
+            indices.append(tid)
+            tf.append(v)
+        doc_ids.append(int(rid))
+        indptr.append(len(indices))
+
+    stamp = int(time.time() * 1000)
+    while (root / f"seg-{stamp}").exists():
+        # two builds in the same millisecond (e.g. a compaction right after a rebuild)
+        stamp += 1
+    version = f"seg-{stamp}"
+    seg = root / version
+    seg.mkdir()
+    np.save(seg / 'df.npy', np.asarray(df, dtype=np.int64))
+    np.save(seg / 'doc_ids.npy', np.asarray(doc_ids, dtype=np.int64))
+    np.save(seg / 'indptr.npy', np.asarray(indptr, dtype=np.int64))
+    np.save(seg / 'indices.npy', np.asarray(indices, dtype=np.int32))
+    np.save(seg / 'tf.npy', np.asarray(tf, dtype=np.float32))
+    (seg / 'vocab.json').write_text(json.dumps(list(vocab)))
+    meta = {"version": version, "n_docs": len(doc_ids), "n_terms": len(df), "built_at": time.time()}
+    (seg / 'meta.json').write_text(json.dumps(meta))
+
+    with _root_lock(root):
+        # carry over ops that raced with the build (idempotent, so overlap is
+        # fine); writers are held off until CURRENT points at the new segment
+        if old:
+            try:
+                with open(root / old / DELTA_FILE, 'rb') as f:
+                    f.seek(old_offset)
+                    tail = f.read()
+                if tail:
+                    (seg / DELTA_FILE).write_bytes(tail[:tail.rfind(b'\n') + 1])
+            except FileNotFoundError:
+                pass
+
+        tmp = root / (CURRENT_FILE + '.tmp')
+        tmp.write_text(version)
+        os.replace(tmp, root / CURRENT_FILE)
+
+    # keep the previous segment for workers still mapping it, drop the rest
+    for d in root.glob('seg-*'):
+        if d.is_dir() and d.name not in (version, old):
+            shutil.rmtree(d, ignore_errors=True)
+    return meta
+
+
+def rebuild_from_db(chunk_size: int = 500) -> dict:
+    """build_index over every resume with extracted text."""
+    from resumes.models import Resume
+
+    rows = (
+        Resume.objects.exclude(extracted_text__isnull=True).exclude(extracted_text='')
+        .values_list('id', 'extracted_text')
+        .iterator(chunk_size=chunk_size)
+    )
+    return build_index(rows)
+
+
+def _maybe_compact(delta_size: int):
+    """Schedule one background compaction once the live delta is over RESUME_TFIDF_DELTA_MAX_BYTES."""
+    from django.core.cache import cache
+
+    limit = getattr(settings, 'RESUME_TFIDF_DELTA_MAX_BYTES', 64 * 1024 * 1024)
+    if not limit or delta_size <= limit:
+        return
+    if not cache.add(COMPACT_PENDING_KEY, 1, 3600):
+        return
+    from resumes.tasks import compact_tfidf_index
+    try:
+        compact_tfidf_index.delay()
+    except Exception as e:
+        logger.warning("Celery enqueue failed; tfidf compaction skipped: %s", e)
+        cache.delete(COMPACT_PENDING_KEY)
+
+
+# -------------------- per-worker singleton --------------------
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_index() -> Optional[TfidfIndex]:
+    """The worker's index, loaded once. None when no index has been built."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = TfidfIndex()
+    try:
+        _index.refresh()
+    except Exception:
+        logger.exception("tfidf index refresh failed")
+        return None
+    return _index if _index.segment else None
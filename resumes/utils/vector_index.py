@@ -0,0 +1,453 @@
+# resumes/utils/vector_index.py
+"""
+Local approximate-nearest-neighbour index over Resume.embedding / Job.embedding.
+
+One index per (kind, embedding_model_version), persisted under
+settings.VECTOR_INDEX_DIR/<kind>/<model_version>/<v-stamp>/ with a CURRENT
+pointer, like the TF-IDF index. Backends are pluggable
+(settings.VECTOR_INDEX_BACKEND):
+
+- "flat": exact cosine over a normalized float32 matrix (small corpora)
+- "ivf":  IVF-flat; k-means coarse quantizer, only `nprobe` lists are scanned
+
+Vectors are L2-normalized on insert so a dot product is the cosine.
+The recompute_*_embeddings commands build or patch these indexes.
+
+prefilter() is the candidate-generation step in front of the blend
+(matching.rank_*): once a pool is larger than VECTOR_PREFILTER_MIN only the
+VECTOR_PREFILTER_K nearest rows, plus rows the index doesn't know, are
+scored in full.
+"""
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from django.conf import settings
+
+from resumes.utils.embedding_store import load_embeddings_for
+
+logger = logging.getLogger(__name__)
+
+KINDS = ('resume', 'job')
+
+
+def _normalize(M: np.ndarray) -> np.ndarray:
+    M = np.asarray(M, dtype=np.float32)
+    if M.ndim == 1:
+        M = M[None, :]
+    norms = np.linalg.norm(M, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return M / norms
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    if k >= scores.size:
+        return np.argsort(-scores, kind='stable')
+    part = np.argpartition(-scores, k - 1)[:k]
+    return part[np.argsort(-scores[part], kind='stable')]
+
+
+class VectorIndex:
+    """Backend interface."""
+    backend = None
+
+    def __init__(self, dim: int):
+        self.dim = int(dim)
+
+    def build(self, ids: Sequence[int], vectors: np.ndarray):
+        raise NotImplementedError
+
+    def upsert(self, ids: Sequence[int], vectors: np.ndarray):
+        raise NotImplementedError
+
+    def remove(self, ids: Iterable[int]):
+        raise NotImplementedError
+
+    def search(self, query, k: int = 10) -> List[Tuple[int, float]]:
+        raise NotImplementedError
+
+    def indexed_ids(self) -> np.ndarray:
+        """Ids currently searchable (removed rows excluded)."""
+        raise NotImplementedError
+
+    def __len__(self):
+        raise NotImplementedError
+
+    def save(self, path: Path):
+        raise NotImplementedError
+
+    @classmethod
+    def load(cls, path: Path, meta: dict):
+        raise NotImplementedError
+
+
+class FlatIndex(VectorIndex):
+    """Exact search: one matrix-vector product per query."""
+    backend = 'flat'
+
+    def __init__(self, dim: int):
+        super().__init__(dim)
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.vectors = np.zeros((0, self.dim), dtype=np.float32)
+
+    def build(self, ids, vectors):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.vectors = _normalize(vectors) if len(self.ids) else np.zeros((0, self.dim), dtype=np.float32)
+
+    def upsert(self, ids, vectors):
+        ids = np.asarray(ids, dtype=np.int64)
+        keep = ~np.isin(self.ids, ids)
+        self.ids = np.concatenate([self.ids[keep], ids])
+        self.vectors = np.vstack([np.asarray(self.vectors)[keep], _normalize(vectors)])
+
+    def remove(self, ids):
+        keep = ~np.isin(self.ids, np.asarray(list(ids), dtype=np.int64))
+        self.ids = self.ids[keep]
+        self.vectors = np.asarray(self.vectors)[keep]
+
+    def search(self, query, k=10):
+        if not len(self.ids):
+            return []
+        scores = self.vectors @ _normalize(query)[0]
+        top = _top_k(scores, k)
+        return [(int(self.ids[i]), float(scores[i])) for i in top]
+
+    def indexed_ids(self):
+        return np.asarray(self.ids)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def save(self, path):
+        np.save(path / 'ids.npy', self.ids)
+        np.save(path / 'vectors.npy', np.asarray(self.vectors, dtype=np.float32))
+
+    @classmethod
+    def load(cls, path, meta):
+        idx = cls(meta['dim'])
+        idx.ids = np.load(path / 'ids.npy')
+        idx.vectors = np.load(path / 'vectors.npy', mmap_mode='r')
+        return idx
+
+
+class IVFFlatIndex(VectorIndex):
+    """
+    Inverted-file index. Rows are stored grouped by their nearest centroid
+    (CSR style offsets). Patched rows go to a small unsorted tail until the
+    next build; removed rows are masked with a tombstone.
+    """
+    backend = 'ivf'
+
+    def __init__(self, dim: int, n_lists: Optional[int] = None, nprobe: Optional[int] = None):
+        super().__init__(dim)
+        self.n_lists = n_lists
+        self.nprobe = nprobe or getattr(settings, 'VECTOR_INDEX_NPROBE', 8)
+        self.centroids = np.zeros((0, self.dim), dtype=np.float32)
+        self.offsets = np.zeros(1, dtype=np.int64)
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.vectors = np.zeros((0, self.dim), dtype=np.float32)
+        self.alive = np.zeros(0, dtype=bool)
+        self.tail_ids = np.zeros(0, dtype=np.int64)
+        self.tail_vectors = np.zeros((0, self.dim), dtype=np.float32)
+
+    @staticmethod
+    def _kmeans(X: np.ndarray, k: int, iters: int = 10, seed: int = 0) -> np.ndarray:
+        rng = np.random.default_rng(seed)
+        C = X[rng.choice(X.shape[0], size=k, replace=False)].copy()
+        for _ in range(iters):
+            assign = np.argmax(X @ C.T, axis=1)
+            for c in range(k):
+                members = X[assign == c]
+                if len(members):
+                    C[c] = members.mean(axis=0)
+                else:
+                    C[c] = X[rng.integers(X.shape[0])]
+            C = _normalize(C)
+        return C
+
+    def build(self, ids, vectors):
+        ids = np.asarray(ids, dtype=np.int64)
+        X = _normalize(vectors) if len(ids) else np.zeros((0, self.dim), dtype=np.float32)
+        n = len(ids)
+        k = self.n_lists or max(1, int(np.sqrt(n)))
+        k = min(k, max(n, 1))
+        self.n_lists = k
+        if n == 0:
+            self.centroids = np.zeros((0, self.dim), dtype=np.float32)
+            self.offsets = np.zeros(1, dtype=np.int64)
+            self.ids, self.vectors, self.alive = ids, X, np.zeros(0, dtype=bool)
+        else:
+            # train the quantizer on a sample; large corpora don't need every row
+            sample = X if n <= 50 * k else X[np.random.default_rng(0).choice(n, 50 * k, replace=False)]
+            self.centroids = self._kmeans(sample, k)
+            assign = np.argmax(X @ self.centroids.T, axis=1)
+            order = np.argsort(assign, kind='stable')
+            self.ids, self.vectors = ids[order], X[order]
+            self.offsets = np.concatenate([[0], np.cumsum(np.bincount(assign, minlength=k))]).astype(np.int64)
+            self.alive = np.ones(n, dtype=bool)
+        self.tail_ids = np.zeros(0, dtype=np.int64)
+        self.tail_vectors = np.zeros((0, self.dim), dtype=np.float32)
+
+    def remove(self, ids):
+        ids = np.asarray(list(ids), dtype=np.int64)
+        if not self.alive.flags.writeable:
+            self.alive = self.alive.copy()
+        self.alive &= ~np.isin(self.ids, ids)
+        keep = ~np.isin(self.tail_ids, ids)
+        self.tail_ids, self.tail_vectors = self.tail_ids[keep], self.tail_vectors[keep]
+
+    def upsert(self, ids, vectors):
+        ids = np.asarray(ids, dtype=np.int64)
+        self.remove(ids)
+        self.tail_ids = np.concatenate([self.tail_ids, ids])
+        self.tail_vectors = np.vstack([self.tail_vectors, _normalize(vectors)])
+
+    def search(self, query, k=10, nprobe: Optional[int] = None):
+        q = _normalize(query)[0]
+        cand_ids, cand_scores = [], []
+        if len(self.centroids):
+            probe = _top_k(self.centroids @ q, min(nprobe or self.nprobe, len(self.centroids)))
+            for c in probe:
+                lo, hi = int(self.offsets[c]), int(self.offsets[c + 1])
+                if lo == hi:
+                    continue
+                alive = self.alive[lo:hi]
+                cand_ids.append(self.ids[lo:hi][alive])
+                cand_scores.append(np.asarray(self.vectors[lo:hi])[alive] @ q)
+        if len(self.tail_ids):
+            cand_ids.append(self.tail_ids)
+            cand_scores.append(self.tail_vectors @ q)
+        if not cand_ids:
+            return []
+        ids = np.concatenate(cand_ids)
+        scores = np.concatenate(cand_scores)
+        if not ids.size:
+            return []
+        top = _top_k(scores, k)
+        return [(int(ids[i]), float(scores[i])) for i in top]
+
+    def indexed_ids(self):
+        return np.concatenate([np.asarray(self.ids)[self.alive], self.tail_ids])
+
+    def __len__(self):
+        return int(self.alive.sum()) + len(self.tail_ids)
+
+    def save(self, path):
+        np.save(path / 'centroids.npy', self.centroids)
+        np.save(path / 'offsets.npy', self.offsets)
+        np.save(path / 'ids.npy', self.ids)
+        np.save(path / 'vectors.npy', np.asarray(self.vectors, dtype=np.float32))
+        np.save(path / 'alive.npy', np.asarray(self.alive))
+        np.save(path / 'tail_ids.npy', self.tail_ids)
+        np.save(path / 'tail_vectors.npy', self.tail_vectors)
+
+    @classmethod
+    def load(cls, path, meta):
+        idx = cls(meta['dim'], n_lists=meta.get('n_lists'))
+        idx.centroids = np.load(path / 'centroids.npy')
+        idx.offsets = np.load(path / 'offsets.npy')
+        idx.ids = np.load(path / 'ids.npy', mmap_mode='r')
+        idx.vectors = np.load(path / 'vectors.npy', mmap_mode='r')
+        idx.alive = np.load(path / 'alive.npy')
+        idx.tail_ids = np.load(path / 'tail_ids.npy')
+        idx.tail_vectors = np.load(path / 'tail_vectors.npy')
+        return idx
+
+
+BACKENDS: Dict[str, type] = {
+    FlatIndex.backend: FlatIndex,
+    IVFFlatIndex.backend: IVFFlatIndex,
+}
+
+
+def register_backend(cls):
+    """Plug in another backend (e.g. an hnswlib/faiss wrapper) under cls.backend."""
+    BACKENDS[cls.backend] = cls
+    return cls
+
+
+# -------------------- persistence --------------------
+def _safe_version(version: str) -> str:
+    return re.sub(r'[^A-Za-z0-9_.-]+', '_', version or 'unversioned')
+
+
+def index_path(kind: str, model_version: str) -> Path:
+    root = Path(getattr(settings, 'VECTOR_INDEX_DIR', Path(settings.BASE_DIR) / 'search_index' / 'vectors'))
+    return root / kind / _safe_version(model_version)
+
+
+def _current_version_dir(base: Path) -> Optional[Path]:
+    try:
+        name = (base / 'CURRENT').read_text().strip()
+    except FileNotFoundError:
+        return None
+    return base / name if name else None
+
+
+def save_index(kind: str, model_version: str, index: VectorIndex):
+    """
+    Write a new version directory and flip CURRENT to it. Files are never
+    rewritten in place, so workers that still mmap the old version are safe.
+    """
+    base = index_path(kind, model_version)
+    base.mkdir(parents=True, exist_ok=True)
+    previous = _current_version_dir(base)
+    version_dir = base / f"v-{int(time.time() * 1000)}"
+    version_dir.mkdir()
+    index.save(version_dir)
+    meta = {
+        "kind": kind,
+        "model_version": model_version,
+        "backend": index.backend,
+        "dim": index.dim,
+        "size": len(index),
+        "n_lists": getattr(index, 'n_lists', None),
+        "saved_at": time.time(),
+    }
+    (version_dir / 'meta.json').write_text(json.dumps(meta))
+    tmp = base / 'CURRENT.tmp'
+    tmp.write_text(version_dir.name)
+    os.replace(tmp, base / 'CURRENT')
+
+    for d in base.glob('v-*'):
+        if d.is_dir() and d != version_dir and d != previous:
+            shutil.rmtree(d, ignore_errors=True)
+    with _loaded_lock:
+        _loaded.pop((kind, model_version), None)
+
+
+def load_index(kind: str, model_version: str) -> Optional[VectorIndex]:
+    path = _current_version_dir(index_path(kind, model_version))
+    if path is None:
+        return None
+    meta = json.loads((path / 'meta.json').read_text())
+    cls = BACKENDS.get(meta.get('backend'))
+    if cls is None:
+        logger.warning("vector index %s/%s: unknown backend %s", kind, model_version, meta.get('backend'))
+        return None
+    return cls.load(path, meta)
+
+
+_loaded: Dict[Tuple[str, str], Tuple[str, VectorIndex]] = {}
+_loaded_lock = threading.Lock()
+
+
+def get_vector_index(kind: str, model_version: str) -> Optional[VectorIndex]:
+    """Per-worker cached index; reloaded when CURRENT points somewhere new."""
+    key = (kind, model_version)
+    path = _current_version_dir(index_path(kind, model_version))
+    if path is None:
+        return None
+    with _loaded_lock:
+        hit = _loaded.get(key)
+        if hit and hit[0] == path.name:
+            return hit[1]
+        try:
+            idx = load_index(kind, model_version)
+        except Exception:
+            logger.exception("vector index load failed for %s/%s", kind, model_version)
+            return None
+        if idx is not None:
+            _loaded[key] = (path.name, idx)
+        return idx
+
+
+# -------------------- build / patch from the DB --------------------
+def _model_for(kind: str):
+    from resumes.models import Resume, Job
+    return Resume if kind == 'resume' else Job
+
+
+def _embedding_rows(kind: str, model_version: str, ids: Optional[Iterable[int]] = None,
+                    dim: Optional[int] = None):
+    """(ids, float32 matrix) read as one contiguous block from embedding_vec."""
+    return load_embeddings_for(_model_for(kind), model_version=model_version, ids=ids, dim=dim)
+
+
+def rebuild_vector_index(kind: str, model_version: str, backend: Optional[str] = None) -> Optional[VectorIndex]:
+    """Build the index for kind/model_version from every stored embedding."""
+    ids, vecs = _embedding_rows(kind, model_version)
+    if not ids:
+        return None
+    cls = BACKENDS[backend or getattr(settings, 'VECTOR_INDEX_BACKEND', 'ivf')]
+    index = cls(vecs.shape[1])
+    index.build(ids, vecs)
+    save_index(kind, model_version, index)
+    return index
+
+
+def patch_vector_index(kind: str, model_version: str, ids: Sequence[int]) -> Optional[VectorIndex]:
+    """
+    Upsert the given rows (re-read from the DB) into an existing index.
+    Rows that no longer carry an embedding for this version are removed.
+    Builds from scratch when no index exists yet.
+    """
+    index = load_index(kind, model_version)
+    if index is None:
+        return rebuild_vector_index(kind, model_version)
+    found_ids, vecs = _embedding_rows(kind, model_version, ids, dim=index.dim)
+    gone = set(ids) - set(found_ids)
+    if gone:
+        index.remove(gone)
+    if found_ids:
+        index.upsert(found_ids, vecs)
+    save_index(kind, model_version, index)
+    return index
+
+
+# -------------------- queries --------------------
+def top_resumes_for_job(job, k: int = 50) -> List[Tuple[int, float]]:
+    """[(resume_id, cosine)] for the job's stored embedding, best first."""
+    if job.embedding_vec is None or not job.embedding_model_version:
+        return []
+    index = get_vector_index('resume', job.embedding_model_version)
+    if index is None or len(job.embedding) != index.dim:
+        return []
+    return index.search(job.embedding, k)
+
+
+def top_jobs_for_resume(resume, k: int = 20) -> List[Tuple[int, float]]:
+    """[(job_id, cosine)] for the resume's stored embedding, best first."""
+    if resume.embedding_vec is None or not resume.embedding_model_version:
+        return []
+    index = get_vector_index('job', resume.embedding_model_version)
+    if index is None or len(resume.embedding) != index.dim:
+        return []
+    return index.search(resume.embedding, k)
+
+
+# -------------------- candidate generation --------------------
+def prefilter(kind: str, query, rows: Sequence, pool_size: Optional[int] = None) -> list:
+    """
+    Narrow `rows` (Resume or Job instances, per `kind`) before the blend.
+
+    When the pool (pool_size, default len(rows)) is above
+    VECTOR_PREFILTER_MIN, keep the VECTOR_PREFILTER_K rows nearest to
+    `query` (the job for kind='resume', the resume for kind='job') plus every
+    row the index can't rule out: no embedding of the query's model version,
+    or not indexed yet. Those are still scored on TF-IDF and skills.
+    Small pools, a query without an embedding, or no index: rows unchanged.
+    """
+    rows = list(rows)
+    pool_size = len(rows) if pool_size is None else pool_size
+    if pool_size <= getattr(settings, 'VECTOR_PREFILTER_MIN', 5000):
+        return rows
+    search = top_resumes_for_job if kind == 'resume' else top_jobs_for_resume
+    hits = search(query, getattr(settings, 'VECTOR_PREFILTER_K', 1000))
+    if not hits:
+        return rows
+    version = query.embedding_model_version
+    near = {rid for rid, _ in hits}
+    known = set(get_vector_index(kind, version).indexed_ids().tolist())
+    return [
+        r for r in rows
+        if r.id in near or r.id not in known
+        or r.embedding_vec is None or r.embedding_model_version != version
+    ]
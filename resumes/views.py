@@ -1,20 +1,18 @@
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status, generics, viewsets, permissions
 from django.shortcuts import get_object_or_404, render
-from django.http import JsonResponse, HttpResponse
+from django.http import FileResponse, JsonResponse, HttpResponse, StreamingHttpResponse
 from django.utils import timezone
 from django.db import transaction, IntegrityError
 from django.contrib.auth.decorators import login_required
-# resumes/views.py (keep as-is)
-from resumes.utils.ats import score_resume_for_job  # (remove compute_embedding, _ensure_model)
 
 
 
 
 
-import json, csv, logging
+import json, csv, hashlib, logging, os
 
 
 from resumes.models import Shortlist, Resume, Job, Application
@@ -23,56 +21,29 @@ from .serializers import (
     ApplicationSerializer
 )
 from resumes.utils.pdf_extract import extract_text_from_filefield
+from resumes.utils.matching import (
+    rank_jobs_for_resume, rank_resumes_for_job, score_resume_for_job_pair, job_text_for
+)
+from resumes.utils.tfidf_index import get_index as get_tfidf_index
+from resumes.utils.skill_taxonomy import extract_skills as taxonomy_extract_skills
+from resumes.utils.candidate_filters import FilterError, apply_filters, flag, parse_filters
+from resumes.utils.extractor_planner import planner_stats
+from resumes.utils.match_cache import get_job_ranking, job_embedding_for, resume_texts_for
+from resumes.utils.model_registry import memory_footprint
+from resumes.utils.text_cache import cache_stats as text_cache_stats
+from resumes.utils.vector_index import prefilter
+from resumes.utils import ingestion, ranking_store, recommendations, shortlist_export
+from resumes.utils.pagination import (
+    CursorError, KeysetPagination, decode_cursor, encode_cursor, next_links, paginated
+)
+from resumes.utils.query_planner import OptimizedQuerysetMixin, optimize
 
-from .tasks import compute_and_store_embedding, send_shortlist_email
+from .tasks import export_shortlist, send_shortlist_email, start_ingestion
 from quiz.models import Quiz, QuizAttempt
 from interviews.models import InterviewInvite, Interview
 
 
 from django.core.cache import cache
-# ---- Lightweight TF-IDF (no sklearn) ----
-import math, re
-from collections import Counter
-
-_word_re = re.compile(r"[A-Za-z0-9_]+")
-
-def _tok(s: str):
-    return [w.lower() for w in _word_re.findall(s or "")]
-
-def _idf_stats(docs):
-    N = len(docs); df = Counter()
-    for d in docs:
-        for t in set(d):
-            df[t] += 1
-    idf = {t: math.log((N + 1) / (df[t] + 1)) + 1.0 for t in df}
-    vocab = {t:i for i,t in enumerate(idf)}
-    return idf, vocab
-
-def _tfidf_vec(tokens, idf, vocab):
-    if not tokens or not vocab: return []
-    tf = Counter(tokens)
-    vec = [0.0]*len(vocab)
-    L = float(len(tokens)) or 1.0
-    for t,c in tf.items():
-        i = vocab.get(t)
-        if i is not None:
-            vec[i] = (c/L) * idf.get(t, 0.0)
-    return vec
-
-def _cos(a, b):
-    if not a or not b: return 0.0
-    num = sum(x*y for x,y in zip(a,b))
-    da = math.sqrt(sum(x*x for x in a))
-    db = math.sqrt(sum(y*y for y in b))
-    return (num/(da*db)) if da and db else 0.0
-
-def simple_tfidf_similarity(a_text: str, b_text: str) -> float:
-    docs = [_tok(a_text), _tok(b_text)]
-    idf, vocab = _idf_stats(docs)
-    va = _tfidf_vec(docs[0], idf, vocab)
-    vb = _tfidf_vec(docs[1], idf, vocab)
-    return _cos(va, vb)  # 0..1
-
 
 logger = logging.getLogger(__name__)
 CACHE_TTL = 60 * 5
@@ -95,52 +66,11 @@ def is_recruiter(user):
         return False
 
 
-def _get_resume_text(r):
-    """Return text for a Resume instance r. Tries common fields then file fields."""
-    for field_name in ('extracted_text', 'text', 'content', 'skills'):
-        try:
-            val = getattr(r, field_name, None)
-        except Exception:
-            val = None
-        if val:
-            try:
-                if hasattr(val, 'read'):
-                    data = val.read()
-                    if isinstance(data, bytes):
-                        return data.decode('utf-8', 'ignore').strip()
-                    return str(data).strip()
-                return str(val).strip()
-            except Exception:
-                try:
-                    return str(val)
-                except Exception:
-                    pass
-
-    try:
-        file_field = None
-        for name in ('file', 'resume_file', 'upload'):
-            if getattr(r, name, None):
-                file_field = getattr(r, name)
-                break
-        if file_field:
-            text = extract_text_from_filefield(file_field)
-            if text:
-                return text.strip()
-    except Exception:
-        pass
-
-    return ""
-
-
 def extract_skills(text):
+    """Canonical skill names found in the text (skill taxonomy, one pass)."""
     if not text:
         return ""
-    words = [w.lower().strip(',.()') for w in text.split() if len(w) > 2]
-    freq = {}
-    for w in words:
-        freq[w] = freq.get(w, 0) + 1
-    top = sorted(freq.items(), key=lambda kv: kv[1], reverse=True)[:10]
-    return ", ".join([p[0] for p in top])
+    return taxonomy_extract_skills(text)
 
 
 def extract_experience(text):
@@ -158,9 +88,33 @@ def extract_experience(text):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def my_resumes(request):
-    qs = Resume.objects.filter(user=request.user).order_by('-uploaded_at')
-    serializer = ResumeUploadSerializer(qs, many=True, context={'request': request})
-    return Response(serializer.data)
+    qs = optimize(Resume.objects.filter(user=request.user), ResumeUploadSerializer)
+    return paginated(request, qs, ('-uploaded_at', '-id'), ResumeUploadSerializer, context={'request': request})
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def resume_status(request, resume_id):
+    try:
+        r = Resume.objects.only('id', 'user_id', 'ingest_status', 'ingest_error', 'ingest_updated_at').get(id=resume_id)
+    except Resume.DoesNotExist:
+        return Response({"error": "Resume not found"}, status=404)
+
+    if r.user_id != request.user.id and not is_recruiter(request.user):
+        return Response({"error": "Not allowed"}, status=403)
+    return Response(ingestion.status_for(r))
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def pipeline_stats(request):
+    """Gauges of the worker process serving this request (staff only)."""
+    return Response({
+        "pid": os.getpid(),
+        "embedding_models": memory_footprint(),
+        "text_cache": text_cache_stats(),
+        "extractor_planner": planner_stats(),
+    })
 
 
 @api_view(['DELETE'])
@@ -187,45 +141,68 @@ def delete_resume(request, resume_id):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def shortlist_export_csv(request):
+    """
+    Streams the CSV (one joined query, read in chunks). ?gzip=1 compresses
+    on the fly; ?mode=background queues an export job written to a file,
+    polled (and downloaded) at shortlist/export/<export_id>/.
+    """
     job_id = request.GET.get('job_id')
-    delimiter = request.GET.get('delimiter', ',')
-    qs = Shortlist.objects.select_related('job', 'resume', 'shortlisted_by').all()
-    if job_id:
-        qs = qs.filter(job__id=job_id)
+    try:
+        delimiter = shortlist_export.parse_delimiter(request.GET.get('delimiter', ','))
+    except ValueError as e:
+        return Response({"error": str(e)}, status=400)
+    include_history = flag(request.GET, 'include_history')
+    gzipped = flag(request.GET, 'gzip')
+    base_url = request.build_absolute_uri('/')
+
+    if request.GET.get('mode') == 'background':
+        export_id = shortlist_export.create_job(request.user.id, {
+            "job_id": job_id, "include_history": include_history, "delimiter": delimiter,
+            "gzip": gzipped, "base_url": base_url,
+        })
+        try:
+            export_shortlist.delay(export_id)
+        except Exception as e:
+            logger.warning("Celery enqueue failed; exporting inline: %s", e)
+            export_shortlist(export_id)
+        return Response({
+            "export_id": export_id,
+            "status_url": request.build_absolute_uri(f"/api/resumes/shortlist/export/{export_id}/"),
+        }, status=202)
+
+    rows = shortlist_export.export_rows(shortlist_export.queryset(job_id, include_history), base_url)
+    chunks = shortlist_export.csv_chunks(rows, delimiter)
+    if gzipped:
+        chunks = shortlist_export.gzip_chunks(chunks)
+    response = StreamingHttpResponse(chunks, content_type='application/gzip' if gzipped else 'text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{shortlist_export.filename(gzipped)}"'
+    return response
 
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = f'attachment; filename="shortlist_{timezone.now().strftime("%Y%m%d_%H%M%S")}.csv"'
-    writer = csv.writer(response, delimiter=delimiter)
-    writer.writerow(['shortlist_id','job_id','job_title','resume_id','candidate_username','candidate_email','resume_url','skills','experience','shortlisted_by','created_at','email_sent','email_sent_at'])
-
-    for s in qs:
-        resume_url = request.build_absolute_uri(s.resume.file.url) if s.resume and getattr(s.resume, 'file', None) else ''
-        candidate_email = s.resume.user.email if s.resume and getattr(s.resume, 'user', None) else ''
-        writer.writerow([
-            s.id,
-            s.job.id if s.job else '',
-            s.job.title if s.job else '',
-            s.resume.id if s.resume else '',
-            s.resume.user.username if s.resume and getattr(s.resume, 'user', None) else '',
-            candidate_email,
-            resume_url,
-            getattr(s.resume, 'skills', '') or '',
-            getattr(s.resume, 'experience', '') or '',
-            s.shortlisted_by.username if s.shortlisted_by else '',
-            s.created_at.isoformat() if s.created_at else '',
-            getattr(s, 'email_sent', False),
-            s.email_sent_at.isoformat() if getattr(s, 'email_sent_at', None) else ''
-        ])
 
-    return response
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def shortlist_export_status(request, export_id):
+    """Background export state; ?download=1 streams the finished file."""
+    job = shortlist_export.get_job(export_id)
+    if job is None or job["user_id"] != request.user.id:
+        return Response({"error": "Export not found"}, status=404)
+
+    if flag(request.GET, 'download'):
+        if job["status"] != "done" or not job["path"] or not os.path.exists(job["path"]):
+            return Response({"error": "Export not ready", "status": job["status"]}, status=409)
+        return FileResponse(open(job["path"], 'rb'), as_attachment=True, filename=job["filename"])
+
+    data = {k: job.get(k) for k in ("id", "status", "rows", "filename", "error", "finished_at")}
+    if job["status"] == "done":
+        data["download_url"] = request.build_absolute_uri(f"/api/resumes/shortlist/export/{export_id}/?download=1")
+    return Response(data)
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def my_shortlists(request):
-    qs = Shortlist.objects.filter(resume__user=request.user).select_related('job','resume','shortlisted_by')
-    serializer = ShortlistSerializer(qs, many=True)
-    return Response(serializer.data)
+    qs = optimize(Shortlist.objects.filter(resume__user=request.user), ShortlistSerializer)
+    return paginated(request, qs, ('-created_at', '-id'), ShortlistSerializer)
 
 
 @api_view(['POST'])
@@ -235,23 +212,16 @@ def upload_resume(request):
     if not file:
         return JsonResponse({"error": "No file uploaded"}, status=400)
 
-    resume = Resume.objects.create(user=request.user, file=file)
-
-    try:
-        text = extract_text_from_filefield(resume.file) or ''
-    except Exception as e:
-        logger.exception("extract_text_from_filefield error: %s", e)
-        text = ''
-
-    resume.skills = extract_skills(text)
-    resume.experience = extract_experience(text)
-    resume.extracted_text = text[:50000]
-    resume.save(update_fields=['skills', 'experience', 'extracted_text'])
-
-    try:
-       compute_and_store_embedding.delay(resume.id)
-    except Exception as e:
-        logger.warning("Celery enqueue failed; skipping sync embedding on free tier: %s", e)
+    location = (request.data.get('location') or '').strip() or None
+    # the request costs a file write and one insert; the staged pipeline does the rest
+    digest = hashlib.sha256()
+    for chunk in file.chunks():
+        digest.update(chunk)
+    resume = Resume.objects.create(user=request.user, file=file, location=location,
+                                   content_hash=digest.hexdigest(), ingest_status=ingestion.QUEUED)
+    start_ingestion(resume.id)
+    # eager mode (no broker) has already run every stage
+    resume.refresh_from_db()
 
     serializer = ResumeUploadSerializer(resume, context={'request': request})
     return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -262,11 +232,11 @@ def upload_resume(request):
 def job_list(request):
     if request.method == 'GET':
         if is_recruiter(request.user):
-            jobs = Job.objects.filter(created_by=request.user).order_by('-posted_at')
+            jobs = Job.objects.filter(created_by=request.user)
         else:
-            jobs = Job.objects.all().order_by('-posted_at')
-        serializer = JobSerializer(jobs, many=True, context={'request': request})
-        return Response(serializer.data)
+            jobs = Job.objects.all()
+        return paginated(request, optimize(jobs, JobSerializer), ('-posted_at', '-id'), JobSerializer,
+                         context={'request': request})
 
     elif request.method == 'POST':
         if not is_recruiter(request.user):
@@ -286,135 +256,81 @@ def match_resumes(request, job_id):
     except Job.DoesNotExist:
         return Response({"error": "Job not found"}, status=404)
 
-    resumes = Resume.objects.select_related('user').all()
-
-    job_text = " ".join(filter(None, [
-        getattr(job, 'title', ''),
-        getattr(job, 'description', ''),
-        getattr(job, 'skills_required', '')
-    ])).strip()
+    job_text = job_text_for(job)
     if not job_text:
         return Response({"job_title": job.title, "matched_resumes": [], "total": 0})
 
-    # Embedding model disabled on free tier; will use stored embeddings if present
-    model = None
-    job_emb = None
-
-    results = []
-
-    for r in resumes:
-        resume_text = _get_resume_text(r)
-        if not resume_text and getattr(r, 'file', None):
-            try:
-                resume_text = extract_text_from_filefield(r.file) or ""
-            except Exception as e:
-                logger.exception("extract_text_from_filefield error for resume %s: %s", getattr(r, 'id', None), e)
-                resume_text = ''
-
-        resume_text_local = (resume_text or '').strip()
-        job_text_local = job_text
-
-        embedding_pct = None
-        tfidf_pct = None
-        skills_pct = 0.0
-        score_val = 0.0
-
-        # skills overlap %
-        job_skills = set([s.strip() for s in (job.skills_required or '').lower().split(',') if s.strip()])
-        resume_skills = set([s.strip() for s in (r.skills or '').lower().split(',') if s.strip()])
-        if job_skills:
-            skills_pct = (len(job_skills & resume_skills) / float(len(job_skills))) * 100.0
-
-        # embedding compare only if both sides exist (rare on free tier)
-        used_embedding_path = False
-        try:
-            if job_emb is not None and getattr(r, 'embedding', None):
-        # If you ever enable embeddings again, do pure-python cosine:
-                je = list(job_emb) if hasattr(job_emb, '__iter__') else []
-                re = list(getattr(r, 'embedding', []) or [])
-                import math
-                num = sum(a*b for a,b in zip(je, re))
-                da = math.sqrt(sum(a*a for a in je)) or 0.0
-                db = math.sqrt(sum(b*b for b in re)) or 0.0
-                sim = (num/(da*db)) if (da and db) else 0.0
-                embedding_pct = sim * 100.0
-                score_val = embedding_pct
-                used_embedding_path = True
-        except Exception as e:
-            logger.exception("resume embedding compare failed for %s: %s", getattr(r, 'id', None), e)
-
-
-        # primary scorer (lightweight)
-        if not used_embedding_path:
-            try:
-                raw_score = score_resume_for_job(
-                    job_text_local, resume_text_local,
-                    job_skills=job.skills_required, resume_skills=r.skills
-                )
-                if isinstance(raw_score, dict):
-                    raw_score = raw_score.get('score', 0.0)
-                try:
-                    score_val = float(str(raw_score).strip().rstrip('%'))
-                except Exception:
-                    score_val = 0.0
-            except Exception as e:
-                logger.exception("score_resume_for_job error for resume %s: %s", getattr(r, 'id', None), e)
-                score_val = 0.0
-
-        # TF-IDF fallback (dependency-free)
-        try:
-            if (not score_val or score_val < 1.0) and resume_text_local:
-                sim = simple_tfidf_similarity(job_text_local, resume_text_local)  # 0..1
-                tfidf_pct = float(sim) * 100.0
-                if tfidf_pct and tfidf_pct > (score_val or 0.0) + 0.1:
-                    score_val = tfidf_pct
-        except Exception as e:
-            logger.exception("TFIDF fallback error for resume %s: %s", getattr(r, 'id', None), e)
-
-        # final blend
-        try:
-            embedding_val = embedding_pct or 0.0
-            tfidf_val = tfidf_pct or 0.0
-            skills_val = skills_pct or 0.0
-            if embedding_pct:
-                final_score = 0.6 * embedding_val + 0.2 * tfidf_val + 0.2 * skills_val
-            else:
-                final_score = 0.8 * tfidf_val + 0.2 * skills_val
-            final_score = float(final_score)
-        except Exception:
-            final_score = 0.0
-
-        final_score = max(0.0, min(100.0, round(final_score, 2)))
-
-        results.append({
-            "resume_id": r.id,
-            "user": getattr(r.user, 'username', ''),
-            "skills": r.skills or '',
-            "experience": r.experience or 0,
-            "embedding_score": round(embedding_pct, 2) if embedding_pct is not None else None,
-            "tfidf_score": round(tfidf_pct, 2) if tfidf_pct is not None else None,
-            "skills_score": round(skills_pct, 2),
-            "score": final_score,
-            "missing_skills": sorted(list(job_skills - resume_skills))
-        })
-
-    results_sorted = sorted(results, key=lambda x: float(x.get('score', 0)), reverse=True)
-    cache_key = f"job_matches_{job.id}"
-    cache.set(cache_key, results_sorted, CACHE_TTL)
-
     page = int(request.GET.get('page', 1))
     page_size = int(request.GET.get('page_size', 20))
     start = (page - 1) * page_size
     end = start + page_size
-    paged = results_sorted[start:end]
 
-    return Response({
+    # ?cursor= (the previous response's next_cursor) continues after that
+    # (score, resume_id) instead of counting rows from the top
+    after = None
+    if request.GET.get('cursor'):
+        score, resume_id = decode_cursor(request.GET['cursor'], 2)
+        if not isinstance(score, (int, float)) or not isinstance(resume_id, int):
+            raise CursorError()
+        after = (float(score), resume_id)
+        start, end = 0, page_size
+
+    # structured filters (?min_experience= &location= &uploaded_since= &must_have=
+    # &include_history=) shrink the pool first; similarity then runs only on what survives
+    try:
+        filters = parse_filters(request.GET)
+    except FilterError as e:
+        return Response(e.detail, status=400)
+
+    if filters.active:
+        resumes, prune_stats = apply_filters(filters)
+        job_embedding = job_embedding_for(job)
+        total = len(resumes)
+        resumes = prefilter('resume', job, resumes)
+        if len(resumes) < total:
+            prune_stats.append({"stage": "vector_prefilter", "before": total,
+                                "after": len(resumes), "pruned": total - len(resumes)})
+        index = get_tfidf_index()
+        _, paged = rank_resumes_for_job(
+            job, resumes, resume_texts_for(resumes, index), top_k=end,
+            job_embedding=job_embedding, index=index, after=after,
+        )
+        paged = paged[start:end]
+        last = (paged[-1]["score"], paged[-1]["resume_id"]) if len(paged) == page_size else None
+    else:
+        # incrementally maintained ranked set (canonical resumes): read only this page
+        if after is not None:
+            hit = ranking_store.page_after_for_job(job.id, after, page_size)
+        else:
+            hit = ranking_store.page_for_job(job.id, start, end)
+        if hit is not None:
+            total, ranked = hit
+            paged = ranking_store.rows_for_page(job, ranked)
+            # the cursor follows the stored scores the set is ordered by
+            last = (ranked[-1][1], ranked[-1][0]) if len(ranked) == page_size else None
+        else:
+            # set not built yet: serve from the cached full ranking meanwhile
+            ranking_store.schedule_job_rebuild(job.id)
+            ranking = get_job_ranking(job)
+            total = ranking["total"]
+            rows = ranking["rows"]
+            if after is not None:
+                rows = [r for r in rows if (r["score"], -r["resume_id"]) < (after[0], -after[1])]
+            paged = rows[start:end]
+            last = (paged[-1]["score"], paged[-1]["resume_id"]) if len(paged) == page_size else None
+
+    data = {
         "job_title": job.title,
-        "total": len(results_sorted),
+        "total": total,
         "page": page,
         "page_size": page_size,
-        "matched_resumes": paged
-    })
+        "matched_resumes": paged,
+        "next_cursor": encode_cursor(last) if last else None,
+    }
+    if filters.active:
+        data["filters"] = filters.describe()
+        data["prune_stats"] = prune_stats
+    return Response(data, headers=next_links(request, data["next_cursor"]))
 
 
 
@@ -424,11 +340,10 @@ def shortlist_resume(request):
     try:
         if request.method == 'GET':
             job_id = request.GET.get('job_id')
-            qs = Shortlist.objects.select_related('job', 'resume', 'shortlisted_by').all()
+            qs = optimize(Shortlist.objects.all(), ShortlistSerializer)
             if job_id:
                 qs = qs.filter(job__id=job_id)
-            serializer = ShortlistSerializer(qs, many=True)
-            return Response(serializer.data)
+            return paginated(request, qs, ('-created_at', '-id'), ShortlistSerializer)
 
         if request.method == 'POST':
             if not is_recruiter(request.user):
@@ -527,6 +442,8 @@ def shortlist_resume(request):
 
         return Response({"error": "Method not allowed"}, status=405)
 
+    except CursorError:
+        raise
     except Exception as outer_e:
         logger.exception("Unhandled error in shortlist_resume: %s", outer_e)
         return Response({"error": "Server error"}, status=500)
@@ -553,7 +470,37 @@ def recommended_jobs(request, resume_id):
     except Resume.DoesNotExist:
         return Response({"error": "Resume not found"}, status=404)
 
-    jobs = Job.objects.all()
+    limit = None
+    if request.GET.get('limit'):
+        try:
+            limit = int(request.GET['limit'])
+        except ValueError:
+            limit = -1
+        if limit < 1:
+            return Response({"error": "limit must be a positive integer"}, status=400)
+
+    if not resume.is_latest:
+        # only canonical resumes are materialized; older versions on request, cached not stored
+        if not flag(request.GET, 'include_history'):
+            latest = Resume.objects.filter(user=request.user, is_latest=True).values_list('id', flat=True).first()
+            return Response({"resume": resume.id, "recommended_jobs": [], "latest_resume": latest})
+        resume_text = getattr(resume, 'extracted_text', '') or (resume.skills or '')
+        results = recommendations.history_for_resume(resume, lambda: rank_jobs_for_resume(
+            resume, prefilter('job', resume, Job.objects.all()), resume_text, index=get_tfidf_index()))
+        return Response({"resume": resume.id, "recommended_jobs": results[:limit] if limit is not None else results,
+                         "top_k": recommendations.top_k()})
+
+    # materialized in the background; one row read
+    rec = recommendations.get_for_resume(resume.id)
+    if rec is not None:
+        return Response({
+            "resume": resume.id,
+            "recommended_jobs": recommendations.rows_for(rec, limit),
+            "computed_at": rec.computed_at,
+            "top_k": recommendations.top_k(),
+        })
+
+    jobs = prefilter('job', resume, Job.objects.all())
 
     resume_text = getattr(resume, 'extracted_text', '') or (resume.skills or '')
     if not resume_text and resume.file:
@@ -565,34 +512,13 @@ def recommended_jobs(request, resume_id):
     if not resume_text:
         return Response({"resume": resume.id, "recommended_jobs": []})
 
-    results = []
-    for job in jobs:
-        job_text = " ".join(filter(None, [getattr(job, 'title', ''), getattr(job, 'description', ''), getattr(job, 'skills_required', '')])).strip()
-        if not job_text:
-            continue
-        score_val = 0.0
-        try:
-            raw_score = score_resume_for_job(job_text, resume_text, job_skills=job.skills_required, resume_skills=resume.skills)
-            if isinstance(raw_score, dict):
-                raw_score = raw_score.get('score', 0.0)
-            score_val = float(str(raw_score).strip().rstrip('%') or 0.0)
-        except Exception as e:
-            logger.exception("recommended_jobs scoring error for job %s: %s", getattr(job, 'id', None), e)
-            score_val = 0.0
-
-        if score_val <= 1.0:
-            score_val = score_val * 100.0
-
-        results.append({
-            "job_id": job.id,
-            "title": job.title,
-            "company": getattr(job, 'company', ''),
-            "skills_required": job.skills_required,
-            "score": round(score_val, 2),
-        })
-
-    results = sorted(results, key=lambda x: x['score'], reverse=True)
-    return Response({"resume": resume.id, "recommended_jobs": results})
+    # not materialized yet: score synchronously and keep the result
+    results = rank_jobs_for_resume(resume, jobs, resume_text, index=get_tfidf_index())
+    recommendations.store_for_resume(resume.id, {r["job_id"]: r["score"] for r in results})
+    # same cap as the stored row later requests are served from
+    k = recommendations.top_k()
+    results = results[:min(limit, k) if limit is not None else k]
+    return Response({"resume": resume.id, "recommended_jobs": results, "top_k": k})
 
 
 @api_view(['POST'])
@@ -635,19 +561,10 @@ def apply_for_job(request):
 
     score_snapshot = None
     try:
-        job_text = " ".join(filter(None, [getattr(job, 'title', ''), getattr(job, 'description', ''), getattr(job, 'skills_required', '')]))
         resume_text = getattr(resume, 'extracted_text', None) or getattr(resume, 'skills', '') or ''
-        raw = score_resume_for_job(job_text, resume_text, job_skills=getattr(job, 'skills_required', ''), resume_skills=getattr(resume, 'skills', ''))
-        if isinstance(raw, dict):
-            raw = raw.get('score', 0.0)
-        try:
-            tmp = float(str(raw).strip().rstrip('%'))
-            if tmp <= 1.0:
-                tmp = tmp * 100.0
-            score_snapshot = max(0.0, min(100.0, round(tmp, 2)))
-        except Exception:
-            score_snapshot = None
+        score_snapshot = score_resume_for_job_pair(job, resume, resume_text, index=get_tfidf_index())
     except Exception:
+        logger.exception("score snapshot failed for job %s resume %s", job_id, resume_id)
         score_snapshot = None
 
     try:
@@ -676,9 +593,14 @@ def apply_for_job(request):
     return Response(serializer.data, status=201)
 
 
-class ApplicationViewSet(viewsets.ModelViewSet):
+class ApplicationPagination(KeysetPagination):
+    ordering = ('-applied_at', '-id')
+
+
+class ApplicationViewSet(OptimizedQuerysetMixin, viewsets.ModelViewSet):
     queryset = Application.objects.all()
     serializer_class = ApplicationSerializer
+    pagination_class = ApplicationPagination
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
@@ -704,10 +626,12 @@ def my_applications(request):
     Return applications for the logged-in candidate, with flattened job title and resume info
     so frontend can show job name without extra lookups.
     """
-    qs = Application.objects.filter(candidate=request.user).select_related('job', 'resume').order_by('-applied_at')
+    qs = Application.objects.filter(candidate=request.user).select_related('job', 'resume')
+    paginator = ApplicationPagination()
+    page = paginator.paginate_queryset(qs, request)
 
     out = []
-    for a in qs:
+    for a in page:
         job = getattr(a, 'job', None)
         resume = getattr(a, 'resume', None)
         out.append({
@@ -724,7 +648,7 @@ def my_applications(request):
             "score": getattr(a, 'score_snapshot', None) or getattr(a, 'score', None) or ''
         })
 
-    return Response(out, status=200)
+    return Response(out, status=200, headers=paginator.response_headers())
 
 
 
@@ -734,48 +658,49 @@ def recruiter_applications(request):
     if not is_recruiter(request.user):
         return Response({"detail":"Only recruiters allowed."}, status=403)
     job_id = request.GET.get('job_id')
-    qs = Application.objects.select_related('candidate','resume','job').all()
+    qs = optimize(Application.objects.all(), ApplicationSerializer)
     try:
         qs = qs.filter(job__created_by=request.user)
     except Exception:
         pass
     if job_id:
         qs = qs.filter(job__id=job_id)
-    serializer = ApplicationSerializer(qs, many=True, context={'request': request})
-    return Response(serializer.data)
+    return paginated(request, qs, ApplicationPagination.ordering, ApplicationSerializer, context={'request': request})
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def my_quiz_attempts(request):
-    qs = QuizAttempt.objects.filter(candidate=request.user).order_by('-started_at')
+    paginator = KeysetPagination(('-started_at', '-id'))
+    qs = paginator.paginate_queryset(QuizAttempt.objects.filter(candidate=request.user), request)
     # It's expected you have a QuizAttemptSerializer; if not, return minimal shape
     try:
         from .serializers import QuizAttemptSerializer
         serializer = QuizAttemptSerializer(qs, many=True, context={'request': request})
-        return Response(serializer.data)
+        return paginator.get_paginated_response(serializer.data)
     except Exception:
         data = [
             {"id": a.id, "quiz_id": getattr(a, 'quiz_id', None), "passed": getattr(a, 'passed', None), "score": getattr(a, 'score', None), "started_at": getattr(a, 'started_at', None), "finished_at": getattr(a, 'finished_at', None)}
             for a in qs
         ]
-        return Response(data)
+        return paginator.get_paginated_response(data)
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def my_invites_api(request):
-    qs = InterviewInvite.objects.filter(candidate=request.user).order_by('-scheduled_at')
+    paginator = KeysetPagination(('-created_at', '-id'))
+    qs = paginator.paginate_queryset(InterviewInvite.objects.filter(candidate=request.user), request)
     try:
         from .serializers import InterviewInviteSerializer
         serializer = InterviewInviteSerializer(qs, many=True, context={'request': request})
-        return Response(serializer.data)
+        return paginator.get_paginated_response(serializer.data)
     except Exception:
         data = [
             {"id": i.id, "job_id": getattr(i, 'job_id', None), "scheduled_at": getattr(i, 'scheduled_at', None), "status": getattr(i, 'status', None)}
             for i in qs
         ]
-        return Response(data)
+        return paginator.get_paginated_response(data)
 
 
 @login_required